@@ -1,25 +1,133 @@
-from typing import List, Dict
+from collections.abc import Mapping
+from typing import Any, List, Dict, Tuple, Union
+from analyzer.metrics import stage_seconds
 from analyzer.models import InvestmentAdvice
 import numpy as np
 
 
+# 股票数据：行式 List[dict]、列式 {列名: 数组} 或 pandas DataFrame
+StockInput = Union[List[dict], Mapping, Any]
+
+
+def _length(stock_data: StockInput) -> int:
+    """股票数量"""
+    if stock_data is None:
+        return 0
+    if isinstance(stock_data, Mapping):
+        return len(next(iter(stock_data.values()), []))
+    return len(stock_data)
+
+
+def _changes(stock_data: StockInput) -> np.ndarray:
+    """取出涨跌幅列；缺失值按 0 处理（与 s.get('change_percent', 0) 一致）"""
+    if isinstance(stock_data, list):
+        return np.array([s.get('change_percent', 0) for s in stock_data], dtype=float)
+    if 'change_percent' not in stock_data:
+        return np.zeros(_length(stock_data))
+    changes = np.asarray(stock_data['change_percent'], dtype=float)
+    return np.nan_to_num(changes, nan=0.0)
+
+
+def _factorize(values) -> Tuple[np.ndarray, list]:
+    """把市场名编码为整数（按首次出现顺序）"""
+    codes: Dict[Any, int] = {}
+    inverse = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.intp, count=len(values))
+    return inverse, list(codes)
+
+
+def _market_codes(stock_data: StockInput, count: int) -> Tuple[np.ndarray, list]:
+    """取出市场列并编码，返回 (每只股票的市场编号, 市场名列表)；缺失时为空字符串"""
+    if isinstance(stock_data, list):
+        return _factorize([s.get('market') or '' for s in stock_data])
+    if 'market' not in stock_data:
+        return np.zeros(count, dtype=np.intp), ['']
+    markets = stock_data['market']
+    if hasattr(markets, 'factorize'):
+        # pandas Series
+        inverse, names = markets.fillna('').factorize()
+        return inverse, list(names)
+    return _factorize([m if m is not None else '' for m in np.asarray(markets, dtype=object).tolist()])
+
+
+class MarketStats:
+    """
+    一组股票涨跌幅的统计量：数量、均值、标准差（总体）、上涨/下跌家数
+    一次向量化计算得到，建议生成的各步骤共用
+    """
+
+    def __init__(self, count: int = 0, mean: float = 0.0, std: float = 0.0, n_pos: int = 0, n_neg: int = 0):
+        self.count = count
+        self.mean = mean
+        self.std = std
+        self.n_pos = n_pos
+        self.n_neg = n_neg
+
+    @classmethod
+    def from_changes(cls, changes: np.ndarray) -> "MarketStats":
+        """从涨跌幅数组计算（与 np.mean / np.std 结果一致）"""
+        count = len(changes)
+        if count == 0:
+            return cls()
+        mean = changes.sum() / count
+        deviation = changes - mean
+        return cls(
+            count=count,
+            mean=mean,
+            std=np.sqrt((deviation * deviation).sum() / count),
+            n_pos=int(np.count_nonzero(changes > 0)),
+            n_neg=int(np.count_nonzero(changes < 0)),
+        )
+
+    @classmethod
+    def from_stock_data(cls, stock_data: StockInput) -> "MarketStats":
+        """从行式或列式股票数据计算"""
+        if _length(stock_data) == 0:
+            return cls()
+        return cls.from_changes(_changes(stock_data))
+
+    @classmethod
+    def by_market(cls, changes: np.ndarray, inverse: np.ndarray, names: list) -> Dict[str, "MarketStats"]:
+        """按市场分组计算（inverse 为每只股票的市场编号），所有分组共用一次 bincount"""
+        if len(changes) == 0:
+            return {}
+        counts = np.bincount(inverse, minlength=len(names))
+        means = np.bincount(inverse, weights=changes) / counts
+        deviation = changes - means[inverse]
+        stds = np.sqrt(np.bincount(inverse, weights=deviation * deviation) / counts)
+        n_pos = np.bincount(inverse, weights=changes > 0)
+        n_neg = np.bincount(inverse, weights=changes < 0)
+        return {
+            str(name): cls(int(counts[i]), means[i], stds[i], int(n_pos[i]), int(n_neg[i]))
+            for i, name in enumerate(names)
+        }
+
+
 class InvestmentAdvisor:
-    """投资建议生成器"""
+    """
+    投资建议生成器
+    股票数据可以是 List[dict]、{列名: 数组} 或 pandas DataFrame；
+    各步骤也接受已算好的 MarketStats，generate_advice 只统计一次
+    """
 
     def __init__(self):
         self.risk_levels = ['低风险', '中等风险', '高风险']
 
-    def calculate_market_trend(self, stock_data: List[dict]) -> float:
+    @staticmethod
+    def market_stats(stock_data: Union[StockInput, MarketStats]) -> MarketStats:
+        """计算（或直接返回已有的）涨跌幅统计量"""
+        if isinstance(stock_data, MarketStats):
+            return stock_data
+        return MarketStats.from_stock_data(stock_data)
+
+    def calculate_market_trend(self, stock_data: Union[StockInput, MarketStats]) -> float:
         """计算市场趋势"""
-        if not stock_data:
+        stats = self.market_stats(stock_data)
+        if stats.count == 0:
             return 0.0
 
-        changes = [s.get('change_percent', 0) for s in stock_data]
-        avg_change = np.mean(changes)
-
-        return avg_change
+        return stats.mean
 
-    def analyze_market_outlook(self, stock_data: List[dict], sentiment_result: dict) -> str:
+    def analyze_market_outlook(self, stock_data: Union[StockInput, MarketStats], sentiment_result: dict) -> str:
         """分析市场前景"""
         sentiment_score = sentiment_result.get('overall_sentiment', 0.5)
         market_trend = self.calculate_market_trend(stock_data)
@@ -35,20 +143,18 @@ class InvestmentAdvisor:
         else:
             return "市场情绪中性，技术面震荡，建议观望为主"
 
-    def get_sector_recommendations(self, stock_data: List[dict]) -> List[str]:
+    def get_sector_recommendations(self, stock_data: Union[StockInput, MarketStats]) -> List[str]:
         """获取行业推荐"""
         recommendations = []
 
-        if not stock_data:
+        stats = self.market_stats(stock_data)
+        if stats.count == 0:
             return ["建议均衡配置各行业，分散投资风险"]
 
-        positive_stocks = [s for s in stock_data if s.get('change_percent', 0) > 0]
-        negative_stocks = [s for s in stock_data if s.get('change_percent', 0) < 0]
-
-        if len(positive_stocks) > len(negative_stocks):
+        if stats.n_pos > stats.n_neg:
             recommendations.append("市场整体偏强，可适当增加权益类资产配置")
             recommendations.append("科技、新能源等成长板块表现较好，可重点关注")
-        elif len(negative_stocks) > len(positive_stocks):
+        elif stats.n_neg > stats.n_pos:
             recommendations.append("市场偏弱，建议控制仓位，注重防御")
             recommendations.append("可关注消费、医药等防御性板块")
         else:
@@ -57,12 +163,13 @@ class InvestmentAdvisor:
 
         return recommendations
 
-    def assess_risk(self, stock_data: List[dict], sentiment_result: dict) -> str:
+    def assess_risk(self, stock_data: Union[StockInput, MarketStats], sentiment_result: dict) -> str:
         """评估风险等级"""
-        if not stock_data:
+        stats = self.market_stats(stock_data)
+        if stats.count == 0:
             return self.risk_levels[1]
 
-        volatility = np.std([s.get('change_percent', 0) for s in stock_data])
+        volatility = stats.std
         sentiment_score = sentiment_result.get('overall_sentiment', 0.5)
 
         if volatility > 3.0 or sentiment_score < 0.3:
@@ -72,11 +179,11 @@ class InvestmentAdvisor:
         else:
             return self.risk_levels[0]
 
-    def get_action_suggestions(self, stock_data: List[dict], risk_level: str) -> List[str]:
+    def get_action_suggestions(self, stock_data: Union[StockInput, MarketStats], risk_level: str) -> List[str]:
         """获取操作建议"""
         suggestions = []
 
-        if not stock_data:
+        if self.market_stats(stock_data).count == 0:
             return ["建议观望，等待更多市场信号"]
 
         if risk_level == "高风险":
@@ -94,12 +201,14 @@ class InvestmentAdvisor:
 
         return suggestions
 
-    def generate_advice(self, stock_data: List[dict], sentiment_result: dict) -> InvestmentAdvice:
+    def generate_advice(self, stock_data: Union[StockInput, MarketStats], sentiment_result: dict) -> InvestmentAdvice:
         """生成投资建议"""
-        market_outlook = self.analyze_market_outlook(stock_data, sentiment_result)
-        sector_recommendations = self.get_sector_recommendations(stock_data)
-        risk_level = self.assess_risk(stock_data, sentiment_result)
-        action_suggestions = self.get_action_suggestions(stock_data, risk_level)
+        with stage_seconds.time('advice'):
+            stats = self.market_stats(stock_data)
+            market_outlook = self.analyze_market_outlook(stats, sentiment_result)
+            sector_recommendations = self.get_sector_recommendations(stats)
+            risk_level = self.assess_risk(stats, sentiment_result)
+            action_suggestions = self.get_action_suggestions(stats, risk_level)
 
         return InvestmentAdvice(
             market_outlook=market_outlook,
@@ -108,3 +217,14 @@ class InvestmentAdvisor:
             action_suggestions=action_suggestions,
             disclaimer="本建议仅供参考，投资有风险，入市需谨慎。请根据自己的风险承受能力做出投资决策。"
         )
+
+    def generate_market_advice(self, stock_data: StockInput, sentiment_result: dict) -> Dict[str, InvestmentAdvice]:
+        """按市场（market 列）分别生成投资建议，所有市场的统计量一次算出"""
+        if _length(stock_data) == 0:
+            return {}
+        changes = _changes(stock_data)
+        inverse, names = _market_codes(stock_data, len(changes))
+        return {
+            market: self.generate_advice(stats, sentiment_result)
+            for market, stats in MarketStats.by_market(changes, inverse, names).items()
+        }
@@ -0,0 +1,192 @@
+"""日内聚合模块 - 按天维护情感、行业和涨跌幅的累计量，只处理新增数据"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analyzer.advisor import MarketStats
+from analyzer.indicators import parse_timestamp
+
+
+def article_id(news: dict) -> str:
+    """新闻去重键（标题 + 正文）"""
+    text = f"{news.get('title', '')}\x00{news.get('content', '')}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class RunningMoments:
+    """涨跌幅的 Welford 累计矩：数量、均值、二阶中心矩和上涨/下跌家数，支持移除已加入的值"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.n_pos = 0
+        self.n_neg = 0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.n_pos += x > 0
+        self.n_neg += x < 0
+
+    def remove(self, x: float):
+        self.n -= 1
+        if self.n == 0:
+            self.mean = self.m2 = 0.0
+        else:
+            delta = x - self.mean
+            self.mean -= delta / self.n
+            self.m2 -= delta * (x - self.mean)
+        self.n_pos -= x > 0
+        self.n_neg -= x < 0
+
+    def market_stats(self) -> MarketStats:
+        """转为 MarketStats（总体标准差）"""
+        if self.n == 0:
+            return MarketStats()
+        return MarketStats(self.n, self.mean, math.sqrt(max(self.m2, 0.0) / self.n), self.n_pos, self.n_neg)
+
+
+class DayAggregate:
+    """
+    单日累计量
+    情感：分数和、条数，以及按发布时间加权的和；行业：出现次数；
+    涨跌幅：每只股票最新值的 Welford 矩（同一股票再次上报时替换旧值）
+    """
+
+    def __init__(self, day: date, half_life_hours: Optional[float] = None):
+        self.day = day
+        self.half_life_hours = half_life_hours
+        # 加权基准时间：当天 0 点，权重 2^((t - t0) / h)，新增新闻不需要重算旧权重
+        self._t0 = datetime.combine(day, datetime.min.time()).timestamp()
+
+        self.seen: set = set()
+        self.sentiment_sum = 0.0
+        self.sentiment_count = 0
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+        self.industry_counts: Counter = Counter()
+
+        self.changes: Dict[str, float] = {}
+        self.moments = RunningMoments()
+
+    def weight(self, published_at) -> float:
+        """新闻权重；未开启加权时为 1，没有发布时间时按当前时间计"""
+        if not self.half_life_hours:
+            return 1.0
+        t = parse_timestamp(published_at)
+        if math.isnan(t):
+            t = time.time()
+        exponent = (t - self._t0) / (self.half_life_hours * 3600)
+        # 限制指数范围，避免异常时间戳导致累加溢出
+        return 2.0 ** max(-200.0, min(exponent, 200.0))
+
+    def add_article(self, news: dict, detail: Optional[dict], score: Optional[float]) -> bool:
+        """累加一条新闻（已计入的新闻忽略），返回是否新计入"""
+        key = article_id(news)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        if detail is None:
+            return True
+        weight = self.weight(news.get('published_at'))
+        self.sentiment_sum += score
+        self.sentiment_count += 1
+        self.weighted_sum += weight * score
+        self.weight_total += weight
+        self.industry_counts.update(detail.get('industries', []))
+        return True
+
+    def set_change(self, symbol: str, change_percent: float):
+        """更新某只股票当日涨跌幅（替换之前上报的值）"""
+        old = self.changes.get(symbol)
+        if old is not None:
+            self.moments.remove(old)
+        self.changes[symbol] = change_percent
+        self.moments.add(change_percent)
+
+    @property
+    def overall_sentiment(self) -> float:
+        """当日平均情感（开启加权时为加权平均）；没有新闻时为 0.5"""
+        if self.sentiment_count == 0:
+            return 0.5
+        if self.half_life_hours:
+            return self.weighted_sum / self.weight_total
+        return self.sentiment_sum / self.sentiment_count
+
+    def market_stats(self) -> MarketStats:
+        """当日涨跌幅统计量"""
+        return self.moments.market_stats()
+
+    def recompute_market_stats(self) -> MarketStats:
+        """从保存的各股票最新涨跌幅重新计算（用于校验增量结果）"""
+        return MarketStats.from_changes(np.fromiter(self.changes.values(), dtype=float, count=len(self.changes)))
+
+    def to_dict(self) -> dict:
+        """当日情感汇总"""
+        return {
+            'date': self.day.isoformat(),
+            'overall_sentiment': round(self.overall_sentiment, 3),
+            'article_count': self.sentiment_count,
+            'recency_half_life_hours': self.half_life_hours,
+            'industry_counts': dict(self.industry_counts.most_common()),
+        }
+
+
+class DailyAggregator:
+    """按天管理 DayAggregate，只保留最近 retention_days 天"""
+
+    def __init__(self, half_life_hours: Optional[float] = None, retention_days: int = 3):
+        self.half_life_hours = half_life_hours
+        self.retention_days = max(1, retention_days)
+        self._days: Dict[date, DayAggregate] = {}
+        self._lock = threading.Lock()
+
+    def day(self, day: Optional[date] = None) -> DayAggregate:
+        """获取（必要时创建）某天的累计量"""
+        day = day or date.today()
+        aggregate = self._days.get(day)
+        if aggregate is None:
+            aggregate = self._days[day] = DayAggregate(day, self.half_life_hours)
+            for old in sorted(self._days)[:-self.retention_days]:
+                del self._days[old]
+        return aggregate
+
+    def new_articles(self, news_data: List[dict], day: Optional[date] = None) -> List[dict]:
+        """过滤掉当天已计入的新闻（同一批内重复的也只保留一条）"""
+        with self._lock:
+            seen = self.day(day).seen
+            fresh, keys = [], set()
+            for news in news_data:
+                key = article_id(news)
+                if key not in seen and key not in keys:
+                    keys.add(key)
+                    fresh.append(news)
+            return fresh
+
+    def apply(self, news_data: List[dict], scored: List[Optional[Tuple[dict, float]]],
+              stock_data: List[dict], day: Optional[date] = None) -> DayAggregate:
+        """
+        合并一批新增数据
+        news_data 与 scored 一一对应（scored 来自 score_news，空新闻为 None）；
+        stock_data 中每只股票的涨跌幅替换当天之前的值
+        """
+        with self._lock:
+            aggregate = self.day(day)
+            for news, item in zip(news_data, scored):
+                detail, score = item if item is not None else (None, None)
+                aggregate.add_article(news, detail, score)
+            for s in stock_data:
+                symbol = s.get('symbol')
+                if symbol:
+                    aggregate.set_change(symbol, float(s.get('change_percent') or 0))
+            return aggregate
@@ -0,0 +1,100 @@
+"""批量情感分析模块 - 多进程并行打分"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional, Sequence, Tuple
+
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from analyzer.lexicon_artifact import load_lexicon, sync_lexicon
+from analyzer.models import SentimentAnalysisResult
+from analyzer.sentiment import SentimentAnalyzer
+
+
+# 工作进程内的分析器实例（由 _init_worker 在进程启动时创建一次）
+_worker_analyzer: Optional[SentimentAnalyzer] = None
+
+
+def _init_worker(lexicon_path: Optional[str] = None, budget: Optional[TextBudget] = None,
+                 cascade: Optional[LexiconCascade] = None):
+    """工作进程初始化：加载词典和 jieba 词库（打分预算、级联策略与主进程的分析器相同）"""
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(lexicon=load_lexicon(lexicon_path) if lexicon_path else None,
+                                         budget=budget, cascade=cascade)
+
+
+def _score_chunk(chunk: List[dict], lexicon_path: Optional[str] = None, lexicon_version: Optional[str] = None,
+                 keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+    """在工作进程中分析一个分块（词典版本与主进程不一致时先重新加载）"""
+    if lexicon_version is not None:
+        sync_lexicon(_worker_analyzer, lexicon_path, lexicon_version)
+    return _worker_analyzer.score_news_items(chunk, keywords)
+
+
+class BatchSentimentEngine:
+    """批量情感分析引擎：把新闻列表切块后交给进程池并行分析"""
+
+    def __init__(self, analyzer: Optional[SentimentAnalyzer] = None, workers: Optional[int] = None,
+                 chunk_size: int = 200):
+        """
+        初始化批量引擎
+        workers: 工作进程数，None 表示 CPU 核数，<= 1 表示在当前进程内串行执行
+        chunk_size: 每个分块的新闻条数
+        """
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """获取进程池（懒加载）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.analyzer.lexicon.source, self.analyzer.budget,
+                                                           self.analyzer.cascade))
+        return self._executor
+
+    def _chunks(self, news_list: List[dict]) -> List[List[dict]]:
+        """按 chunk_size 切块"""
+        return [news_list[i:i + self.chunk_size] for i in range(0, len(news_list), self.chunk_size)]
+
+    def score_news(self, news_list: List[dict], keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+        """逐条打分，结果与输入顺序一致（命中结果缓存的条目不再计算；keywords 为 False 时不提取关键词）"""
+        return self.analyzer.score_news(news_list, scorer=partial(self._score_uncached, keywords=keywords),
+                                        keywords=keywords)
+
+    def _score_uncached(self, news_list: List[dict], keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+        """计算未命中缓存的新闻：小批量在当前进程整批计算，大批量按块交给进程池"""
+        if self.workers <= 1 or len(news_list) <= self.chunk_size:
+            return self.analyzer.score_news_items(news_list, keywords)
+
+        # 工作进程按分块同步主进程当前的词典版本，保证结果与缓存版本一致
+        chunks = self._chunks(news_list)
+        lexicon = self.analyzer.lexicon
+        scored = []
+        for chunk_result in self.executor.map(_score_chunk, chunks, [lexicon.source] * len(chunks),
+                                              [lexicon.version] * len(chunks), [keywords] * len(chunks)):
+            scored.extend(chunk_result)
+        return scored
+
+    def analyze_news_sentiment(self, news_list: List[dict], weighting: str = 'article',
+                               fields: Optional[Sequence[str]] = None) -> SentimentAnalysisResult:
+        """批量分析新闻情感，汇总方式与明细字段选择与 SentimentAnalyzer.analyze_news_sentiment 相同"""
+        if not news_list:
+            return self.analyzer.analyze_news_sentiment([])
+        keywords = fields is None or 'keywords' in fields
+        return self.analyzer.build_result(self.score_news(news_list, keywords), weighting, fields)
+
+    def close(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,168 @@
+"""
+长文本打分预算模块 - 限制单篇文档参与打分的文本量
+
+SnowNLP 分词和词典扫描的耗时都随正文长度增长，少数研报全文这类长文会拖慢整批；
+超过预算的文档先打分标题和导语，再按句子块追加，组合分数连续几块都基本不变或用完预算时停止
+SnowNLP 特征词权重和词典命中次数都可以按句子累加，追加句子块时只处理新增部分
+同时设置了级联策略时，词典已足够可靠的文档不做 SnowNLP 分词，之后词典不再可靠时再补分之前跳过的部分
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from analyzer.cascade import LexiconCascade
+from analyzer.document import DocumentContext
+from analyzer.financial_lexicon import FinancialLexicon
+from analyzer.snownlp_model import default_model
+
+
+# 按句末标点切句（保留标点；小数点不作为句末）
+_SENTENCE_END = re.compile(r'(?<=[。！？!?])')
+
+
+def split_sentences(text: str) -> List[str]:
+    """切分为句子（拼接后与原文相同）"""
+    return [sentence for sentence in _SENTENCE_END.split(text) if sentence]
+
+
+class TextBudget:
+    """
+    单篇文档的打分文本预算
+    max_chars: 标题 + 正文最多打分的字符数；不超过时整篇打分，结果与不设预算相同
+    lead_chars: 先打分的导语长度（标题 + 开头整句，至少一句）
+    chunk_chars: 之后每次追加的句子块长度（至少一句；超长句子在预算处截断）
+    tolerance / patience: 连续 patience 个句子块追加后组合分数的变化都小于 tolerance 时提前停止，
+                          patience <= 0 时不提前停止，只按 max_chars 截断
+    """
+
+    def __init__(self, max_chars: int = 2000, lead_chars: int = 300, chunk_chars: int = 300,
+                 tolerance: float = 0.01, patience: int = 2):
+        if max_chars <= 0 or lead_chars <= 0 or chunk_chars <= 0:
+            raise ValueError("max_chars, lead_chars and chunk_chars must be positive")
+        self.max_chars = max_chars
+        self.lead_chars = lead_chars
+        self.chunk_chars = chunk_chars
+        self.tolerance = tolerance
+        self.patience = patience
+
+    @property
+    def version(self) -> str:
+        """预算参数摘要（参与结果缓存版本，参数变化时缓存失效）"""
+        return (f"budget:{self.max_chars}/{self.lead_chars}/{self.chunk_chars}/"
+                f"{self.tolerance:g}/{self.patience}")
+
+    def chunks(self, text: str) -> List[str]:
+        """
+        按预算把文本切成依次打分的块：第一块为导语，之后每块约 chunk_chars 字符
+        所有块拼接后是 text 不超过 max_chars 的前缀
+        """
+        chunks = []
+        current = ""
+        used = 0
+        limit = self.lead_chars
+        for sentence in split_sentences(text):
+            sentence = sentence[:self.max_chars - used]
+            if current and len(current) + len(sentence) > limit:
+                chunks.append(current)
+                current = ""
+                limit = self.chunk_chars
+            current += sentence
+            used += len(sentence)
+            if used >= self.max_chars:
+                break
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def documents(self, texts: Sequence[str], lexicon: FinancialLexicon,
+                  combine: Callable[[float, float, int], float],
+                  cascade: Optional[LexiconCascade] = None) -> List[DocumentContext]:
+        """
+        按轮次逐块打分：每轮把所有未停止文档的下一块一起分词（保持 SnowNLP 分词的批量向量化），
+        SnowNLP 权重和词典命中次数按块累加；返回已打分部分的文档上下文（词典命中、需要时特征词和 SnowNLP 分数已填入）
+        combine: 由 (SnowNLP 分数, 词典分数, 词典命中数) 计算组合分数，用于判断分数是否稳定
+        cascade: 级联策略；累计的词典结果被接受时本块不分词，组合分数中 SnowNLP 的位置取 cascade.fallback，
+                 最终被接受的文档不填入特征词和 SnowNLP 分数
+        句首为英文、数字时块边界处的分词可能与整篇分词略有不同
+        """
+        model = default_model()
+        states = [_BudgetState(self.chunks(text)) for text in texts]
+        active = [state for state in states if state.chunks]
+        while active:
+            segment = []
+            for state in active:
+                piece = state.chunks[state.position]
+                state.add(piece, lexicon.count_hits(piece))
+                state.lexicon_result = lexicon.score_hits(state.hits)
+                state.lexicon_only = cascade is not None and cascade.accepts(state.lexicon_result)
+                if not state.lexicon_only:
+                    segment.append(state)
+            if segment:
+                words = model.words_batch([state.unsegmented for state in segment])
+                evidence = model.sentiment.evidence_batch(words)
+                for state, piece_words, piece_evidence in zip(segment, words, evidence):
+                    state.add_words(piece_words, float(piece_evidence))
+                    state.snownlp_score = float(model.sentiment.probability(np.float64(state.evidence)))
+
+            still_active = []
+            for state in active:
+                snownlp_score = cascade.fallback if state.lexicon_only else state.snownlp_score
+                score = combine(snownlp_score, state.lexicon_result['score'], state.lexicon_result['total_keywords'])
+                if state.position < len(state.chunks) and not self._stable(state, score):
+                    still_active.append(state)
+            active = still_active
+
+        docs = []
+        for state in states:
+            doc = DocumentContext(state.text, lexicon)
+            doc._lexicon_hits = state.hits
+            if not state.lexicon_only:
+                doc._snownlp_words = state.words
+                doc._snownlp_score = state.snownlp_score
+            docs.append(doc)
+        return docs
+
+    def _stable(self, state: "_BudgetState", score: float) -> bool:
+        """记录本块后的组合分数；连续 patience 块变化都小于 tolerance 时返回 True"""
+        if state.previous is not None and abs(score - state.previous) < self.tolerance:
+            state.stable += 1
+        else:
+            state.stable = 0
+        state.previous = score
+        return 0 < self.patience <= state.stable
+
+
+class _BudgetState:
+    """单篇文档逐块打分的累计状态"""
+
+    __slots__ = ("chunks", "position", "text", "unsegmented", "words", "evidence", "hits", "lexicon_result",
+                 "lexicon_only", "snownlp_score", "previous", "stable")
+
+    def __init__(self, chunks: List[str]):
+        self.chunks = chunks
+        self.position = 0
+        self.text = ""
+        # 已加入但尚未 SnowNLP 分词的文本（级联模式下词典被接受期间累积）
+        self.unsegmented = ""
+        self.words: List[str] = []
+        self.evidence = 0.0
+        self.hits: Dict[str, int] = {}
+        self.lexicon_result: Optional[dict] = None
+        self.lexicon_only = False
+        self.snownlp_score = 0.5
+        self.previous: Optional[float] = None
+        self.stable = 0
+
+    def add(self, piece: str, hits: Dict[str, int]):
+        self.position += 1
+        self.text += piece
+        self.unsegmented += piece
+        for word, count in hits.items():
+            self.hits[word] = self.hits.get(word, 0) + count
+
+    def add_words(self, words: List[str], evidence: float):
+        self.unsegmented = ""
+        self.words.extend(words)
+        self.evidence += evidence
@@ -1,101 +1,239 @@
 """Redis 缓存模块"""
 import json
 import hashlib
-from typing import Optional, Any
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List
 from functools import wraps
 import os
 
 try:
     import redis
+    import redis.asyncio
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
 
-class CacheManager:
-    """缓存管理器"""
-    
-    def __init__(self, redis_url: Optional[str] = None):
-        """初始化缓存管理器"""
-        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self._client: Optional[Any] = None
-        self._connected = False
-        
+# 压缩值前缀（JSON 文本不会以 NUL 开头，可与未压缩值区分）
+_COMPRESSED_PREFIX = b"\x00zlib:"
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    连续失败达到阈值后进入熔断状态，冷却期内直接跳过 Redis；
+    冷却期结束后放行一次试探请求，成功则恢复
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
     @property
-    def client(self):
-        """获取 Redis 客户端（懒加载）"""
-        if not REDIS_AVAILABLE:
+    def is_open(self) -> bool:
+        """是否处于熔断状态（冷却期内）"""
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """是否允许访问 Redis"""
+        opened_at = self._opened_at
+        if opened_at is None:
+            return True
+        with self._lock:
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                # 半开：重新计时，只放行当前这一次试探
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        """记录一次成功"""
+        if self._failures or self._opened_at is not None:
+            with self._lock:
+                self._failures = 0
+                self._opened_at = None
+
+    def record_failure(self):
+        """记录一次失败"""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"Redis circuit opened after {self._failures} failures, "
+                          f"skipping cache for {self.cooldown}s")
+                self._opened_at = time.monotonic()
+
+
+class _CacheBase:
+    """同步 / 异步缓存客户端共用的键生成、序列化和熔断逻辑"""
+
+    def __init__(self, redis_url: Optional[str] = None, client: Optional[Any] = None,
+                 max_connections: int = 50, socket_timeout: float = 0.5,
+                 failure_threshold: int = 3, cooldown: float = 30.0,
+                 compress_threshold: int = 1024):
+        """
+        初始化缓存客户端
+        client: 直接注入的 Redis 客户端（如测试用的本地替身），为 None 时按 redis_url 懒加载连接池
+        socket_timeout: 连接和读写超时（秒），Redis 故障时单次请求最多等待这么久
+        failure_threshold / cooldown: 熔断阈值（连续失败次数）与冷却时间（秒）
+        compress_threshold: 序列化后超过该字节数的值使用 zlib 压缩，<= 0 表示不压缩
+        """
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.compress_threshold = compress_threshold
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self._client: Optional[Any] = client
+
+    def _generate_key(self, prefix: str, data: Any) -> str:
+        """生成缓存键"""
+        data_str = json.dumps(data, sort_keys=True, default=str)
+        hash_value = hashlib.md5(data_str.encode()).hexdigest()[:16]
+        return f"financial:{prefix}:{hash_value}"
+
+    def _dumps(self, value: Any) -> bytes:
+        """序列化为 JSON，大值压缩"""
+        raw = json.dumps(value, default=str, ensure_ascii=False).encode("utf-8")
+        if 0 < self.compress_threshold <= len(raw):
+            return _COMPRESSED_PREFIX + zlib.compress(raw)
+        return raw
+
+    @staticmethod
+    def _loads(raw: Optional[bytes]) -> Optional[Any]:
+        """反序列化（自动识别压缩值）"""
+        if raw is None:
             return None
-            
-        if self._client is None:
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if raw.startswith(_COMPRESSED_PREFIX):
+            raw = zlib.decompress(raw[len(_COMPRESSED_PREFIX):])
+        return json.loads(raw)
+
+    def _decode_many(self, keys: List[str], values: List[Optional[bytes]]) -> Dict[str, Any]:
+        """逐个反序列化 MGET 结果；无法解码的值与 get() 一样按未命中处理"""
+        result = {}
+        for key, raw in zip(keys, values):
+            if raw is None:
+                continue
             try:
-                self._client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
-                # 测试连接
-                self._client.ping()
-                self._connected = True
+                result[key] = self._loads(raw)
             except Exception as e:
-                print(f"Redis connection failed: {e}")
-                self._client = None
-                self._connected = False
-                
+                self._on_error("mget", e)
+        return result
+
+    def _on_error(self, operation: str, error: Exception):
+        """记录失败并计入熔断器"""
+        self.breaker.record_failure()
+        if not self.breaker.is_open:
+            print(f"Cache {operation} error: {error}")
+
+
+class CacheManager(_CacheBase):
+    """缓存管理器（共享连接池 + 批量操作 + 熔断）"""
+
+    @property
+    def client(self):
+        """获取 Redis 客户端（懒加载，所有实例方法共享同一个连接池）"""
+        if self._client is None and REDIS_AVAILABLE:
+            pool = redis.ConnectionPool.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                socket_connect_timeout=self.socket_timeout,
+                socket_timeout=self.socket_timeout,
+            )
+            self._client = redis.Redis(connection_pool=pool)
         return self._client
-    
+
     @property
     def is_connected(self) -> bool:
-        """检查是否已连接"""
-        if self.client is None:
+        """检查 Redis 是否可用（会发送 PING，仅用于健康检查）"""
+        if self.client is None or not self.breaker.allow():
             return False
         try:
             self.client.ping()
+            self.breaker.record_success()
             return True
-        except Exception:
-            self._connected = False
+        except Exception as e:
+            self._on_error("ping", e)
             return False
-    
-    def _generate_key(self, prefix: str, data: Any) -> str:
-        """生成缓存键"""
-        data_str = json.dumps(data, sort_keys=True, default=str)
-        hash_value = hashlib.md5(data_str.encode()).hexdigest()[:16]
-        return f"financial:{prefix}:{hash_value}"
-    
+
+    def _available(self) -> bool:
+        return self.client is not None and self.breaker.allow()
+
     def get(self, key: str) -> Optional[Any]:
         """获取缓存值"""
-        if not self.is_connected:
+        if not self._available():
             return None
         try:
-            value = self.client.get(key)
-            if value:
-                return json.loads(value)
+            value = self._loads(self.client.get(key))
+            self.breaker.record_success()
+            return value
         except Exception as e:
-            print(f"Cache get error: {e}")
-        return None
-    
+            self._on_error("get", e)
+            return None
+
     def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
         """设置缓存值"""
-        if not self.is_connected:
+        if not self._available():
             return False
         try:
-            self.client.setex(key, ttl, json.dumps(value, default=str))
+            self.client.set(key, self._dumps(value), ex=ttl)
+            self.breaker.record_success()
             return True
         except Exception as e:
-            print(f"Cache set error: {e}")
+            self._on_error("set", e)
             return False
-    
+
     def delete(self, key: str) -> bool:
         """删除缓存值"""
-        if not self.is_connected:
+        if not self._available():
             return False
         try:
             self.client.delete(key)
+            self.breaker.record_success()
             return True
         except Exception as e:
-            print(f"Cache delete error: {e}")
+            self._on_error("delete", e)
             return False
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取（一次 MGET），只返回命中的键"""
+        if not keys or not self._available():
+            return {}
+        try:
+            values = self.client.mget(keys)
+            self.breaker.record_success()
+        except Exception as e:
+            self._on_error("mget", e)
+            return {}
+        return self._decode_many(keys, values)
+
+    def set_many(self, items: Dict[str, Any], ttl: int = 3600) -> bool:
+        """批量写入（一次流水线往返）"""
+        if not items or not self._available():
+            return False
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, self._dumps(value), ex=ttl)
+            pipe.execute()
+            self.breaker.record_success()
+            return True
+        except Exception as e:
+            self._on_error("mset", e)
+            return False
+
+    def close(self):
+        """释放连接池"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
     
     def get_sentiment_cache(self, news_list: list) -> Optional[dict]:
         """获取情感分析缓存"""
@@ -120,6 +258,173 @@ class CacheManager:
         return self.set(key, result, ttl)
 
 
+class AsyncCacheManager(_CacheBase):
+    """异步缓存管理器（redis.asyncio），接口与 CacheManager 一致"""
+
+    @property
+    def client(self):
+        """获取异步 Redis 客户端（懒加载）"""
+        if self._client is None and REDIS_AVAILABLE:
+            self._client = redis.asyncio.Redis.from_url(
+                self.redis_url,
+                max_connections=self.max_connections,
+                socket_connect_timeout=self.socket_timeout,
+                socket_timeout=self.socket_timeout,
+            )
+        return self._client
+
+    def _available(self) -> bool:
+        return self.client is not None and self.breaker.allow()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """获取缓存值"""
+        if not self._available():
+            return None
+        try:
+            value = self._loads(await self.client.get(key))
+            self.breaker.record_success()
+            return value
+        except Exception as e:
+            self._on_error("get", e)
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
+        """设置缓存值"""
+        if not self._available():
+            return False
+        try:
+            await self.client.set(key, self._dumps(value), ex=ttl)
+            self.breaker.record_success()
+            return True
+        except Exception as e:
+            self._on_error("set", e)
+            return False
+
+    async def delete(self, key: str) -> bool:
+        """删除缓存值"""
+        if not self._available():
+            return False
+        try:
+            await self.client.delete(key)
+            self.breaker.record_success()
+            return True
+        except Exception as e:
+            self._on_error("delete", e)
+            return False
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取（一次 MGET），只返回命中的键"""
+        if not keys or not self._available():
+            return {}
+        try:
+            values = await self.client.mget(keys)
+            self.breaker.record_success()
+        except Exception as e:
+            self._on_error("mget", e)
+            return {}
+        return self._decode_many(keys, values)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 3600) -> bool:
+        """批量写入（一次流水线往返）"""
+        if not items or not self._available():
+            return False
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(key, self._dumps(value), ex=ttl)
+            await pipe.execute()
+            self.breaker.record_success()
+            return True
+        except Exception as e:
+            self._on_error("mset", e)
+            return False
+
+    async def close(self):
+        """释放连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class LRUCache:
+    """有界的进程内 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，并标记为最近使用"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        """设置缓存值，超出容量时淘汰最久未使用的条目"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+
+class ArticleCache:
+    """
+    逐条新闻分析结果缓存
+    键为新闻内容哈希 + 词典版本；进程内 LRU 在前，Redis 在后
+    """
+
+    def __init__(self, cache_manager: Optional[CacheManager] = None, max_entries: int = 10000,
+                 ttl: int = 86400):
+        self.local = LRUCache(max_entries)
+        self.cache_manager = cache_manager
+        self.ttl = ttl
+
+    @staticmethod
+    def article_key(news: dict, version: str) -> str:
+        """生成新闻缓存键"""
+        content = f"{news.get('title', '')}\x00{news.get('content', '')}"
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        return f"financial:article:{version}:{digest}"
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取，Redis 命中的结果会回填到进程内缓存"""
+        found = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote_keys.append(key)
+
+        if remote_keys and self.cache_manager is not None:
+            for key, value in self.cache_manager.get_many(remote_keys).items():
+                self.local.set(key, value)
+                found[key] = value
+        return found
+
+    def set_many(self, items: Dict[str, Any]):
+        """批量写入两级缓存"""
+        for key, value in items.items():
+            self.local.set(key, value)
+        if self.cache_manager is not None:
+            self.cache_manager.set_many(items, self.ttl)
+
+
 # 全局缓存管理器实例
 cache_manager = CacheManager()
 
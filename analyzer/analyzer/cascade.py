@@ -0,0 +1,41 @@
+"""
+词典优先的级联打分模块 - 先算词典分数，只有词典把握不足时才调用 SnowNLP
+
+词典命中 6 个以上金融词时 SnowNLP 在组合分数中只占 20%，而它的分词是打分中最耗时的部分；
+级联模式下词典命中数不少于 min_keywords 且倾向足够明确的文档不再调用 SnowNLP，
+组合分数中 SnowNLP 的位置用固定的 fallback 代替（可设为业务数据上 SnowNLP 分数的均值，见 benchmarks.cascade）
+是否跳过只取决于词典结果，同一文档的结果稳定，可以进入结果缓存
+"""
+
+
+class LexiconCascade:
+    """
+    级联打分策略
+    min_keywords: 词典命中数（含中性词）不少于此值才考虑跳过 SnowNLP
+    min_confidence: 词典倾向强度 |词典分数 - 0.5| × 2（0 为中性，1 为最强）不低于此值才跳过
+    fallback: 跳过时代替 SnowNLP 分数参与组合
+    """
+
+    def __init__(self, min_keywords: int = 6, min_confidence: float = 0.2, fallback: float = 0.5):
+        if min_keywords < 1:
+            raise ValueError("min_keywords must be at least 1")
+        if not 0 <= min_confidence <= 1 or not 0 <= fallback <= 1:
+            raise ValueError("min_confidence and fallback must be in [0, 1]")
+        self.min_keywords = min_keywords
+        self.min_confidence = min_confidence
+        self.fallback = fallback
+
+    @property
+    def version(self) -> str:
+        """策略参数摘要（参与结果缓存版本，参数变化时缓存失效）"""
+        return f"cascade:{self.min_keywords}/{self.min_confidence:g}/{self.fallback:g}"
+
+    @staticmethod
+    def confidence(lexicon_result: dict) -> float:
+        """词典倾向强度"""
+        return abs(lexicon_result['score'] - 0.5) * 2
+
+    def accepts(self, lexicon_result: dict) -> bool:
+        """词典结果是否足够可靠，可以不调用 SnowNLP"""
+        return (lexicon_result['total_keywords'] >= self.min_keywords
+                and self.confidence(lexicon_result) >= self.min_confidence)
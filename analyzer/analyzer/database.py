@@ -0,0 +1,370 @@
+"""
+数据库批量分析模块 - 直接从 PostgreSQL 读取 news_data / stock_data 按日期范围分析
+通过服务端游标分块读取，每块打分后只保留累计量，内存占用与范围大小无关；
+也可把逐条情感分数和关键词批量写回 news_data
+
+用法（在 analyzer 目录下）:
+    python -m analyzer.database --start 2024-01-01 --end 2024-01-31 --chunk-size 500
+    python -m analyzer.database --start 2024-01-01 --end 2024-01-31 --write-back
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (BigInteger, Column, DateTime, Integer, MetaData, Numeric, String, Table, Text, bindparam,
+                        create_engine, func, inspect, or_, select, text)
+from sqlalchemy.engine import Engine
+
+from analyzer.advisor import InvestmentAdvisor
+from analyzer.aggregate import RunningMoments
+from analyzer.batch import BatchSentimentEngine
+
+
+# 与采集端（collector/internal/models）建立的表结构一致，只用于构造查询
+metadata = MetaData()
+
+# sentiment_version 列宽（采集端模型为 size:32）
+VERSION_WIDTH = 32
+
+news_table = Table(
+    "news_data", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", Text, nullable=False),
+    Column("content", Text),
+    Column("summary", Text),
+    Column("source", String(100)),
+    Column("url", Text),
+    Column("published_at", DateTime(timezone=True)),
+    Column("sentiment_score", Numeric(3, 2)),
+    Column("keywords", Text),
+    Column("created_at", DateTime(timezone=True)),
+    # 写回 sentiment_score / keywords 时使用的词典版本（采集端模型同样声明了该列）
+    Column("sentiment_version", String(VERSION_WIDTH)),
+)
+
+stock_table = Table(
+    "stock_data", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("symbol", String(20), nullable=False),
+    Column("market", String(10), nullable=False),
+    Column("price", Numeric(10, 2)),
+    Column("change_percent", Numeric(5, 2)),
+    Column("volume", BigInteger),
+    Column("open", Numeric(10, 2)),
+    Column("high", Numeric(10, 2)),
+    Column("low", Numeric(10, 2)),
+    Column("close", Numeric(10, 2)),
+    Column("timestamp", DateTime(timezone=True)),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """创建数据库引擎（连接在首次查询时建立）"""
+    return create_engine(database_url, pool_pre_ping=True)
+
+
+def day_bounds(start: date, end: date) -> Tuple[datetime, datetime]:
+    """日期范围 [start, end]（含两端）对应的时间范围 [start 0 点, end 次日 0 点)"""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def iter_chunks(engine: Engine, query, chunk_size: int) -> Iterator[List[dict]]:
+    """
+    以服务端游标执行查询，每次产出 chunk_size 行（dict）
+    PostgreSQL（psycopg2）下 yield_per 使用命名游标，客户端只缓冲当前分块
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(query)
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+
+def ensure_sentiment_version_column(engine: Engine):
+    """旧库中 news_data 没有 sentiment_version 列时补上"""
+    columns = {column['name'] for column in inspect(engine).get_columns(news_table.name)}
+    if 'sentiment_version' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {news_table.name} ADD COLUMN sentiment_version VARCHAR({VERSION_WIDTH})"))
+
+
+def stored_version(version: str) -> str:
+    """
+    写入 sentiment_version 列的版本标识
+    不超过列宽时原样保存（只含词典版本时与已写回的数据一致）；
+    加上打分预算、级联策略等后缀超过列宽时保存完整版本 sha256 摘要的前 VERSION_WIDTH 位
+    """
+    if len(version) <= VERSION_WIDTH:
+        return version
+    return hashlib.sha256(version.encode("utf-8")).hexdigest()[:VERSION_WIDTH]
+
+
+def format_keywords(keywords: List[str]) -> str:
+    """关键词列格式（与采集端 ExtractKeywords 一致，逗号加空格分隔）"""
+    return ", ".join(keywords)
+
+
+def write_scores(engine: Engine, rows: List[Tuple[int, float, str, str]]) -> int:
+    """
+    批量写回 (id, sentiment_score, keywords, sentiment_version)，返回实际更新的行数
+    PostgreSQL 下先 COPY 到临时表，再用一条 UPDATE ... FROM 合并；
+    已按相同词典版本写过的行不会被再次更新，重复写入是幂等的；
+    版本超过 sentiment_version 列宽时抛出 ValueError（先用 stored_version 转换）
+    """
+    if not rows:
+        return 0
+    too_long = [version for _, _, _, version in rows if len(version) > VERSION_WIDTH]
+    if too_long:
+        raise ValueError(f"sentiment_version longer than {VERSION_WIDTH} characters: {too_long[0]!r}")
+    if engine.dialect.name == "postgresql":
+        return _copy_scores(engine, rows)
+
+    # 其他数据库（测试用 SQLite）：逐行参数化 UPDATE，语义相同
+    c = news_table.c
+    statement = (news_table.update()
+                 .where(c.id == bindparam('row_id'),
+                        or_(c.sentiment_version.is_(None), c.sentiment_version != bindparam('version')))
+                 .values(sentiment_score=bindparam('score'), keywords=bindparam('kw'),
+                         sentiment_version=bindparam('version')))
+    params = [{'row_id': row_id, 'score': score, 'kw': kw, 'version': version}
+              for row_id, score, kw, version in rows]
+    with engine.begin() as conn:
+        return conn.execute(statement, params).rowcount
+
+
+def _scores_csv(rows: List[Tuple[int, float, str, str]]) -> io.StringIO:
+    """
+    COPY 使用的 CSV：字符串列一律加引号
+    COPY ... FORMAT csv 把不加引号的空字段读成 NULL，加引号的空字符串才是 ''（与其他数据库的写回结果一致）
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_scores(engine: Engine, rows: List[Tuple[int, float, str, str]]) -> int:
+    """PostgreSQL：COPY 到 ON COMMIT DROP 临时表后一次合并"""
+    buffer = _scores_csv(rows)
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE news_scores_staging "
+                f"(id BIGINT PRIMARY KEY, sentiment_score NUMERIC(3, 2), keywords TEXT, sentiment_version VARCHAR({VERSION_WIDTH})) "
+                "ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                "COPY news_scores_staging (id, sentiment_score, keywords, sentiment_version) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            cursor.execute(
+                f"UPDATE {news_table.name} AS n "
+                "SET sentiment_score = s.sentiment_score, keywords = s.keywords, "
+                "sentiment_version = s.sentiment_version "
+                "FROM news_scores_staging AS s "
+                "WHERE n.id = s.id AND n.sentiment_version IS DISTINCT FROM s.sentiment_version"
+            )
+            updated = cursor.rowcount
+        raw.commit()
+        return updated
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def _day_of(value) -> Optional[date]:
+    return value.date() if isinstance(value, datetime) else None
+
+
+class _DayTotals:
+    """单日累计量：情感和与条数、行业次数、涨跌幅矩"""
+
+    __slots__ = ("sentiment_sum", "sentiment_count", "industry_counts", "moments")
+
+    def __init__(self):
+        self.sentiment_sum = 0.0
+        self.sentiment_count = 0
+        self.industry_counts: Counter = Counter()
+        self.moments = RunningMoments()
+
+
+class DatabaseBatchAnalyzer:
+    """按日期范围分析数据库中的新闻和行情"""
+
+    def __init__(self, engine: Engine, batch_engine: Optional[BatchSentimentEngine] = None,
+                 advisor: Optional[InvestmentAdvisor] = None, chunk_size: int = 500):
+        """
+        engine: 数据库引擎
+        batch_engine: 打分引擎（走结果缓存和进程池），为 None 时在当前进程内串行打分
+        chunk_size: 每次从游标读取并打分的行数
+        """
+        self.engine = engine
+        self.batch_engine = batch_engine or BatchSentimentEngine(workers=1)
+        self.advisor = advisor or InvestmentAdvisor()
+        self.chunk_size = max(1, chunk_size)
+
+    def news_chunks(self, start: date, end: date) -> Iterator[List[dict]]:
+        """按发布时间顺序分块读取范围内的新闻"""
+        lower, upper = day_bounds(start, end)
+        query = (select(news_table.c.id, news_table.c.title, news_table.c.content, news_table.c.published_at)
+                 .where(news_table.c.published_at >= lower, news_table.c.published_at < upper)
+                 .order_by(news_table.c.published_at, news_table.c.id))
+        return iter_chunks(self.engine, query, self.chunk_size)
+
+    def unscored_news_chunks(self, start: date, end: date, version: str) -> Iterator[List[dict]]:
+        """按 id 顺序分块读取范围内尚未用 version 版词典打分的新闻"""
+        lower, upper = day_bounds(start, end)
+        c = news_table.c
+        query = (select(c.id, c.title, c.content)
+                 .where(c.published_at >= lower, c.published_at < upper,
+                        or_(c.sentiment_version.is_(None), c.sentiment_version != version))
+                 .order_by(c.id))
+        return iter_chunks(self.engine, query, self.chunk_size)
+
+    def write_back(self, start: date, end: date) -> dict:
+        """
+        为 [start, end] 内尚未用当前词典版本打分的新闻打分，并把 sentiment_score 与 keywords 批量写回
+        每读取一块就写回一块；返回读取、写回和跳过（标题正文均为空）的条数
+        """
+        if end < start:
+            raise ValueError("end must not be earlier than start")
+        ensure_sentiment_version_column(self.engine)
+
+        result_version = self.batch_engine.analyzer.result_version
+        version = stored_version(result_version)
+        selected = written = empty = 0
+        for chunk in self.unscored_news_chunks(start, end, version):
+            selected += len(chunk)
+            rows = []
+            for news, item in zip(chunk, self.batch_engine.score_news(chunk)):
+                if item is None:
+                    empty += 1
+                    continue
+                detail, score = item
+                rows.append((news['id'], round(score, 2), format_keywords(detail.get('keywords', [])), version))
+            written += write_scores(self.engine, rows)
+        return {'start': start.isoformat(), 'end': end.isoformat(), 'lexicon_version': result_version,
+                'sentiment_version': version,
+                'selected': selected, 'written': written, 'empty': empty}
+
+    def stock_chunks(self, start: date, end: date) -> Iterator[List[dict]]:
+        """按时间顺序分块读取范围内的行情"""
+        lower, upper = day_bounds(start, end)
+        query = (select(stock_table.c.id, stock_table.c.symbol, stock_table.c.market,
+                        stock_table.c.change_percent, stock_table.c.timestamp)
+                 .where(stock_table.c.timestamp >= lower, stock_table.c.timestamp < upper)
+                 .order_by(stock_table.c.timestamp, stock_table.c.id))
+        return iter_chunks(self.engine, query, self.chunk_size)
+
+    def count_rows(self, start: date, end: date) -> Tuple[int, int]:
+        """范围内的新闻条数和行情行数"""
+        lower, upper = day_bounds(start, end)
+        news_query = (select(func.count()).select_from(news_table)
+                      .where(news_table.c.published_at >= lower, news_table.c.published_at < upper))
+        stock_query = (select(func.count()).select_from(stock_table)
+                       .where(stock_table.c.timestamp >= lower, stock_table.c.timestamp < upper))
+        with self.engine.connect() as conn:
+            return conn.execute(news_query).scalar_one(), conn.execute(stock_query).scalar_one()
+
+    def analyze_range(self, start: date, end: date, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        分析 [start, end] 内的全部新闻和行情
+        返回整个范围及每天的情感、行业和涨跌幅统计，以及基于整体统计的投资建议；
+        progress 在每块新闻或行情处理后以 (已处理行数, 新闻条数 + 行情行数) 调用
+        （总数在开始前统计，分析期间新写入的行可能使已处理行数超过总数）
+        """
+        if end < start:
+            raise ValueError("end must not be earlier than start")
+        total = sum(self.count_rows(start, end)) if progress is not None else 0
+
+        days: Dict[date, _DayTotals] = {}
+        totals = _DayTotals()
+        news_count = 0
+        for chunk in self.news_chunks(start, end):
+            news_count += len(chunk)
+            for news, item in zip(chunk, self.batch_engine.score_news(chunk)):
+                if item is None:
+                    continue
+                detail, score = item
+                day = days.setdefault(_day_of(news['published_at']), _DayTotals())
+                for target in (totals, day):
+                    target.sentiment_sum += score
+                    target.sentiment_count += 1
+                    target.industry_counts.update(detail.get('industries', []))
+            if progress is not None:
+                progress(news_count, total)
+
+        stock_rows = 0
+        for chunk in self.stock_chunks(start, end):
+            stock_rows += len(chunk)
+            for row in chunk:
+                change = float(row['change_percent'] or 0)
+                totals.moments.add(change)
+                days.setdefault(_day_of(row['timestamp']), _DayTotals()).moments.add(change)
+            if progress is not None:
+                progress(news_count + stock_rows, total)
+
+        report = self._summarize(totals)
+        advice = self.advisor.generate_advice(totals.moments.market_stats(),
+                                              {'overall_sentiment': report['overall_sentiment']})
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'news_count': news_count,
+            'stock_rows': stock_rows,
+            **report,
+            'advice': advice.model_dump(),
+            'days': [{'date': day.isoformat() if day else None, **self._summarize(days[day])}
+                     for day in sorted(days, key=lambda d: d or date.min)],
+        }
+
+    def _summarize(self, totals: _DayTotals) -> dict:
+        avg_sentiment = totals.sentiment_sum / totals.sentiment_count if totals.sentiment_count else 0.5
+        stats = totals.moments.market_stats()
+        return {
+            'overall_sentiment': round(avg_sentiment, 3),
+            'sentiment_label': self.batch_engine.analyzer.get_sentiment_label(avg_sentiment),
+            'scored': totals.sentiment_count,
+            'industry_counts': dict(totals.industry_counts.most_common()),
+            'market': {'count': stats.count, 'mean': float(stats.mean), 'std': float(stats.std),
+                       'up': stats.n_pos, 'down': stats.n_neg},
+        }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="按日期范围分析数据库中的新闻和行情")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="开始日期（YYYY-MM-DD，含）")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="结束日期（YYYY-MM-DD，含）")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                        help="数据库连接串，默认取 DATABASE_URL")
+    parser.add_argument("--chunk-size", type=int, default=500, help="每次读取并打分的行数")
+    parser.add_argument("--workers", type=int, default=None, help="打分进程数（默认 CPU 核数，<= 1 为串行）")
+    parser.add_argument("--write-back", action="store_true",
+                        help="把逐条 sentiment_score 和 keywords 写回 news_data（跳过当前词典版本已打分的行）")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    with BatchSentimentEngine(workers=args.workers, chunk_size=args.chunk_size) as batch_engine:
+        analyzer = DatabaseBatchAnalyzer(create_db_engine(args.database_url), batch_engine,
+                                         chunk_size=args.chunk_size)
+        if args.write_back:
+            report = analyzer.write_back(args.start, args.end)
+        else:
+            report = analyzer.analyze_range(args.start, args.end)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
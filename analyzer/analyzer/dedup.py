@@ -0,0 +1,140 @@
+"""
+近似重复新闻检测模块 - 同一篇通稿经多家来源小幅改动后转发，打分前按 MinHash 签名聚类，每个簇只打分一次
+
+签名: 去掉空白和标点后的字符 4-gram 集合，128 个哈希函数各取最小值；两个签名相同位置相等的比例估计 Jaccard 相似度
+      只取规范化文本的前 MAX_SIGNATURE_CHARS 个字符（研报全文这类长文不会占用大量内存，开头相同的转载仍会合并）
+索引: 签名切成 32 段（每段 4 个值）建倒排表（LSH），只对至少一段完全相同的候选估计相似度
+
+新闻正文通常较短，转载时加上来源、编辑署名就会改变 10% 以上的字符，SimHash 的汉明距离在这种长度下波动较大，
+Jaccard 阈值更直观：小幅改动的转载一般在 0.85 以上，不同新闻即使套用相同句式也在 0.2 以下
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SHINGLE_SIZE = 4
+NUM_PERM = 128
+BANDS = 32
+# 参与签名的规范化文本长度上限
+MAX_SIGNATURE_CHARS = 5000
+# 每次与哈希参数相乘的 shingle 数（临时矩阵不超过 BLOCK_SIZE × NUM_PERM 个 uint64）
+BLOCK_SIZE = 4096
+
+_NON_WORD = re.compile(r'[\W_]+')
+# 固定种子生成哈希参数，签名跨进程、跨重启稳定
+_rng = np.random.default_rng(20240601)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_INCREMENTS = _rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """去掉空白、标点并统一小写（转载时常见的排版差异不影响签名）"""
+    return _NON_WORD.sub('', text.lower())
+
+
+def cluster_id(text: str) -> str:
+    """簇编号：代表新闻规范化文本的摘要（与请求内位置无关，分块、流式处理时也一致）"""
+    return hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()[:16]
+
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    """字符 size-gram 的 64 位哈希（多项式滚动哈希 + splitmix64 混合）"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    size = min(size, len(codes))
+    count = len(codes) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for k in range(size):
+        hashes = hashes * np.uint64(1000003) + codes[k:k + count]
+    hashes ^= hashes >> np.uint64(30)
+    hashes *= np.uint64(0xBF58476D1CE4E5B9)
+    hashes ^= hashes >> np.uint64(27)
+    hashes *= np.uint64(0x94D049BB133111EB)
+    hashes ^= hashes >> np.uint64(31)
+    return np.unique(hashes)
+
+
+def minhash(text: str, shingle_size: int = SHINGLE_SIZE,
+            max_chars: int = MAX_SIGNATURE_CHARS) -> Optional[np.ndarray]:
+    """MinHash 签名（NUM_PERM 个 uint64），只用规范化文本的前 max_chars 个字符；规范化后为空文本时返回 None"""
+    text = normalize(text)[:max_chars]
+    if not text:
+        return None
+    hashes = _shingle_hashes(text, shingle_size)
+    signature = np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), BLOCK_SIZE):
+        block = hashes[start:start + BLOCK_SIZE, None] * _MULTIPLIERS + _INCREMENTS
+        np.minimum(signature, block.min(axis=0), out=signature)
+    return signature
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """由两个签名估计 Jaccard 相似度"""
+    return np.count_nonzero(a == b) / len(a)
+
+
+class MinHashIndex:
+    """LSH 分段倒排索引，查询估计相似度不低于 threshold 的已有签名"""
+
+    def __init__(self, threshold: float = 0.8, bands: int = BANDS):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if NUM_PERM % bands:
+            raise ValueError(f"bands must divide {NUM_PERM}")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._tables: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, signature: np.ndarray, key: int):
+        self._signatures[key] = signature
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            table.setdefault(band_key, []).append(key)
+
+    def nearest(self, signature: np.ndarray) -> Optional[int]:
+        """相似度最高的已有条目（相同时取先加入的）；没有达到阈值的条目时返回 None"""
+        candidates = set()
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            candidates.update(table.get(band_key, ()))
+        best: Optional[Tuple[float, int]] = None
+        for key in sorted(candidates):
+            score = similarity(self._signatures[key], signature)
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, key)
+        return None if best is None else best[1]
+
+
+class NearDuplicateDetector:
+    """按输入顺序贪心聚类：每条新闻归入已有代表中最相似的一个，没有时自己成为新簇的代表"""
+
+    def __init__(self, threshold: float = 0.8, bands: int = BANDS, shingle_size: int = SHINGLE_SIZE):
+        # 提前检查参数
+        MinHashIndex(threshold, bands)
+        self.threshold = threshold
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+    def cluster(self, texts: Sequence[str]) -> List[int]:
+        """
+        每条文本所属簇的代表下标（代表的下标是自身）
+        空文本不参与聚类，各自成簇
+        """
+        index = MinHashIndex(self.threshold, self.bands)
+        representatives = []
+        for i, text in enumerate(texts):
+            signature = minhash(text, self.shingle_size)
+            match = None if signature is None else index.nearest(signature)
+            if match is None:
+                if signature is not None:
+                    index.add(signature, i)
+                match = i
+            representatives.append(match)
+        return representatives
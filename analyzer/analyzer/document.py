@@ -0,0 +1,88 @@
+"""文档分析上下文模块 - 每篇文档只分词、只扫描一次"""
+
+from typing import Dict, List, Optional
+
+import jieba
+
+from analyzer.financial_lexicon import FinancialLexicon
+from analyzer.snownlp_model import default_model
+
+
+class DocumentContext:
+    """
+    单篇文档的分析上下文
+    分词结果、词典命中和各项分数在首次访问时计算并缓存，
+    SnowNLP 打分、词典打分、关键词提取和行业识别共用同一份中间结果
+    """
+
+    def __init__(self, text: str, lexicon: FinancialLexicon):
+        self.text = text
+        self.lexicon = lexicon
+        self._tokens: Optional[List[str]] = None
+        self._snownlp_words: Optional[List[str]] = None
+        self._lexicon_hits: Optional[Dict[str, int]] = None
+        self._lexicon_result: Optional[dict] = None
+        self._snownlp_score: Optional[float] = None
+
+    @property
+    def tokens(self) -> List[str]:
+        """jieba 分词结果（已加载金融词汇）"""
+        if self._tokens is None:
+            self._tokens = jieba.lcut(self.text)
+        return self._tokens
+
+    @property
+    def snownlp_words(self) -> List[str]:
+        """SnowNLP 情感模型使用的特征词（SnowNLP 自带分词 + 停用词过滤）"""
+        if self._snownlp_words is None:
+            self._snownlp_words = default_model().words(self.text)
+        return self._snownlp_words
+
+    @property
+    def lexicon_hits(self) -> Dict[str, int]:
+        """词典词出现次数（一次自动机扫描）"""
+        if self._lexicon_hits is None:
+            self._lexicon_hits = self.lexicon.count_hits(self.text)
+        return self._lexicon_hits
+
+    @property
+    def lexicon_result(self) -> dict:
+        """金融词典分析结果"""
+        if self._lexicon_result is None:
+            self._lexicon_result = self.lexicon.score_hits(self.lexicon_hits)
+        return self._lexicon_result
+
+    @property
+    def industries(self) -> List[str]:
+        """识别出的行业"""
+        return self.lexicon_result['detected_industries']
+
+    @property
+    def snownlp_score(self) -> float:
+        """SnowNLP 情感分数（失败时为 0.5）"""
+        if self._snownlp_score is None:
+            try:
+                self._snownlp_score = default_model().score_words([self.snownlp_words])[0]
+            except Exception:
+                self._snownlp_score = 0.5
+        return self._snownlp_score
+
+
+def score_snownlp(docs: List[DocumentContext]):
+    """
+    整批计算 SnowNLP 特征词和分数，写入各文档的缓存
+    批量计算失败时不写入，由各文档按需单独计算（失败时为 0.5）
+    """
+    pending = [doc for doc in docs if doc._snownlp_score is None]
+    if not pending:
+        return
+    try:
+        model = default_model()
+        unsegmented = [doc for doc in pending if doc._snownlp_words is None]
+        for doc, words in zip(unsegmented, model.words_batch([doc.text for doc in unsegmented])):
+            doc._snownlp_words = words
+        scores = model.score_words([doc._snownlp_words for doc in pending])
+    except Exception:
+        return
+    for doc, score in zip(pending, scores):
+        doc._snownlp_score = score
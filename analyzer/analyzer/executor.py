@@ -0,0 +1,62 @@
+"""CPU 密集任务执行器 - 让 FastAPI 事件循环保持响应"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
+
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+class CPUExecutor:
+    """
+    有界 CPU 任务执行器
+    kind: thread（线程池）、process（进程池，任务函数需可 pickle）或 inline（直接在事件循环中执行）
+    max_pending: 同时提交的任务上限，超出时调用方在事件循环中等待而不是无限排队
+    initializer / initargs: 进程池工作进程的初始化函数（线程池共享当前进程的组件，不需要初始化）
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, initializer: Optional[Callable] = None,
+                 initargs: Tuple = ()):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind: {kind}, expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        # 至少两个工作者，避免单个大批量任务占满执行器、小请求只能排队
+        self.max_workers = max_workers or max(2, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """获取底层线程池 / 进程池（懒加载）"""
+        if self._executor is None and self.kind != "inline":
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analyzer-cpu")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在执行器中运行 func 并等待结果"""
+        if self.kind == "inline":
+            return func(*args, **kwargs)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """关闭执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
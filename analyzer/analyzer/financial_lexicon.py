@@ -1,18 +1,54 @@
 """金融专业词典模块 - 增强版情感分析"""
 
-from typing import Dict, List, Tuple
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from analyzer.matcher import AhoCorasickMatcher
+
+
+# 词表名称（也是词典制品中的表名，顺序即版本哈希的计算顺序）
+TABLE_NAMES = (
+    "positive_words", "negative_words", "neutral_words",
+    "industry_keywords", "market_indicators", "sentiment_modifiers",
+)
 
 
 class FinancialLexicon:
     """金融专业词典"""
     
-    def __init__(self):
-        self.positive_words = self._load_positive_words()
-        self.negative_words = self._load_negative_words()
-        self.neutral_words = self._load_neutral_words()
-        self.industry_keywords = self._load_industry_keywords()
-        self.market_indicators = self._load_market_indicators()
-        self.sentiment_modifiers = self._load_sentiment_modifiers()
+    def __init__(self, tables: Optional[dict] = None, source: Optional[str] = None):
+        """
+        初始化词典
+        tables: 词表（键见 TABLE_NAMES），为 None 时使用内置词表
+        source: 词表来源（词典制品路径），内置词表为 None
+        """
+        if tables is None:
+            tables = self._load_builtin_tables()
+        self.positive_words: Dict[str, float] = tables["positive_words"]
+        self.negative_words: Dict[str, float] = tables["negative_words"]
+        self.neutral_words: List[str] = tables["neutral_words"]
+        self.industry_keywords: Dict[str, List[str]] = tables["industry_keywords"]
+        self.market_indicators: Dict[str, str] = tables["market_indicators"]
+        self.sentiment_modifiers: Dict[str, float] = tables["sentiment_modifiers"]
+        self.source = source
+        self.matcher = self._build_matcher()
+        self.version = self._compute_version()
+
+    def _load_builtin_tables(self) -> dict:
+        """加载内置词表"""
+        return {
+            "positive_words": self._load_positive_words(),
+            "negative_words": self._load_negative_words(),
+            "neutral_words": self._load_neutral_words(),
+            "industry_keywords": self._load_industry_keywords(),
+            "market_indicators": self._load_market_indicators(),
+            "sentiment_modifiers": self._load_sentiment_modifiers(),
+        }
+
+    def to_tables(self) -> dict:
+        """导出词表"""
+        return {name: getattr(self, name) for name in TABLE_NAMES}
     
     def _load_positive_words(self) -> Dict[str, float]:
         """加载正面词汇及其权重"""
@@ -121,6 +157,20 @@ class FinancialLexicon:
             "不": -1.0, "没有": -1.0, "未": -1.0, "非": -1.0,
         }
     
+    def _build_matcher(self) -> AhoCorasickMatcher:
+        """把所有词表编译成一个多模式匹配自动机"""
+        patterns = list(self.positive_words) + list(self.negative_words) + list(self.neutral_words)
+        patterns += list(self.sentiment_modifiers)
+        for keywords in self.industry_keywords.values():
+            patterns += keywords
+        return AhoCorasickMatcher(patterns)
+
+    def _compute_version(self) -> str:
+        """根据词表内容计算词典版本号（内容不变则版本不变）"""
+        tables = [getattr(self, name) for name in TABLE_NAMES]
+        payload = json.dumps(tables, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:12]
+
     def get_word_sentiment(self, word: str) -> Tuple[float, str]:
         """
         获取词汇的情感分数和类型
@@ -134,11 +184,19 @@ class FinancialLexicon:
             return (0.5, "neutral")
         return (0.5, "unknown")
     
+    def count_hits(self, text: str) -> Dict[str, int]:
+        """单次扫描文本，返回每个词典词的出现次数"""
+        return self.matcher.count(text)
+
     def analyze_text_sentiment(self, text: str) -> dict:
         """
         分析文本的金融情感
         返回详细的情感分析结果
         """
+        return self.score_hits(self.count_hits(text))
+
+    def score_hits(self, hits: Dict[str, int]) -> dict:
+        """根据词频统计计算情感结果（按词表顺序累加，保证结果稳定）"""
         positive_count = 0
         negative_count = 0
         neutral_count = 0
@@ -148,8 +206,8 @@ class FinancialLexicon:
         
         # 检查正面词
         for word, score in self.positive_words.items():
-            if word in text:
-                count = text.count(word)
+            count = hits.get(word, 0)
+            if count:
                 positive_count += count
                 total_score += score * count
                 word_count += count
@@ -157,8 +215,8 @@ class FinancialLexicon:
         
         # 检查负面词
         for word, score in self.negative_words.items():
-            if word in text:
-                count = text.count(word)
+            count = hits.get(word, 0)
+            if count:
                 negative_count += count
                 total_score += score * count
                 word_count += count
@@ -166,8 +224,8 @@ class FinancialLexicon:
         
         # 检查中性词
         for word in self.neutral_words:
-            if word in text:
-                count = text.count(word)
+            count = hits.get(word, 0)
+            if count:
                 neutral_count += count
                 total_score += 0.5 * count
                 word_count += count
@@ -175,7 +233,7 @@ class FinancialLexicon:
         # 检查修饰词对情感的影响
         modifier_effect = 1.0
         for modifier, effect in self.sentiment_modifiers.items():
-            if modifier in text:
+            if hits.get(modifier):
                 if effect == -1.0:
                     # 否定词反转情感
                     modifier_effect *= -1
@@ -194,15 +252,6 @@ class FinancialLexicon:
         else:
             avg_score = 0.5
         
-        # 识别行业
-        detected_industries = []
-        for industry, keywords in self.industry_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    if industry not in detected_industries:
-                        detected_industries.append(industry)
-                    break
-        
         return {
             "score": avg_score,
             "positive_count": positive_count,
@@ -210,9 +259,19 @@ class FinancialLexicon:
             "neutral_count": neutral_count,
             "total_keywords": word_count,
             "found_words": sorted(found_words, key=lambda x: abs(x["score"] - 0.5), reverse=True)[:10],
-            "detected_industries": detected_industries,
+            "detected_industries": self.detect_industries(hits),
             "sentiment_label": self._get_label(avg_score),
         }
+
+    def detect_industries(self, hits: Dict[str, int]) -> List[str]:
+        """根据词频统计识别行业"""
+        detected_industries = []
+        for industry, keywords in self.industry_keywords.items():
+            for keyword in keywords:
+                if hits.get(keyword):
+                    detected_industries.append(industry)
+                    break
+        return detected_industries
     
     def _get_label(self, score: float) -> str:
         """根据分数获取情感标签"""
@@ -0,0 +1,78 @@
+"""HTTP 响应缓存模块 - 进程内 LRU 缓存 GET 接口的响应体，配合强 ETag 和 If-None-Match 返回 304"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from starlette.responses import Response
+
+from analyzer.cache import LRUCache
+from analyzer.metrics import http_cache_requests
+
+
+class CachedResponse:
+    """缓存的响应体及其强 ETag（响应体内容的摘要）"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match 是否匹配（RFC 9110：If-None-Match 使用弱比较，忽略 W/ 前缀）
+    支持逗号分隔的多个 ETag 和 "*"
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    GET 接口的响应缓存
+    键由调用方给出的各部分（规范化后的参数、结果版本等）拼接后取摘要；响应体为紧凑 JSON
+    """
+
+    def __init__(self, max_entries: int = 4096, max_age: int = 60):
+        """max_age: Cache-Control 中允许客户端直接复用的秒数，<= 0 时要求每次用 ETag 重新验证"""
+        self.entries = LRUCache(max_entries)
+        self.max_age = max_age
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        http_cache_requests.inc(1, 'hit' if entry is not None else 'miss')
+        return entry
+
+    def put(self, key: str, content: Any) -> CachedResponse:
+        """序列化并缓存响应内容"""
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry = CachedResponse(body)
+        self.entries.set(key, entry)
+        return entry
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}" if self.max_age > 0 else "no-cache"
+
+    def respond(self, entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+        """客户端持有的 ETag 仍然有效时返回不带响应体的 304，否则返回 200 和完整响应体"""
+        headers = {"ETag": entry.etag, "Cache-Control": self.cache_control}
+        if etag_matches(if_none_match, entry.etag):
+            http_cache_requests.inc(1, 'not_modified')
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,263 @@
+"""技术指标模块 - 按股票维护滚动状态，每个新行情 O(1) 增量更新"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+def parse_timestamp(value) -> float:
+    """把 datetime / ISO 字符串 / 数字时间戳转为秒，无法识别时为 NaN"""
+    if value is None:
+        return np.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return np.nan
+
+
+def _price(row: dict) -> Optional[float]:
+    """行情价格：采集端 price 与 close 相同，优先 price"""
+    value = row.get('price')
+    if value is None:
+        value = row.get('close')
+    return None if value is None else float(value)
+
+
+def _rounds(slots: np.ndarray) -> List[np.ndarray]:
+    """
+    把同一批次里的下标按“同一股票第几次出现”分轮，
+    每轮内股票不重复，可整体向量化更新，且同一股票的更新保持原有顺序
+    """
+    if len(slots) == 0:
+        return []
+    order = np.argsort(slots, kind="stable")
+    sorted_slots = slots[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_slots)) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(slots)]))
+    occurrence = np.empty(len(slots), dtype=np.intp)
+    occurrence[order] = np.arange(len(slots)) - group_start
+    return [np.flatnonzero(occurrence == r) for r in range(int(occurrence.max()) + 1)]
+
+
+class IndicatorEngine:
+    """
+    增量技术指标引擎
+    每只股票占用各状态数组中的一行：价格环形缓冲区、各窗口滚动和、EMA、RSI 平均涨跌幅等，
+    新行情只更新对应行，不重新计算整个窗口；同一批次的多只股票一次向量化更新
+
+    指标：
+        sma_N              N 期简单移动平均
+        ema_fast / ema_slow / macd / macd_signal / macd_hist
+                           EMA 以首个价格为初值（与 pandas ewm(adjust=False) 一致）
+        rsi                Wilder RSI（前 period 个涨跌幅取均值作为初值）
+        bb_upper / bb_middle / bb_lower
+                           布林带（窗口内总体标准差）
+    """
+
+    def __init__(self, sma_windows: Sequence[int] = (5, 10, 20), ema_fast: int = 12, ema_slow: int = 26,
+                 signal: int = 9, rsi_period: int = 14, bb_window: int = 20, bb_k: float = 2.0,
+                 initial_capacity: int = 1024):
+        self.sma_windows = tuple(sma_windows)
+        self.ema_fast = ema_fast
+        self.ema_slow = ema_slow
+        self.signal = signal
+        self.rsi_period = rsi_period
+        self.bb_window = bb_window
+        self.bb_k = bb_k
+
+        # 需要滚动和的窗口（SMA 与布林带中轨共用）
+        self._windows = tuple(sorted(set(self.sma_windows) | {bb_window}))
+        self._bb_index = self._windows.index(bb_window)
+        self._ring_size = max(self._windows)
+        self._alpha_fast = 2.0 / (ema_fast + 1)
+        self._alpha_slow = 2.0 / (ema_slow + 1)
+        self._alpha_signal = 2.0 / (signal + 1)
+
+        self._slots: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(max(1, initial_capacity))
+
+    def _allocate(self, capacity: int):
+        """分配（或扩容）状态数组，已有数据原样保留"""
+        def grow(name: str, shape, fill, dtype=np.float64):
+            array = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+        self._capacity = capacity
+        grow("_count", capacity, 0, np.int64)
+        grow("_last", capacity, np.nan)
+        grow("_last_ts", capacity, np.nan)
+        grow("_ring", (capacity, self._ring_size), 0.0)
+        grow("_sums", (capacity, len(self._windows)), 0.0)
+        grow("_bb_sumsq", capacity, 0.0)
+        grow("_ema_f", capacity, 0.0)
+        grow("_ema_s", capacity, 0.0)
+        grow("_signal", capacity, 0.0)
+        grow("_avg_gain", capacity, 0.0)
+        grow("_avg_loss", capacity, 0.0)
+
+    def _slot_indices(self, symbols: Iterable[str]) -> np.ndarray:
+        """股票代码 -> 状态行号（新股票分配新行，必要时扩容）"""
+        slots = []
+        for symbol in symbols:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = self._slots[symbol] = len(self._slots)
+            slots.append(slot)
+        if len(self._slots) > self._capacity:
+            self._allocate(max(len(self._slots), self._capacity * 2))
+        return np.asarray(slots, dtype=np.intp)
+
+    @property
+    def symbols(self) -> List[str]:
+        """已跟踪的股票"""
+        return list(self._slots)
+
+    def update(self, symbol: str, price: float, timestamp=None) -> bool:
+        """单只股票新行情；时间戳不晚于已处理的最新行情时忽略（重复推送幂等），返回是否已应用"""
+        return self.update_many([symbol], [price], [timestamp]) == 1
+
+    def update_many(self, symbols: Sequence[str], prices: Sequence[float],
+                    timestamps: Optional[Sequence] = None) -> int:
+        """
+        一批行情（通常是一次采集的所有股票）；同一股票多条时按给定顺序依次应用
+        返回实际应用的条数
+        """
+        if len(symbols) == 0:
+            return 0
+        prices = np.asarray(prices, dtype=np.float64)
+        if timestamps is None:
+            stamps = np.full(len(prices), np.nan)
+        else:
+            stamps = np.array([parse_timestamp(t) for t in timestamps], dtype=np.float64)
+
+        with self._lock:
+            slots = self._slot_indices(symbols)
+            applied = 0
+            for index in _rounds(slots):
+                round_slots, round_stamps = slots[index], stamps[index]
+                # 有时间戳且不晚于最新已处理时间的行情视为重复
+                fresh = ~(round_stamps <= self._last_ts[round_slots])
+                fresh &= ~np.isnan(prices[index])
+                if not fresh.all():
+                    index, round_slots, round_stamps = index[fresh], round_slots[fresh], round_stamps[fresh]
+                if len(index) == 0:
+                    continue
+                self._apply(round_slots, prices[index])
+                self._last_ts[round_slots] = np.where(np.isnan(round_stamps), self._last_ts[round_slots], round_stamps)
+                applied += len(index)
+            return applied
+
+    def _apply(self, slots: np.ndarray, prices: np.ndarray):
+        """向量化更新一组互不相同的股票"""
+        n = self._count[slots]
+        ring = self._ring
+
+        # 滚动和：加入新价格，减去离开窗口的价格
+        for j, window in enumerate(self._windows):
+            leaving = np.where(n >= window, ring[slots, (n - window) % self._ring_size], 0.0)
+            self._sums[slots, j] += prices - leaving
+            if j == self._bb_index:
+                self._bb_sumsq[slots] += prices * prices - leaving * leaving
+        ring[slots, n % self._ring_size] = prices
+
+        # EMA / MACD（首个价格为初值）
+        first = n == 0
+        ema_f = np.where(first, prices, self._ema_f[slots] + self._alpha_fast * (prices - self._ema_f[slots]))
+        ema_s = np.where(first, prices, self._ema_s[slots] + self._alpha_slow * (prices - self._ema_s[slots]))
+        macd = ema_f - ema_s
+        self._signal[slots] = np.where(first, macd, self._signal[slots] + self._alpha_signal * (macd - self._signal[slots]))
+        self._ema_f[slots] = ema_f
+        self._ema_s[slots] = ema_s
+
+        # Wilder RSI：前 period 个涨跌幅取算术平均，之后按 (period - 1) / period 平滑
+        change = np.where(first, 0.0, prices - self._last[slots])
+        periods = np.maximum(np.minimum(n, self.rsi_period), 1)
+        has_change = ~first
+        self._avg_gain[slots] = np.where(
+            has_change, (self._avg_gain[slots] * (periods - 1) + np.maximum(change, 0.0)) / periods, 0.0)
+        self._avg_loss[slots] = np.where(
+            has_change, (self._avg_loss[slots] * (periods - 1) + np.maximum(-change, 0.0)) / periods, 0.0)
+
+        self._last[slots] = prices
+        self._count[slots] = n + 1
+
+    def ingest(self, rows) -> int:
+        """
+        导入行情：历史回填和每次采集的新行情共用（List[dict] 或含 symbol / price|close / timestamp 列的 DataFrame）
+        按时间排序后逐轮向量化应用；已处理过的行情（时间戳不晚于最新一条）会被跳过，返回应用的条数
+        """
+        if hasattr(rows, "columns"):
+            rows = rows.to_dict("records")
+        rows = [row for row in rows if row.get('symbol') and _price(row) is not None]
+        stamps = [parse_timestamp(row.get('timestamp')) for row in rows]
+        # 没有时间戳的行情保持原顺序，排在最前
+        order = sorted(range(len(rows)), key=lambda i: -np.inf if np.isnan(stamps[i]) else stamps[i])
+        return self.update_many(
+            [rows[i]['symbol'] for i in order],
+            [_price(rows[i]) for i in order],
+            [stamps[i] for i in order],
+        )
+
+    def snapshot(self, symbol: str) -> Optional[dict]:
+        """某只股票的当前指标；数据不足的指标为 None，未跟踪的股票返回 None"""
+        with self._lock:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                return None
+            return self._snapshot(symbol, slot)
+
+    def snapshot_many(self, symbols: Iterable[str]) -> List[dict]:
+        """多只股票的当前指标（跳过未跟踪的股票）"""
+        with self._lock:
+            return [self._snapshot(s, self._slots[s]) for s in symbols if s in self._slots]
+
+    def _snapshot(self, symbol: str, slot: int) -> dict:
+        count = int(self._count[slot])
+
+        def value(x, ready: bool):
+            return round(float(x), 4) if ready else None
+
+        result = {
+            'symbol': symbol,
+            'price': value(self._last[slot], count > 0),
+            'samples': count,
+        }
+        for j, window in enumerate(self._windows):
+            if window in self.sma_windows:
+                result[f'sma_{window}'] = value(self._sums[slot, j] / window, count >= window)
+
+        macd_ready = count >= self.ema_slow
+        macd = self._ema_f[slot] - self._ema_s[slot]
+        result['ema_fast'] = value(self._ema_f[slot], count >= self.ema_fast)
+        result['ema_slow'] = value(self._ema_s[slot], macd_ready)
+        result['macd'] = value(macd, macd_ready)
+        result['macd_signal'] = value(self._signal[slot], macd_ready)
+        result['macd_hist'] = value(macd - self._signal[slot], macd_ready)
+
+        rsi = None
+        if count > self.rsi_period:
+            gain, loss = self._avg_gain[slot], self._avg_loss[slot]
+            if loss == 0:
+                rsi = 50.0 if gain == 0 else 100.0
+            else:
+                rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        result['rsi'] = value(rsi, rsi is not None)
+
+        bb_ready = count >= self.bb_window
+        middle = self._sums[slot, self._bb_index] / self.bb_window
+        variance = max(self._bb_sumsq[slot] / self.bb_window - middle * middle, 0.0)
+        width = self.bb_k * np.sqrt(variance)
+        result['bb_upper'] = value(middle + width, bb_ready)
+        result['bb_middle'] = value(middle, bb_ready)
+        result['bb_lower'] = value(middle - width, bb_ready)
+        return result
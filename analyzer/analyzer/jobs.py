@@ -0,0 +1,465 @@
+"""
+异步分析任务队列 - 任务存放在 Redis 中，由独立的分析工作进程执行
+提交后立即返回任务 ID，客户端轮询状态和进度，完成后获取结果
+
+Redis 中的数据（前缀默认 analyzer:jobs）：
+    {prefix}:queue           待执行任务 ID 列表
+    {prefix}:processing      执行中任务 ID 列表
+    {prefix}:leases          执行中任务的租约（有序集合，分数为到期时间）；到期未完成的任务重新排队
+    {prefix}:job:{id}        任务状态（哈希）；token 为当前执行者的栅栏令牌（工作进程名:执行次数）
+    {prefix}:payload:{id}    任务参数（压缩 JSON）
+    {prefix}:result:{id}     任务结果（压缩 JSON）
+
+用法（在 analyzer 目录下）:
+    python -m analyzer.jobs worker --concurrency 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import uuid
+import zlib
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis
+    from redis.exceptions import WatchError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    WatchError = ()
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobError(Exception):
+    """任务不存在或参数无效"""
+
+
+class LeaseLost(Exception):
+    """任务租约已失效（到期后重新排队或已被其他工作进程领取），当前执行者的写入被拒绝"""
+
+
+def _text(raw: Optional[bytes]) -> Optional[str]:
+    return raw.decode() if isinstance(raw, bytes) else raw
+
+
+def _dumps(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+def _loads(raw: Optional[bytes]) -> Any:
+    if raw is None:
+        return None
+    return json.loads(zlib.decompress(raw))
+
+
+def _decode(mapping: Dict[bytes, bytes]) -> Dict[str, str]:
+    return {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+            for k, v in mapping.items()}
+
+
+class JobQueue:
+    """Redis 任务队列（API 进程提交和查询，工作进程领取和完成）"""
+
+    def __init__(self, redis_url: Optional[str] = None, client: Optional[Any] = None, prefix: str = "analyzer:jobs",
+                 visibility_timeout: float = 300.0, max_attempts: int = 3, result_ttl: int = 86400):
+        """
+        client: 直接注入的 Redis 客户端（如测试用的 fakeredis），为 None 时按 redis_url 懒加载
+        visibility_timeout: 租约时长（秒）；工作进程在此时间内没有报告进度或完成，任务重新排队
+        max_attempts: 最多执行次数（含第一次），超过后标记为失败
+        result_ttl: 任务完成后状态和结果的保留时间（秒）
+        """
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.result_ttl = result_ttl
+        self._client = client
+
+    @property
+    def client(self):
+        """获取 Redis 客户端（懒加载）"""
+        if self._client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package is not installed")
+            self._client = redis.Redis.from_url(self.redis_url)
+        return self._client
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def submit(self, kind: str, payload: Any) -> str:
+        """提交任务，返回任务 ID"""
+        job_id = uuid.uuid4().hex
+        pipe = self.client.pipeline()
+        pipe.set(self._key("payload", job_id), _dumps(payload))
+        pipe.hset(self._key("job", job_id), mapping={
+            'id': job_id, 'kind': kind, 'status': QUEUED, 'attempts': 0,
+            'progress': 0, 'created_at': time.time(),
+        })
+        pipe.lpush(self._key("queue"), job_id)
+        pipe.execute()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """任务状态；不存在（或已过期）时返回 None"""
+        raw = _decode(self.client.hgetall(self._key("job", job_id)))
+        if not raw:
+            return None
+        status = {'id': raw['id'], 'kind': raw['kind'], 'status': raw['status'],
+                  'attempts': int(raw.get('attempts', 0)), 'progress': float(raw.get('progress', 0))}
+        for field in ('processed', 'total'):
+            if field in raw:
+                status[field] = int(raw[field])
+        for field in ('created_at', 'started_at', 'finished_at'):
+            if field in raw:
+                status[field] = float(raw[field])
+        for field in ('error', 'worker'):
+            if field in raw:
+                status[field] = raw[field]
+        return status
+
+    def result(self, job_id: str) -> Any:
+        """任务结果（未完成时为 None）"""
+        return _loads(self.client.get(self._key("result", job_id)))
+
+    def queue_length(self) -> int:
+        """待执行任务数"""
+        return self.client.llen(self._key("queue"))
+
+    def claim(self, worker: str, timeout: float = 1.0) -> Optional[Tuple[str, str]]:
+        """
+        领取一个任务（队列为空时最多阻塞 timeout 秒），返回 (任务 ID, 栅栏令牌)
+        任务从待执行列表原子地移入执行中列表，并获得 visibility_timeout 秒的租约；
+        complete / fail / report_progress 只在令牌仍匹配且任务仍在执行时生效
+        取出的任务不是待执行状态（已完成、已失败或状态已过期）时直接丢弃；参数丢失时标记为失败；这两种情况返回 None
+        """
+        raw = self.client.blmove(self._key("queue"), self._key("processing"), timeout, "RIGHT", "LEFT")
+        if raw is None:
+            return None
+        job_id = _text(raw)
+        job_key, payload_key = self._key("job", job_id), self._key("payload", job_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(job_key, payload_key)
+                    status, attempts = pipe.hmget(job_key, 'status', 'attempts')
+                    has_payload = pipe.exists(payload_key)
+                    pipe.multi()
+                    if _text(status) != QUEUED:
+                        # 只移除刚移入的这一项（同一 ID 可能正由其他工作进程执行）
+                        pipe.lrem(self._key("processing"), 1, job_id)
+                        pipe.execute()
+                        return None
+                    if not has_payload:
+                        pipe.hset(job_key, mapping={'status': FAILED, 'error': "payload missing",
+                                                    'finished_at': time.time()})
+                        self._finish(pipe, job_id)
+                        pipe.execute()
+                        return None
+                    token = f"{worker}:{int(attempts or 0) + 1}"
+                    pipe.zadd(self._key("leases"), {job_id: time.time() + self.visibility_timeout})
+                    pipe.hset(job_key, mapping={'status': RUNNING, 'worker': worker, 'token': token,
+                                                'started_at': time.time()})
+                    pipe.hincrby(job_key, 'attempts', 1)
+                    pipe.execute()
+                    return job_id, token
+                except WatchError:
+                    continue
+
+    def _transition(self, job_id: str, token: Optional[str], update: Callable[[Any, int], None]) -> bool:
+        """
+        令牌匹配（token 为 None 时不比较）且任务仍在执行时，在一个事务中执行 update(pipe, 执行次数)
+        状态在检查和写入之间被其他进程修改时（WATCH 失败）重新检查；返回是否写入
+        """
+        job_key = self._key("job", job_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(job_key)
+                    status, current, attempts = pipe.hmget(job_key, 'status', 'token', 'attempts')
+                    if _text(status) != RUNNING or (token is not None and _text(current) != token):
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    update(pipe, int(attempts or 0))
+                    pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    def payload(self, job_id: str) -> Any:
+        """任务参数"""
+        return _loads(self.client.get(self._key("payload", job_id)))
+
+    def kind(self, job_id: str) -> Optional[str]:
+        return _text(self.client.hget(self._key("job", job_id), 'kind'))
+
+    def report_progress(self, job_id: str, token: str, processed: int, total: int):
+        """报告进度并续租；租约已失效时抛出 LeaseLost，执行者应放弃该任务"""
+        def update(pipe, _attempts):
+            pipe.hset(self._key("job", job_id), mapping={
+                'processed': processed, 'total': total, 'progress': round(processed / total, 4) if total else 0,
+            })
+            pipe.zadd(self._key("leases"), {job_id: time.time() + self.visibility_timeout}, xx=True)
+
+        if not self._transition(job_id, token, update):
+            raise LeaseLost(job_id)
+
+    def complete(self, job_id: str, token: str, result: Any) -> bool:
+        """保存结果并结束任务；租约已失效时不写入，返回 False"""
+        def update(pipe, _attempts):
+            pipe.set(self._key("result", job_id), _dumps(result), ex=self.result_ttl)
+            pipe.hset(self._key("job", job_id), mapping={'status': SUCCEEDED, 'progress': 1,
+                                                         'finished_at': time.time()})
+            self._finish(pipe, job_id)
+
+        return self._transition(job_id, token, update)
+
+    def fail(self, job_id: str, token: str, error: str, retry: bool = True) -> Optional[bool]:
+        """
+        执行失败：retry 且未达到 max_attempts 时重新排队，否则标记为失败
+        返回任务是否重新排队；租约已失效时不写入，返回 None
+        """
+        return self._fail(job_id, token, error, retry)
+
+    def _fail(self, job_id: str, token: Optional[str], error: str, retry: bool) -> Optional[bool]:
+        requeued = None
+
+        def update(pipe, attempts):
+            nonlocal requeued
+            requeued = retry and attempts < self.max_attempts
+            if requeued:
+                pipe.hset(self._key("job", job_id), mapping={'status': QUEUED, 'error': error})
+                pipe.lrem(self._key("processing"), 0, job_id)
+                pipe.zrem(self._key("leases"), job_id)
+                pipe.lpush(self._key("queue"), job_id)
+            else:
+                pipe.hset(self._key("job", job_id), mapping={'status': FAILED, 'error': error,
+                                                             'finished_at': time.time()})
+                self._finish(pipe, job_id)
+
+        return requeued if self._transition(job_id, token, update) else None
+
+    def _finish(self, pipe, job_id: str):
+        """移出执行中列表，参数删除，状态按 result_ttl 过期"""
+        pipe.lrem(self._key("processing"), 0, job_id)
+        pipe.zrem(self._key("leases"), job_id)
+        pipe.delete(self._key("payload", job_id))
+        pipe.expire(self._key("job", job_id), self.result_ttl)
+
+    def requeue_expired(self) -> List[str]:
+        """
+        处理租约到期的任务（工作进程崩溃或卡住）：按失败处理，重新排队或标记失败
+        多个工作进程同时调用时，ZREM 成功的那个负责处理；原执行者之后的写入因状态不再是执行中而被拒绝
+        """
+        expired = self.client.zrangebyscore(self._key("leases"), "-inf", time.time())
+        handled = []
+        for raw in expired:
+            job_id = _text(raw)
+            if self.client.zrem(self._key("leases"), job_id):
+                if self._fail(job_id, None, "visibility timeout expired", retry=True) is not None:
+                    handled.append(job_id)
+        return handled
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _chunked_sentiment(news_list: List[dict], progress: ProgressCallback, chunk_size: int) -> dict:
+    """分块打分并报告进度，汇总方式与 analyze_news_sentiment 相同"""
+    from analyzer import tasks
+    engine, _ = tasks._components()
+    scored = []
+    for start in range(0, len(news_list), chunk_size):
+        scored.extend(tasks.score_news(news_list[start:start + chunk_size]))
+        progress(min(start + chunk_size, len(news_list)), len(news_list))
+    return engine.analyzer.build_result(scored).model_dump()
+
+
+def run_sentiment(payload: Any, progress: ProgressCallback, chunk_size: int = 200) -> dict:
+    """任务 sentiment：参数为新闻列表"""
+    if not isinstance(payload, list):
+        raise JobError("payload must be a list of news")
+    return _chunked_sentiment(payload, progress, chunk_size)
+
+
+def run_daily(payload: Any, progress: ProgressCallback, chunk_size: int = 200) -> dict:
+    """任务 daily：参数为 {stock_data, news_data}，返回情感分析结果和投资建议"""
+    from analyzer import tasks
+    if not isinstance(payload, dict):
+        raise JobError("payload must be an object with stock_data and news_data")
+    news_data = payload.get('news_data') or []
+    stock_data = payload.get('stock_data') or []
+    sentiment_result = _chunked_sentiment(news_data, progress, chunk_size)
+    advice = tasks.generate_advice(stock_data, sentiment_result)
+    return {'sentiment_analysis': sentiment_result, 'investment_advice': advice.model_dump()}
+
+
+def run_range(payload: Any, progress: ProgressCallback, chunk_size: int = 500,
+              database_url: Optional[str] = None) -> dict:
+    """任务 range：参数为 {start, end}（YYYY-MM-DD），直接读库分析"""
+    from analyzer import tasks
+    from analyzer.database import DatabaseBatchAnalyzer, create_db_engine
+    try:
+        start, end = date.fromisoformat(payload['start']), date.fromisoformat(payload['end'])
+    except (TypeError, KeyError, ValueError):
+        raise JobError("payload must be an object with start and end dates (YYYY-MM-DD)")
+    engine, advisor = tasks._components()
+    db_engine = create_db_engine(database_url or os.getenv("DATABASE_URL"))
+    try:
+        analyzer = DatabaseBatchAnalyzer(db_engine, engine, advisor, chunk_size=chunk_size)
+        return analyzer.analyze_range(start, end, progress=progress)
+    finally:
+        db_engine.dispose()
+
+
+HANDLERS: Dict[str, Callable[..., Any]] = {
+    'sentiment': run_sentiment,
+    'daily': run_daily,
+    'range': run_range,
+}
+
+
+class JobWorker:
+    """任务执行者：领取任务、执行、报告进度、保存结果"""
+
+    def __init__(self, queue: JobQueue, handlers: Optional[Dict[str, Callable[..., Any]]] = None,
+                 name: Optional[str] = None, reap_interval: float = 10.0, handler_options: Optional[dict] = None):
+        self.queue = queue
+        self.handlers = handlers or HANDLERS
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.reap_interval = reap_interval
+        self.handler_options = handler_options or {}
+        self._last_reap = 0.0
+        self._stopping = False
+
+    def run_once(self, timeout: float = 1.0) -> Optional[str]:
+        """处理（最多）一个任务，返回处理的任务 ID"""
+        if time.monotonic() - self._last_reap >= self.reap_interval:
+            self._last_reap = time.monotonic()
+            self.queue.requeue_expired()
+
+        claimed = self.queue.claim(self.name, timeout)
+        if claimed is None:
+            return None
+        job_id, token = claimed
+        kind = self.queue.kind(job_id)
+        handler = self.handlers.get(kind)
+        try:
+            if handler is None:
+                raise JobError(f"unknown job kind: {kind}")
+            progress = lambda processed, total: self.queue.report_progress(job_id, token, processed, total)
+            result = handler(self.queue.payload(job_id), progress, **self.handler_options.get(kind, {}))
+        except LeaseLost:
+            # 租约已到期，任务已重新排队或由其他工作进程执行，放弃本次结果
+            pass
+        except JobError as e:
+            # 参数错误重试也不会成功，直接失败
+            self.queue.fail(job_id, token, str(e), retry=False)
+        except Exception as e:
+            self.queue.fail(job_id, token, f"{e.__class__.__name__}: {e}")
+        else:
+            self.queue.complete(job_id, token, result)
+        return job_id
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def run_forever(self, timeout: float = 1.0):
+        """循环处理任务，收到 SIGTERM / SIGINT 时处理完当前任务后退出"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while not self._stopping:
+            try:
+                self.run_once(timeout)
+            except Exception as e:
+                # Redis 暂时不可用时等待后重试
+                print(f"Job worker {self.name} error: {e}")
+                time.sleep(1.0)
+
+
+def _worker_main(redis_url: str, queue_options: dict, handler_options: dict, init_args: tuple):
+    """工作进程入口：加载分析组件后循环处理任务"""
+    from analyzer import tasks
+    tasks.init_worker(*init_args)
+    JobWorker(JobQueue(redis_url, **queue_options), handler_options=handler_options).run_forever()
+
+
+def run_workers(redis_url: str, concurrency: int, queue_options: Optional[dict] = None,
+                handler_options: Optional[dict] = None, init_args: tuple = ()):
+    """启动 concurrency 个工作进程并等待其退出（收到 SIGTERM / SIGINT 时通知所有进程退出）"""
+    processes = [
+        multiprocessing.Process(target=_worker_main, name=f"analyzer-job-worker-{i}",
+                                args=(redis_url, queue_options or {}, handler_options or {}, init_args))
+        for i in range(max(1, concurrency))
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, _frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="分析任务工作进程")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="启动工作进程池")
+    worker.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    worker.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKERS", "2")))
+    worker.add_argument("--visibility-timeout", type=float, default=float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300")))
+    worker.add_argument("--max-attempts", type=int, default=int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+    worker.add_argument("--result-ttl", type=int, default=int(os.getenv("JOB_RESULT_TTL", "86400")))
+    worker.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="range 任务使用的数据库")
+    worker.add_argument("--lexicon-path", default=os.getenv("LEXICON_PATH"))
+    worker.add_argument("--jieba-dict-path", default=os.getenv("JIEBA_DICT_PATH"))
+    worker.add_argument("--article-cache-size", type=int, default=int(os.getenv("ARTICLE_CACHE_SIZE", "10000")),
+                        help="进程内单篇新闻结果缓存条数")
+    worker.add_argument("--article-cache-ttl", type=int, default=int(os.getenv("ARTICLE_CACHE_TTL", "86400")),
+                        help="单篇新闻结果缓存时长（秒）")
+    worker.add_argument("--lexicon-reload-interval", type=float,
+                        default=float(os.getenv("LEXICON_RELOAD_INTERVAL", "30")),
+                        help="检查词典文件更新的间隔（秒）")
+    worker.add_argument("--dedup-threshold", type=float, default=float(os.getenv("DEDUP_THRESHOLD", "0.8")),
+                        help="近似重复新闻合并阈值，<= 0 时关闭")
+    worker.add_argument("--text-budget-chars", type=int, default=int(os.getenv("TEXT_BUDGET_CHARS", "0")),
+                        help="单篇新闻最多打分的字符数，<= 0 时整篇打分")
+    worker.add_argument("--cascade-min-keywords", type=int, default=int(os.getenv("CASCADE_MIN_KEYWORDS", "0")),
+                        help="词典命中不少于该数且倾向明确时不调用 SnowNLP，<= 0 时关闭级联")
+    worker.add_argument("--cascade-min-confidence", type=float,
+                        default=float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.2")))
+    worker.add_argument("--cascade-fallback", type=float, default=float(os.getenv("CASCADE_FALLBACK", "0.5")))
+    args = parser.parse_args()
+
+    queue_options = {'visibility_timeout': args.visibility_timeout, 'max_attempts': args.max_attempts,
+                     'result_ttl': args.result_ttl}
+    handler_options = {'range': {'database_url': args.database_url}}
+    from analyzer.budget import TextBudget
+    from analyzer.cascade import LexiconCascade
+    budget = TextBudget(args.text_budget_chars) if args.text_budget_chars > 0 else None
+    cascade = LexiconCascade(args.cascade_min_keywords, args.cascade_min_confidence,
+                             args.cascade_fallback) if args.cascade_min_keywords > 0 else None
+    init_args = (args.redis_url, args.article_cache_size, args.article_cache_ttl, args.jieba_dict_path,
+                 args.lexicon_path, args.lexicon_reload_interval, args.dedup_threshold, budget, cascade)
+    run_workers(args.redis_url, args.concurrency, queue_options, handler_options, init_args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,189 @@
+"""
+词典制品模块 - 把金融词典编译为带版本的二进制文件，加载时校验并支持热更新
+每个进程各自解析出独立的词表对象（mmap 只用于读取文件，词表不跨进程共享内存）；
+热更新时 jieba 中同步移除新词典不再包含的词
+
+文件格式（小端）:
+    magic    8 字节  b"WSLEXv1\\0"
+    header   4 字节长度 + UTF-8 JSON（version / sha256 / created_at / counts）
+    payload  UTF-8 JSON 词表（键见 TABLE_NAMES，保持词表顺序）
+
+用法（在 analyzer 目录下）:
+    python -m analyzer.lexicon_artifact export lexicon.json      # 导出内置词表供分析师编辑
+    python -m analyzer.lexicon_artifact compile lexicon.json lexicon.bin
+    python -m analyzer.lexicon_artifact info lexicon.bin
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from analyzer.financial_lexicon import FinancialLexicon, TABLE_NAMES
+
+
+MAGIC = b"WSLEXv1\x00"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class LexiconArtifactError(ValueError):
+    """词典制品损坏或格式不符"""
+
+
+def compile_lexicon(lexicon: FinancialLexicon, path: str) -> str:
+    """
+    把词典写成二进制制品，返回词典版本
+    先写临时文件再原子替换，正在读取旧文件的进程不会读到半个文件
+    """
+    payload = json.dumps(lexicon.to_tables(), ensure_ascii=False).encode("utf-8")
+    header = json.dumps({
+        "version": lexicon.version,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "counts": {name: len(getattr(lexicon, name)) for name in TABLE_NAMES},
+    }).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".lexicon-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return lexicon.version
+
+
+def read_artifact(path: str) -> Tuple[dict, dict]:
+    """以 mmap 方式读取制品，校验后返回 (header, 词表)；词表数据复制到进程内解析，文件关闭后不再引用映射"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(MAGIC)] != MAGIC:
+            raise LexiconArtifactError(f"{path} is not a lexicon artifact")
+        offset = len(MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(mm, offset)
+        offset += _HEADER_LENGTH.size
+        header = json.loads(mm[offset:offset + header_length])
+        payload = mm[offset + header_length:]
+
+    if hashlib.sha256(payload).hexdigest() != header.get("sha256"):
+        raise LexiconArtifactError(f"{path} checksum mismatch")
+    tables = json.loads(payload)
+    missing = [name for name in TABLE_NAMES if name not in tables]
+    if missing:
+        raise LexiconArtifactError(f"{path} is missing tables: {missing}")
+    return header, tables
+
+
+def load_lexicon(path: str) -> FinancialLexicon:
+    """从制品加载词典（版本由内容重新计算并与文件头核对）"""
+    header, tables = read_artifact(path)
+    lexicon = FinancialLexicon(tables, source=path)
+    if lexicon.version != header.get("version"):
+        raise LexiconArtifactError(f"{path} version mismatch: {header.get('version')} != {lexicon.version}")
+    return lexicon
+
+
+class LexiconReloader:
+    """
+    词典热更新
+    检测制品文件变化（mtime / 大小），加载新词典后整体替换到各分析器的 lexicon 属性；
+    单次属性赋值是原子的，正在分析的文档继续使用创建时拿到的旧词典
+    """
+
+    def __init__(self, path: str, analyzers: List = None):
+        self.path = path
+        self.analyzers = list(analyzers or [])
+        self._signature: Optional[Tuple[float, int]] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _file_signature(self) -> Optional[Tuple[float, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """文件变化（或 force）时重新加载；词典版本变化并完成替换时返回 True"""
+        from analyzer.warmup import switch_lexicon_words
+
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None or (not force and signature == self._signature):
+                return False
+            lexicon = load_lexicon(self.path)
+            self._signature = signature
+            if all(analyzer.lexicon.version == lexicon.version for analyzer in self.analyzers):
+                return False
+            switch_lexicon_words([analyzer.lexicon for analyzer in self.analyzers], lexicon)
+            for analyzer in self.analyzers:
+                analyzer.lexicon = lexicon
+            print(f"Lexicon reloaded from {self.path}: version {lexicon.version}")
+            return True
+
+    def start(self, interval: float = 30.0):
+        """启动后台轮询线程"""
+        if self._thread is not None or interval <= 0:
+            return
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Lexicon reload failed: {e}")
+
+        self._thread = threading.Thread(target=poll, name="lexicon-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台轮询"""
+        self._stop.set()
+        self._thread = None
+
+
+def sync_lexicon(analyzer, path: Optional[str], version: str):
+    """确保分析器使用指定版本的词典（供进程池工作进程按任务同步）"""
+    if analyzer.lexicon.version == version or not path:
+        return
+    from analyzer.warmup import switch_lexicon_words
+
+    lexicon = load_lexicon(path)
+    switch_lexicon_words([analyzer.lexicon], lexicon)
+    analyzer.lexicon = lexicon
+
+
+def _main(argv: List[str]) -> int:
+    if len(argv) >= 2 and argv[0] == "export":
+        with open(argv[1], "w", encoding="utf-8") as f:
+            json.dump(FinancialLexicon().to_tables(), f, ensure_ascii=False, indent=2)
+        print(f"Built-in lexicon exported to {argv[1]}")
+        return 0
+    if len(argv) >= 3 and argv[0] == "compile":
+        with open(argv[1], encoding="utf-8") as f:
+            lexicon = FinancialLexicon(json.load(f))
+        version = compile_lexicon(lexicon, argv[2])
+        print(f"Lexicon compiled to {argv[2]}: version {version}")
+        return 0
+    if len(argv) >= 2 and argv[0] == "info":
+        header, _ = read_artifact(argv[1])
+        print(json.dumps(header, ensure_ascii=False, indent=2))
+        return 0
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
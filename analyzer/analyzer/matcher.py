@@ -0,0 +1,111 @@
+"""多模式字符串匹配模块 - Aho-Corasick 自动机"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+class AhoCorasickMatcher:
+    """
+    Aho-Corasick 多模式匹配器
+    一次线性扫描即可找出文本中所有模式的出现位置；
+    安装了 pyahocorasick 时使用其 C 实现，否则退回纯 Python 实现
+    """
+
+    def __init__(self, patterns: Iterable[str], use_native: bool = True):
+        """编译模式集合（重复和空模式会被忽略）"""
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+        self._native = None
+        if use_native and AHOCORASICK_AVAILABLE:
+            self._native = self._build_native()
+        else:
+            self._build_python()
+
+    @property
+    def backend(self) -> str:
+        """当前使用的实现"""
+        return "native" if self._native is not None else "python"
+
+    def _build_native(self):
+        """构建 pyahocorasick 自动机"""
+        automaton = ahocorasick.Automaton()
+        for index, pattern in enumerate(self.patterns):
+            automaton.add_word(pattern, index)
+        if self.patterns:
+            automaton.make_automaton()
+        return automaton
+
+    def _build_python(self):
+        """构建纯 Python 自动机（goto / fail / output 三张表）"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(index)
+
+        # 广度优先计算失败指针，并合并后缀模式的输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        遍历所有命中（含重叠命中）
+        返回: (起始位置, 模式序号)，按结束位置升序
+        """
+        if not text or not self.patterns:
+            return
+
+        if self._native is not None:
+            for end, index in self._native.iter(text):
+                yield end - len(self.patterns[index]) + 1, index
+            return
+
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield position - len(patterns[index]) + 1, index
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        统计每个模式的出现次数
+        与 str.count 语义一致：同一模式的多次出现不重叠计数，不同模式之间互不影响
+        """
+        counts: Dict[str, int] = {}
+        next_free: Dict[int, int] = {}
+        patterns = self.patterns
+        for start, index in self.iter_matches(text):
+            if start < next_free.get(index, 0):
+                continue
+            pattern = patterns[index]
+            next_free[index] = start + len(pattern)
+            counts[pattern] = counts.get(pattern, 0) + 1
+        return counts
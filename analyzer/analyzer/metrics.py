@@ -0,0 +1,188 @@
+"""运行指标模块 - 分阶段耗时直方图与计数器，以 Prometheus 文本格式导出"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+
+# 耗时分桶（秒）：覆盖从微秒级的缓存查询到秒级的大批量分析
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+# 批量大小分桶（条）
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """单调递增计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str):
+        """增加计数（labels 按 labelnames 顺序给出）"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """当前计数"""
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class _HistogramSeries:
+    """单个标签组合的直方图数据（各桶为非累计计数，导出时再累加）"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """直方图：固定分桶，observe 只做一次二分查找和三次累加"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        """记录一个观测值"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.sum += value
+            series.count += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        """计时上下文：with histogram.time('stage'): ..."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        """某标签组合的观测次数"""
+        series = self._series.get(labels)
+        return series.count if series is not None else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(s.counts), s.sum, s.count) for labels, s in self._series.items())
+        names = self.labelnames + ("le",)
+        lines = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} "
+                             f"{cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class _Timer:
+    """Histogram.time 返回的计时上下文"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """注册指标（同名指标只能注册一次）"""
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Prometheus 文本格式（version 0.0.4）"""
+        lines = []
+        for metric in self._metrics.values():
+            exported = f"{metric.name}_total" if metric.kind == "counter" else metric.name
+            lines.append(f"# HELP {exported} {metric.documentation}")
+            lines.append(f"# TYPE {exported} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 进程内全局注册表（/metrics 导出当前进程的指标；进程池工作进程中的记录不会汇总到 API 进程）
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "analyzer_stage_seconds", "Time spent in each analysis stage", ("stage",)))
+batch_size = registry.register(Histogram(
+    "analyzer_batch_size", "Number of news items per scoring batch", (), SIZE_BUCKETS))
+cache_requests = registry.register(Counter(
+    "analyzer_cache_requests", "Article result cache lookups by outcome", ("result",)))
+http_cache_requests = registry.register(Counter(
+    "analyzer_http_cache_requests", "Response cache lookups for cacheable GET endpoints by outcome", ("result",)))
+budget_chars = registry.register(Counter(
+    "analyzer_budget_chars", "Characters scored or skipped under the per-document text budget", ("result",)))
+cascade_paths = registry.register(Counter(
+    "analyzer_cascade_paths", "Documents scored by the lexicon alone or with SnowNLP in cascade mode", ("path",)))
+duplicate_articles = registry.register(Counter(
+    "analyzer_duplicate_articles", "News items that reused the score of a near-duplicate cluster representative"))
+
+
+def render() -> str:
+    """导出全局注册表"""
+    return registry.render()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -54,6 +54,14 @@ class SentimentAnalysisResult(BaseModel):
     details: List[dict]
 
 
+class ColumnarSentimentResult(BaseModel):
+    """情感分析结果（列式）：columns 中每个字段一个数组，第 i 个元素对应第 i 条明细"""
+    overall_sentiment: float
+    sentiment_label: str
+    count: int
+    columns: Dict[str, list]
+
+
 class InvestmentAdvice(BaseModel):
     """投资建议"""
     market_outlook: str
@@ -1,33 +1,82 @@
 """增强版情感分析器 - 集成金融专业词典"""
 
-import jieba
 import re
-from snownlp import SnowNLP
-from typing import List, Dict, Optional
-from analyzer.models import SentimentAnalysisResult
-from analyzer.financial_lexicon import financial_lexicon
+from functools import partial
+from typing import Callable, List, Dict, Iterable, Optional, Sequence, Tuple
+from analyzer.models import ColumnarSentimentResult, SentimentAnalysisResult
+from analyzer.financial_lexicon import FinancialLexicon, financial_lexicon
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from analyzer.document import DocumentContext, score_snownlp
+from analyzer.cache import ArticleCache
+from analyzer.dedup import NearDuplicateDetector, cluster_id
+from analyzer.metrics import (batch_size, budget_chars, cache_requests, cascade_paths, duplicate_articles,
+                              stage_seconds)
+from analyzer.warmup import register_lexicon_words
+
+
+# 汇总 overall_sentiment 的加权方式：每篇新闻计一次，或每个近似重复簇计一次
+WEIGHTINGS = ('article', 'cluster')
+# 明细字段（cluster / duplicate 只在启用近似重复检测时出现，scored_chars / text_chars 只在设置打分预算时出现，
+# scoring_path 只在启用级联打分时出现）；keywords 需要 jieba 分词，未请求时不计算
+DETAIL_FIELDS = ('title', 'sentiment', 'sentiment_label', 'keywords', 'industries', 'snownlp_score',
+                 'lexicon_score', 'keyword_count', 'scored_chars', 'text_chars', 'scoring_path', 'cluster',
+                 'duplicate')
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """解析逗号分隔的明细字段列表（保持请求顺序、去重）；为空时返回 None 表示全部字段"""
+    if not value or not value.strip():
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}; available: {', '.join(DETAIL_FIELDS)}")
+    return fields
+
+
+def columnar_result(result: SentimentAnalysisResult, fields: Optional[Sequence[str]] = None) -> ColumnarSentimentResult:
+    """
+    把逐行明细转成列式：每个字段一个数组，第 i 个元素对应第 i 条明细（该条没有此字段时为 None）
+    fields 为 None 时按明细中出现的顺序包含全部字段
+    """
+    if fields is None:
+        fields = list(dict.fromkeys(key for detail in result.details for key in detail))
+    return ColumnarSentimentResult(
+        overall_sentiment=result.overall_sentiment,
+        sentiment_label=result.sentiment_label,
+        count=len(result.details),
+        columns={field: [detail.get(field) for detail in result.details] for field in fields},
+    )
 
 
 class SentimentAnalyzer:
     """增强版情感分析器 - 结合 SnowNLP 和金融专业词典"""
 
-    def __init__(self):
-        """初始化情感分析器"""
-        self.lexicon = financial_lexicon
-        self._init_jieba()
+    def __init__(self, result_cache: Optional[ArticleCache] = None, preload: bool = True,
+                 lexicon: Optional[FinancialLexicon] = None, deduplicator: Optional[NearDuplicateDetector] = None,
+                 budget: Optional[TextBudget] = None, cascade: Optional[LexiconCascade] = None):
+        """
+        初始化情感分析器
+        result_cache: 逐条新闻结果缓存，为 None 时不缓存
+        preload: 是否立即把金融词汇加入 jieba（会触发 jieba 词库加载）；
+                 为 False 时推迟到首次分析或预热时
+        lexicon: 使用的金融词典，为 None 时使用内置词典（热更新时整体替换该属性）
+        deduplicator: 打分前的近似重复检测，为 None 时逐条打分
+        budget: 长文本打分预算，为 None 时整篇打分
+        cascade: 词典优先的级联策略，为 None 时每篇都调用 SnowNLP
+        """
+        self.lexicon = lexicon or financial_lexicon
+        self.result_cache = result_cache
+        self.deduplicator = deduplicator
+        self.budget = budget
+        self.cascade = cascade
+        if preload:
+            self._init_jieba()
 
     def _init_jieba(self):
         """初始化 jieba 分词，添加金融词汇"""
-        # 添加正面词汇
-        for word in self.lexicon.positive_words.keys():
-            jieba.add_word(word)
-        # 添加负面词汇
-        for word in self.lexicon.negative_words.keys():
-            jieba.add_word(word)
-        # 添加行业关键词
-        for keywords in self.lexicon.industry_keywords.values():
-            for word in keywords:
-                jieba.add_word(word)
+        register_lexicon_words(self.lexicon)
 
     def clean_text(self, text: str) -> str:
         """清理文本"""
@@ -40,21 +89,30 @@ class SentimentAnalyzer:
         cleaned = cleaned.strip()
         return cleaned
 
+    def document(self, text: str) -> DocumentContext:
+        """创建文档分析上下文"""
+        self._init_jieba()
+        return DocumentContext(text, self.lexicon)
+
     def extract_keywords(self, text: str) -> List[str]:
         """提取金融关键词"""
-        words = list(jieba.cut(text))
+        return self.keywords_from(self.document(text))
+
+    def keywords_from(self, doc: DocumentContext) -> List[str]:
+        """从文档上下文提取金融关键词"""
         keywords = []
         
         # 提取正面/负面关键词
-        for word in words:
+        for word in doc.tokens:
             if word in self.lexicon.positive_words or word in self.lexicon.negative_words:
                 if word not in keywords:
                     keywords.append(word)
         
         # 提取行业关键词
+        hits = doc.lexicon_hits
         for industry, industry_keywords in self.lexicon.industry_keywords.items():
             for kw in industry_keywords:
-                if kw in text and kw not in keywords:
+                if hits.get(kw) and kw not in keywords:
                     keywords.append(kw)
         
         return keywords[:15]  # 限制最多15个关键词
@@ -98,57 +156,226 @@ class SentimentAnalyzer:
             # 大量匹配，主要依赖词典
             return snownlp_score * 0.2 + lexicon_score * 0.8
 
-    def analyze_news_sentiment(self, news_list: List[dict]) -> SentimentAnalysisResult:
-        """分析新闻情感（增强版）"""
-        if not news_list:
-            return SentimentAnalysisResult(
-                overall_sentiment=0.5,
-                sentiment_label="中性",
-                details=[]
-            )
+    def _prepare_news(self, news: dict) -> Optional[Tuple[str, str]]:
+        """清理新闻文本，返回 (标题, 打分全文)；标题和正文都为空时返回 None"""
+        title = news.get('title', '')
+        with stage_seconds.time('clean_text'):
+            content = self.clean_text(news.get('content', ''))
+        full_text = f"{title} {content}"
+
+        if not full_text.strip():
+            return None
+        return title, full_text
+
+    def _scoring_documents(self, texts: List[str]) -> List[DocumentContext]:
+        """
+        建立打分用的文档上下文
+        设置了打分预算时，超出预算的文档按预算逐块打分（整批一起），文档上下文只包含已打分的前缀；
+        同时设置了级联策略时，逐块打分过程中词典已足够可靠的文档不做 SnowNLP 分词
+        """
+        if self.budget is None:
+            return [self.document(text) for text in texts]
+        docs: List[Optional[DocumentContext]] = [None] * len(texts)
+        over = []
+        for index, text in enumerate(texts):
+            if len(text) > self.budget.max_chars:
+                over.append(index)
+            else:
+                docs[index] = self.document(text)
+        if over:
+            self._init_jieba()
+            with stage_seconds.time('budget'):
+                budgeted = self.budget.documents([texts[index] for index in over], self.lexicon, self._combine_scores,
+                                                 self.cascade)
+            for index, doc in zip(over, budgeted):
+                docs[index] = doc
+        scored = sum(len(doc.text) for doc in docs)
+        budget_chars.inc(scored, 'scored')
+        budget_chars.inc(sum(len(text) for text in texts) - scored, 'skipped')
+        return docs
+
+    def _news_detail(self, title: str, doc: DocumentContext, text_chars: int,
+                     keywords: bool = True) -> Tuple[dict, float]:
+        """
+        由已打分的文档上下文生成单条新闻明细（keywords 为 False 时不提取关键词）
+        设置了打分预算时附带实际打分的字符数 scored_chars 和全文字符数 text_chars
+        级联模式下附带打分路径 scoring_path（lexicon / snownlp），只用词典打分时 snownlp_score 为策略的 fallback
+        """
+        lexicon_only = self._lexicon_only(doc)
+        snownlp_score = self.cascade.fallback if lexicon_only else doc.snownlp_score
+        lexicon_score = doc.lexicon_result['score']
+        word_count = doc.lexicon_result['total_keywords']
+        final_score = self.score_document(doc)
+
+        detail = {
+            'title': title,
+            'sentiment': round(final_score, 3),
+            'sentiment_label': self.get_sentiment_label(final_score),
+        }
+        if keywords:
+            with stage_seconds.time('keywords'):
+                detail['keywords'] = self.keywords_from(doc)
+        detail.update({
+            'industries': doc.industries,
+            'snownlp_score': round(snownlp_score, 3),
+            'lexicon_score': round(lexicon_score, 3),
+            'keyword_count': word_count,
+        })
+        if self.budget is not None:
+            detail['scored_chars'] = len(doc.text)
+            detail['text_chars'] = text_chars
+        if self.cascade is not None:
+            detail['scoring_path'] = 'lexicon' if lexicon_only else 'snownlp'
+        return detail, final_score
+
+    def score_news_item(self, news: dict) -> Optional[Tuple[dict, float]]:
+        """
+        分析单条新闻
+        返回: (明细, 未取整的组合分数)；标题和正文都为空时返回 None
+        """
+        return self.score_news_items([news])[0]
+
+    def score_news_items(self, news_list: List[dict], keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+        """
+        逐条分析多条新闻（不走结果缓存），SnowNLP 部分整批计算
+        keywords 为 False 时不提取关键词（跳过 jieba 分词），明细中没有 keywords 字段
+        """
+        prepared = [self._prepare_news(news) for news in news_list]
+        texts = [item[1] for item in prepared if item is not None]
+        docs = iter(self._scoring_documents(texts))
+        scored = [None if item is None else (item[0], next(docs), len(item[1])) for item in prepared]
+        self._score_stages([item[1] for item in scored if item is not None])
+        return [None if item is None else self._news_detail(*item, keywords=keywords) for item in scored]
+
+    def _score_stages(self, docs: List[DocumentContext]):
+        """
+        分别计时词典打分和 SnowNLP 打分（结果缓存在文档上下文中）
+        级联模式下先算词典分数，只对词典把握不足的文档调用 SnowNLP
+        """
+        if not docs:
+            return
+        with stage_seconds.time('lexicon'):
+            for doc in docs:
+                doc.lexicon_result
+        if self.cascade is not None:
+            lexicon_only = sum(1 for doc in docs if self._lexicon_only(doc))
+            cascade_paths.inc(lexicon_only, 'lexicon')
+            cascade_paths.inc(len(docs) - lexicon_only, 'snownlp')
+            docs = [doc for doc in docs if not self._lexicon_only(doc)]
+        with stage_seconds.time('snownlp'):
+            score_snownlp(docs)
+
+    def _lexicon_only(self, doc: DocumentContext) -> bool:
+        """级联模式下该文档是否只用词典打分"""
+        return self.cascade is not None and self.cascade.accepts(doc.lexicon_result)
+
+    @property
+    def result_version(self) -> str:
+        """
+        分析结果版本（词典、打分预算或级联策略变化时缓存自动失效）
+        长度不固定，写入定长的数据库列时先用 database.stored_version 转换
+        """
+        parts = [self.lexicon.version]
+        parts += [policy.version for policy in (self.budget, self.cascade) if policy is not None]
+        return ":".join(parts)
 
+    def score_news(self, news_list: List[dict],
+                   scorer: Optional[Callable[[List[dict]], List[Optional[Tuple[dict, float]]]]] = None,
+                   keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+        """
+        逐条打分，结果与输入顺序一致
+        配置了近似重复检测时每个簇只打分一次，簇内其余新闻复用代表的分数；
+        明细中 cluster 为簇编号，duplicate 表示该条是否为复用结果的转载
+        配置了结果缓存时只计算未命中的新闻；scorer 用于批量计算未命中部分（默认在当前进程整批计算）
+        keywords 为 False 时不提取关键词，传入的 scorer 也应按此计算（结果缓存中与完整明细分开存放）
+        """
+        if scorer is None:
+            scorer = partial(self.score_news_items, keywords=keywords)
+        batch_size.observe(len(news_list))
+        if self.deduplicator is None:
+            return self._score_cached(news_list, scorer, keywords)
+
+        # 转载常改写标题，按正文判断是否重复（正文为空时用标题）
+        texts = [self.clean_text(news.get('content', '')) or news.get('title', '') for news in news_list]
+        with stage_seconds.time('dedup'):
+            representatives = self.deduplicator.cluster(texts)
+        unique = [index for index, representative in enumerate(representatives) if representative == index]
+        duplicate_articles.inc(len(news_list) - len(unique))
+        unique_scored = dict(zip(unique, self._score_cached([news_list[index] for index in unique], scorer,
+                                                            keywords)))
+        clusters = {index: cluster_id(texts[index]) for index in unique}
+
+        scored: List[Optional[Tuple[dict, float]]] = []
+        for index, representative in enumerate(representatives):
+            item = unique_scored[representative]
+            if item is None:
+                scored.append(None)
+                continue
+            detail, final_score = item
+            # 复制一份再标注，避免改动结果缓存中的对象
+            detail = {**detail, 'cluster': clusters[representative], 'duplicate': index != representative}
+            if index != representative:
+                detail['title'] = news_list[index].get('title', '')
+            scored.append((detail, final_score))
+        return scored
+
+    def _score_cached(self, news_list: List[dict],
+                      scorer: Callable[[List[dict]], List[Optional[Tuple[dict, float]]]],
+                      keywords: bool = True) -> List[Optional[Tuple[dict, float]]]:
+        """走结果缓存打分，只计算未命中的新闻（不含关键词的明细按单独的版本缓存）"""
+        if self.result_cache is None:
+            return scorer(news_list)
+
+        version = self.result_version if keywords else f"{self.result_version}:no-keywords"
+        keys = [self.result_cache.article_key(news, version) for news in news_list]
+        with stage_seconds.time('cache_lookup'):
+            cached = self.result_cache.get_many(keys)
+        cache_requests.inc(len(cached), 'hit')
+        cache_requests.inc(len(keys) - len(cached), 'miss')
+
+        scored: List[Optional[Tuple[dict, float]]] = [None] * len(news_list)
+        missing = []
+        for index, key in enumerate(keys):
+            if key in cached:
+                detail, final_score = cached[key]
+                scored[index] = (dict(detail), final_score)
+            else:
+                missing.append(index)
+
+        if missing:
+            computed = scorer([news_list[index] for index in missing])
+            new_items = {}
+            for index, item in zip(missing, computed):
+                scored[index] = item
+                if item is not None:
+                    new_items[keys[index]] = [item[0], item[1]]
+            self.result_cache.set_many(new_items)
+
+        return scored
+
+    def build_result(self, scored: Iterable[Optional[Tuple[dict, float]]], weighting: str = 'article',
+                     fields: Optional[Sequence[str]] = None) -> SentimentAnalysisResult:
+        """
+        把逐条分析结果（按输入顺序）汇总为 SentimentAnalysisResult
+        weighting 为 cluster 时转载（duplicate 为真的明细）不计入 overall_sentiment，每个簇只计一次
+        fields 不为 None 时明细只保留这些字段（按 fields 的顺序）
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"weighting must be one of {WEIGHTINGS}")
         total_sentiment = 0
         valid_count = 0
         sentiment_details = []
-        all_industries = set()
 
-        for news in news_list:
-            title = news.get('title', '')
-            content = self.clean_text(news.get('content', ''))
-            full_text = f"{title} {content}"
-            
-            if not full_text.strip():
+        for item in scored:
+            if item is None:
+                continue
+            detail, final_score = item
+            if fields is None:
+                sentiment_details.append(detail)
+            else:
+                sentiment_details.append({field: detail[field] for field in fields if field in detail})
+            if weighting == 'cluster' and detail.get('duplicate'):
                 continue
-
-            # SnowNLP 基础分析
-            try:
-                s = SnowNLP(full_text)
-                snownlp_score = s.sentiments
-            except Exception:
-                snownlp_score = 0.5
-
-            # 金融词典分析
-            lexicon_result = self.analyze_with_lexicon(full_text)
-            lexicon_score = lexicon_result['score']
-            word_count = lexicon_result['total_keywords']
-
-            # 组合分数
-            final_score = self._combine_scores(snownlp_score, lexicon_score, word_count)
-
-            # 收集行业信息
-            all_industries.update(lexicon_result.get('detected_industries', []))
-
-            sentiment_details.append({
-                'title': title,
-                'sentiment': round(final_score, 3),
-                'sentiment_label': self.get_sentiment_label(final_score),
-                'keywords': self.extract_keywords(full_text),
-                'industries': lexicon_result.get('detected_industries', []),
-                'snownlp_score': round(snownlp_score, 3),
-                'lexicon_score': round(lexicon_score, 3),
-                'keyword_count': word_count,
-            })
-
             total_sentiment += final_score
             valid_count += 1
 
@@ -160,28 +387,38 @@ class SentimentAnalyzer:
             details=sentiment_details
         )
 
+    def analyze_news_sentiment(self, news_list: List[dict], weighting: str = 'article',
+                               fields: Optional[Sequence[str]] = None) -> SentimentAnalysisResult:
+        """
+        分析新闻情感（增强版）
+        fields: 明细只包含这些字段，为 None 时包含全部；不含 keywords 时不提取关键词
+        """
+        if not news_list:
+            return SentimentAnalysisResult(
+                overall_sentiment=0.5,
+                sentiment_label="中性",
+                details=[]
+            )
+
+        keywords = fields is None or 'keywords' in fields
+        return self.build_result(self.score_news(news_list, keywords=keywords), weighting, fields)
+
+    def score_document(self, doc: DocumentContext) -> float:
+        """组合 SnowNLP 与词典分数（未取整）；级联模式下只用词典打分时 SnowNLP 分数取策略的 fallback"""
+        lexicon_result = doc.lexicon_result
+        snownlp_score = self.cascade.fallback if self._lexicon_only(doc) else doc.snownlp_score
+        return self._combine_scores(snownlp_score, lexicon_result['score'], lexicon_result['total_keywords'])
+
     def analyze_single_text(self, text: str) -> float:
         """分析单条文本情感"""
-        cleaned = self.clean_text(text)
+        with stage_seconds.time('clean_text'):
+            cleaned = self.clean_text(text)
         if not cleaned:
             return 0.5
 
-        # SnowNLP 基础分析
-        try:
-            s = SnowNLP(cleaned)
-            snownlp_score = s.sentiments
-        except Exception:
-            snownlp_score = 0.5
-
-        # 金融词典分析
-        lexicon_result = self.analyze_with_lexicon(cleaned)
-        lexicon_score = lexicon_result['score']
-        word_count = lexicon_result['total_keywords']
-
-        # 组合分数
-        final_score = self._combine_scores(snownlp_score, lexicon_score, word_count)
-
-        return round(final_score, 3)
+        doc = self._scoring_documents([cleaned])[0]
+        self._score_stages([doc])
+        return round(self.score_document(doc), 3)
 
     def get_detailed_analysis(self, text: str) -> dict:
         """获取详细的情感分析结果"""
@@ -195,33 +432,24 @@ class SentimentAnalyzer:
                 "details": {}
             }
 
-        # SnowNLP 分析
-        try:
-            s = SnowNLP(cleaned)
-            snownlp_score = s.sentiments
-        except Exception:
-            snownlp_score = 0.5
-
-        # 金融词典分析
-        lexicon_result = self.analyze_with_lexicon(cleaned)
-
-        # 组合分数
-        final_score = self._combine_scores(
-            snownlp_score, 
-            lexicon_result['score'], 
-            lexicon_result['total_keywords']
-        )
-
+        doc = self.document(cleaned)
+        lexicon_result = doc.lexicon_result
+        final_score = self.score_document(doc)
+        lexicon_only = self._lexicon_only(doc)
+
+        details = {
+            "snownlp_score": round(self.cascade.fallback if lexicon_only else doc.snownlp_score, 3),
+            "lexicon_score": round(lexicon_result['score'], 3),
+            "positive_words": lexicon_result['positive_count'],
+            "negative_words": lexicon_result['negative_count'],
+            "found_words": lexicon_result.get('found_words', [])[:5],
+        }
+        if self.cascade is not None:
+            details["scoring_path"] = 'lexicon' if lexicon_only else 'snownlp'
         return {
             "score": round(final_score, 3),
             "label": self.get_sentiment_label(final_score),
-            "keywords": self.extract_keywords(cleaned),
-            "industries": lexicon_result.get('detected_industries', []),
-            "details": {
-                "snownlp_score": round(snownlp_score, 3),
-                "lexicon_score": round(lexicon_result['score'], 3),
-                "positive_words": lexicon_result['positive_count'],
-                "negative_words": lexicon_result['negative_count'],
-                "found_words": lexicon_result.get('found_words', [])[:5],
-            }
+            "keywords": self.keywords_from(doc),
+            "industries": doc.industries,
+            "details": details
         }
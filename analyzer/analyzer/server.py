@@ -0,0 +1,218 @@
+"""
+预加载多进程服务模式 - 主进程加载词典、jieba 词库和 SnowNLP 模型后再 fork 出 uvicorn 工作进程
+工作进程以写时复制方式共享主进程中已加载的模型内存页，并共用同一个监听 socket
+
+各工作进程的其他状态互不相通：日内累计量、技术指标和 /analyze/single 响应缓存各自独立，
+/metrics 只返回响应请求的那个工作进程的计数。应用模块提供 prefork_conflicts() 时，
+--workers > 1 前先调用它，返回非空（如仍启用进程内的日内累计和技术指标状态）时拒绝启动
+
+用法（在 analyzer 目录下）:
+    python -m analyzer.server --workers 4
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import time
+from typing import Dict, List
+
+import uvicorn
+
+
+# 预加载模式下主进程在 fork 前写入自己的 PID，工作进程据此查找同组进程
+MASTER_PID_ENV = "ANALYZER_PREFORK_MASTER_PID"
+
+_SMAPS_FIELDS = {
+    "Rss": "rss", "Pss": "pss", "Shared_Clean": "shared_clean", "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean", "Private_Dirty": "private_dirty",
+}
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """
+    进程内存占用（字节）：rss、pss、uss（独占页，Private_Clean + Private_Dirty）和 shared
+    读取 /proc/<pid>/smaps_rollup（Linux 4.14+），不可用时只返回 /proc/<pid>/status 中的 rss
+    """
+    usage = {'pid': pid}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                field = _SMAPS_FIELDS.get(name)
+                if field:
+                    usage[field] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        usage['rss'] = int(line.split()[1]) * 1024
+        except OSError:
+            return usage
+        return usage
+
+    usage['uss'] = usage.pop('private_clean', 0) + usage.pop('private_dirty', 0)
+    usage['shared'] = usage.pop('shared_clean', 0) + usage.pop('shared_dirty', 0)
+    return usage
+
+
+def child_pids(parent: int) -> List[int]:
+    """parent 的直接子进程（扫描 /proc）"""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # 进程名可能含空格和括号，从最后一个右括号之后解析
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == parent:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def memory_report() -> dict:
+    """
+    当前服务的内存报告
+    预加载模式下包含主进程和所有工作进程；uss 之和是实际占用的下界，pss 之和为按共享比例分摊后的总量
+    """
+    master_pid = int(os.environ.get(MASTER_PID_ENV, 0)) or None
+    if master_pid is None:
+        processes = [memory_usage(os.getpid())]
+        master = None
+    else:
+        master = memory_usage(master_pid)
+        processes = [memory_usage(pid) for pid in child_pids(master_pid)]
+    report = {
+        'mode': 'prefork' if master_pid is not None else 'single',
+        'current_pid': os.getpid(),
+        'master': master,
+        'workers': processes,
+    }
+    everything = processes + ([master] if master else [])
+    for field in ('rss', 'pss', 'uss'):
+        report[f'total_{field}'] = sum(p.get(field, 0) for p in everything)
+    return report
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkConflict(RuntimeError):
+    """应用存在多进程下会不一致的状态，不能启动多个工作进程"""
+
+
+class PreforkServer:
+    """预加载后 fork 的多进程 uvicorn 服务（只支持类 Unix 系统）"""
+
+    def __init__(self, app: str = "main:app", host: str = "0.0.0.0", port: int = 8000, workers: int = 2,
+                 preload: bool = True):
+        """
+        app: "模块:变量" 形式的 ASGI 应用路径（在主进程中导入）
+        preload: 是否在 fork 前预热模型（导入 app 所在模块后调用其中的 preload_models）
+        """
+        self.app_path = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.preload = preload
+        self.children: Dict[int, int] = {}
+        self._stopping = False
+
+    def load(self):
+        """导入应用、预热模型并冻结 GC，之后 fork 出的进程共享这些对象"""
+        module_name, _, attr = self.app_path.partition(":")
+        module = importlib.import_module(module_name)
+        self.app = getattr(module, attr or "app")
+        conflicts = module.prefork_conflicts() if self.workers > 1 and hasattr(module, "prefork_conflicts") else []
+        if conflicts:
+            raise PreforkConflict(f"Cannot start {self.workers} workers: " + "; ".join(conflicts))
+        if self.preload and hasattr(module, "preload_models"):
+            start = time.perf_counter()
+            module.preload_models()
+            print(f"Models preloaded in {time.perf_counter() - start:.2f}s")
+        # 已加载的对象移入永久代，GC 不再遍历（否则子进程中的回收会写脏共享页）
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self, index: int, sock: socket.socket):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = index
+            return
+        # 子进程：恢复默认信号处理，交给 uvicorn 接管
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        status = 0
+        try:
+            config = uvicorn.Config(self.app, lifespan="on", log_level="info")
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException as e:
+            print(f"Worker {os.getpid()} exited with error: {e}")
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _stop(self, signum, _frame):
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """启动并监管工作进程：异常退出的工作进程会被重新 fork，收到 SIGTERM / SIGINT 时全部退出"""
+        self.load()
+        sock = _bind(self.host, self.port)
+        os.environ[MASTER_PID_ENV] = str(os.getpid())
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.workers):
+            self._spawn(index, sock)
+        print(f"Prefork server on {self.host}:{self.port} with workers {sorted(self.children)}")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.children.pop(pid, None)
+            if index is not None and not self._stopping:
+                print(f"Worker {pid} exited with status {status}, restarting")
+                time.sleep(1.0)
+                self._spawn(index, sock)
+        sock.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="预加载模型后 fork 多个 uvicorn 工作进程")
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", "2")))
+    parser.add_argument("--no-preload", action="store_true", help="不在 fork 前预热模型（用于对比内存占用）")
+    args = parser.parse_args()
+    try:
+        PreforkServer(args.app, args.host, args.port, args.workers, preload=not args.no_preload).run()
+    except PreforkConflict as e:
+        parser.exit(2, f"{e}\n")
+
+
+if __name__ == "__main__":
+    main_cli()
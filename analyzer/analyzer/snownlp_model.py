@@ -0,0 +1,413 @@
+"""
+SnowNLP 情感模型的向量化实现 - 把 SnowNLP 的分词模型和朴素贝叶斯情感模型导出为 NumPy 数组，整批文档一起打分
+
+结果与 SnowNLP(text).sentiments 一致（分词完全相同，分数只有浮点舍入误差）:
+    分词: 字符级三元组生成模型的计数按 (字符组合, 标签组合) 编码为升序 int64 键，searchsorted 批量查表；
+          所有汉字片段按位置同步做 Viterbi，每一步是一次数组运算，步数等于最长片段的长度
+    情感: 预先算好每个词的 log P(w|pos) - log P(w|neg)，文档-词稀疏矩阵（CSR）乘以权重向量得到对数几率
+
+用法（在 analyzer 目录下）:
+    python -m analyzer.snownlp_model export snownlp_model.npz   # 从已安装的 SnowNLP 导出
+    python -m analyzer.snownlp_model info snownlp_model.npz
+设置环境变量 SNOWNLP_MODEL_PATH 指向导出文件后，进程直接加载数组，不再导入 SnowNLP
+"""
+
+import gc
+import math
+import os
+import re
+import sys
+import tempfile
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+# 分词标签：词首、词中、词尾、单字词，以及句首占位
+TAGS = ('b', 'm', 'e', 's', 'BOS')
+_B, _M, _E, _S, _BOS = range(len(TAGS))
+
+# 与 snownlp.seg 相同：只对连续汉字做模型分词，其余部分按空白切分
+_RE_ZH = re.compile('([\u4E00-\u9FA5]+)')
+
+# 每块最多处理的汉字数（限制 (字数, 5, 5, 4) 对数概率数组的内存）
+_CHUNK_CHARS = 8192
+
+
+def _gather(keys: np.ndarray, counts: np.ndarray, base: np.ndarray, width: int) -> np.ndarray:
+    """
+    查稀疏计数表：keys 为升序的 base * width + 标签组合编号
+    返回 (len(base), width) 的稠密计数，表中不存在的组合为 0
+    """
+    lo = np.searchsorted(keys, base * width)
+    hi = np.searchsorted(keys, base * width + width)
+    lengths = hi - lo
+    dense = np.zeros((len(base), width))
+    total = int(lengths.sum())
+    if total:
+        rows = np.repeat(np.arange(len(base)), lengths)
+        entries = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(lo, lengths)
+        dense[rows, keys[entries] % width] = counts[entries]
+    return dense
+
+
+def _tags_to_words(run: str, tags: List[int]) -> List[str]:
+    """按 b/m/e/s 标签把汉字片段拼成词（与 snownlp.seg.seg.Seg.seg 相同）"""
+    words = []
+    current = ''
+    for char, tag in zip(run, tags):
+        if tag == _E:
+            words.append(current + char)
+            current = ''
+        elif tag == _B or tag == _S:
+            if current:
+                words.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        words.append(current)
+    return words
+
+
+class SegmentModel:
+    """SnowNLP 默认分词器（CharacterBasedGenerativeModel）的数组版本"""
+
+    def __init__(self, chars: np.ndarray, uni: np.ndarray, bi_keys: np.ndarray, bi_counts: np.ndarray,
+                 tri_keys: np.ndarray, tri_counts: np.ndarray, interpolation: np.ndarray):
+        """
+        chars: 字符表，0 号为句首占位 ''；未登录字使用编号 len(chars)
+        uni: (len(chars) + 1, 5) 的 (字, 标签) 计数，最后一行（未登录字）全为 0
+        bi_keys / tri_keys: 升序编码键，字符组合编号 * 25 + 标签组合（三元组为 * 125）
+        interpolation: (l1, l2, l3, 一元计数总和)
+        """
+        self.chars = chars
+        self.index = {char: i for i, char in enumerate(chars.tolist())}
+        self.radix = len(chars) + 1
+        self.uni = np.asarray(uni, dtype=float)
+        self.bi_keys = bi_keys
+        self.bi_counts = bi_counts
+        self.tri_keys = tri_keys
+        self.tri_counts = tri_counts
+        self.interpolation = interpolation
+        self.l1, self.l2, self.l3, self.uni_total = (float(v) for v in interpolation)
+
+    @classmethod
+    def from_snownlp(cls, model) -> "SegmentModel":
+        """从 snownlp.seg.y09_2047.CharacterBasedGenerativeModel 导出"""
+        # 训练时每个 (字, 标签) 都计入一元表，字符表只需从一元表收集
+        chars = [''] + sorted({char for char, _ in model.uni.d} - {''})
+        index = {char: i for i, char in enumerate(chars)}
+        tag_index = {tag: i for i, tag in enumerate(TAGS)}
+        radix = len(chars) + 1
+
+        uni = np.zeros((radix, len(TAGS)), dtype=np.int64)
+        for (char, tag), count in model.uni.d.items():
+            uni[index[char], tag_index[tag]] = count
+
+        def sort_table(keys, table):
+            keys = np.array(keys, dtype=np.int64)
+            counts = np.fromiter(table.values(), dtype=np.int64, count=len(table))
+            order = np.argsort(keys)
+            return keys[order], counts[order]
+
+        bi_keys, bi_counts = sort_table([
+            (index[c1] * radix + index[c2]) * 25 + tag_index[t1] * 5 + tag_index[t2]
+            for (c1, t1), (c2, t2) in model.bi.d
+        ], model.bi.d)
+        tri_keys, tri_counts = sort_table([
+            ((index[c1] * radix + index[c2]) * radix + index[c3]) * 125
+            + (tag_index[t1] * 5 + tag_index[t2]) * 5 + tag_index[t3]
+            for (c1, t1), (c2, t2), (c3, t3) in model.tri.d
+        ], model.tri.d)
+        interpolation = np.array([model.l1, model.l2, model.l3, model.uni.getsum()])
+        return cls(np.array(chars), uni, bi_keys, bi_counts, tri_keys, tri_counts, interpolation)
+
+    def _log_probs(self, ids: np.ndarray, prev1: np.ndarray, prev2: np.ndarray):
+        """
+        每个位置的转移对数概率 lp[i, t1, t2, t3]（与 log_prob 的插值公式和运算顺序一致）
+        以及该字是否在模型中出现过（未出现的字不计分，沿用前一状态）
+        """
+        radix = self.radix
+        u3 = self.uni[ids, :4]
+        u2 = self.uni[prev1][:, :, None]
+        b23 = _gather(self.bi_keys, self.bi_counts, prev1 * radix + ids, 25).reshape(-1, 5, 5)[:, :, :4]
+        b12 = _gather(self.bi_keys, self.bi_counts, prev2 * radix + prev1, 25).reshape(-1, 5, 5, 1)
+        t123 = _gather(self.tri_keys, self.tri_counts, (prev2 * radix + prev1) * radix + ids,
+                       125).reshape(-1, 5, 5, 5)[..., :4]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            uni = self.l1 * (u3 / self.uni_total)
+            bi = np.where(u2 == 0, 0.0, self.l2 * b23 / u2)
+            tri = np.where(b12 == 0, 0.0, self.l3 * t123 / b12)
+            total = uni[:, None, None, :] + bi[:, None, :, :] + tri
+            lp = np.where(total == 0, -np.inf, np.log(total))
+        return lp, (u3 != 0).any(axis=1)
+
+    def _tag_chunk(self, runs: List[str]) -> List[List[int]]:
+        lengths = np.array([len(run) for run in runs])
+        unknown = self.radix - 1
+        ids = np.fromiter((self.index.get(char, unknown) for run in runs for char in run),
+                          dtype=np.int64, count=int(lengths.sum()))
+        starts = np.cumsum(lengths) - lengths
+        offset = np.arange(len(ids)) - np.repeat(starts, lengths)
+        prev1 = np.where(offset >= 1, np.roll(ids, 1), 0)
+        prev2 = np.where(offset >= 2, np.roll(ids, 2), 0)
+        lp, found = self._log_probs(ids, prev1, prev2)
+
+        # 状态为 (前一字标签, 当前字标签)；片段按长度降序排列，第 j 步只处理长度大于 j 的前缀
+        order = np.argsort(-lengths, kind='stable')
+        sorted_lengths = lengths[order]
+        sorted_starts = starts[order]
+        scores = np.full((len(runs), 5, 5), -np.inf)
+        scores[:, _BOS, _BOS] = 0.0
+        backpointers = []
+        for j in range(int(sorted_lengths[0])):
+            active = int(np.count_nonzero(sorted_lengths > j))
+            rows = sorted_starts[:active] + j
+            previous = scores[:active]
+            candidates = previous[:, :, :, None] + lp[rows]
+            # argmax 取第一个最大值，与原实现按 b/m/e/s 顺序遍历、只在严格更大时替换一致
+            best = candidates.argmax(axis=1)
+            step = np.take_along_axis(candidates, best[:, None], axis=1)[:, 0]
+            missing = ~found[rows]
+            if missing.any():
+                # 未登录字：原实现不计分，且同一当前标签下最后遍历到的前驱覆盖之前的
+                last = _S if j >= 2 else _BOS
+                step[missing] = previous[missing][:, last, :, None]
+                best[missing] = last
+            scores[:active, :, :4] = step
+            scores[:active, :, _BOS] = -np.inf
+            backpointers.append(best)
+
+        tagged: List[List[int]] = [[] for _ in runs]
+        for k, run_index in enumerate(order.tolist()):
+            n = int(sorted_lengths[k])
+            # 原实现的状态列表以当前标签为主序，取第一个最大值
+            t3, t2 = divmod(int(scores[k, :, :4].T.argmax()), 5)
+            tags = [0] * n
+            for j in range(n - 1, -1, -1):
+                tags[j] = t3
+                if j:
+                    t2, t3 = int(backpointers[j][k, t2, t3]), t2
+            tagged[run_index] = tags
+        return tagged
+
+    def tag_runs(self, runs: Sequence[str]) -> List[List[int]]:
+        """对若干连续汉字片段做 Viterbi 标注，返回每个片段的标签编号（与 CharacterBasedGenerativeModel.tag 一致）"""
+        tagged: List[List[int]] = []
+        chunk: List[str] = []
+        chars = 0
+        for run in runs:
+            chunk.append(run)
+            chars += len(run)
+            if chars >= _CHUNK_CHARS:
+                tagged.extend(self._tag_chunk(chunk))
+                chunk, chars = [], 0
+        if chunk:
+            tagged.extend(self._tag_chunk(chunk))
+        return tagged
+
+    def segment_batch(self, texts: Sequence[str]) -> List[List[str]]:
+        """批量分词（与 snownlp.seg.seg 相同）"""
+        pieces = []
+        runs: List[str] = []
+        for text in texts:
+            items = []
+            for part in _RE_ZH.split(text):
+                part = part.strip()
+                if not part:
+                    continue
+                if _RE_ZH.match(part):
+                    items.append(len(runs))
+                    runs.append(part)
+                else:
+                    items.extend(part.split())
+            pieces.append(items)
+
+        tagged = self.tag_runs(runs)
+        result = []
+        for items in pieces:
+            words = []
+            for item in items:
+                if isinstance(item, int):
+                    words.extend(_tags_to_words(runs[item], tagged[item]))
+                else:
+                    words.append(item)
+            result.append(words)
+        return result
+
+
+class SentimentModel:
+    """SnowNLP 情感分类器（pos / neg 两类朴素贝叶斯）的数组版本"""
+
+    def __init__(self, vocabulary: np.ndarray, weights: np.ndarray, prior: float, unknown: float):
+        """
+        vocabulary: 词表；weights[i] 为第 i 个词的 log P(w|pos) - log P(w|neg)
+        prior: 两类先验的对数比；unknown: 未登录词的权重（两类都按加一平滑计数 1）
+        """
+        self.vocabulary = vocabulary
+        self.index = {word: i for i, word in enumerate(vocabulary.tolist())}
+        self.weights = weights
+        self.prior = float(prior)
+        self.unknown = float(unknown)
+        # 最后一列对应未登录词
+        self._columns = np.append(weights, unknown)
+
+    @classmethod
+    def from_snownlp(cls, classifier) -> "SentimentModel":
+        """从 snownlp.classification.bayes.Bayes 导出（频率按 AddOneProb.freq 的方式计算）"""
+        pos, neg = classifier.d['pos'], classifier.d['neg']
+        vocabulary = sorted(set(pos.d) | set(neg.d))
+
+        def log_freq(prob):
+            counts = np.array([prob.d.get(word, prob.none) for word in vocabulary], dtype=float)
+            return np.log(counts / prob.getsum())
+
+        total = classifier.total
+        prior = (math.log(pos.getsum()) - math.log(total)) - (math.log(neg.getsum()) - math.log(total))
+        unknown = math.log(float(pos.none) / pos.getsum()) - math.log(float(neg.none) / neg.getsum())
+        return cls(np.array(vocabulary), log_freq(pos) - log_freq(neg), prior, unknown)
+
+    def evidence_batch(self, documents: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        各文档特征词权重之和（不含先验）：文档-词计数矩阵（CSR，行号 rows、列号 columns）乘以权重向量
+        可按文本片段分别计算后相加
+        """
+        lengths = [len(words) for words in documents]
+        unknown = len(self._columns) - 1
+        columns = np.fromiter((self.index.get(word, unknown) for words in documents for word in words),
+                              dtype=np.intp, count=sum(lengths))
+        rows = np.repeat(np.arange(len(documents)), lengths)
+        return np.bincount(rows, weights=self._columns[columns], minlength=len(documents))
+
+    def probability(self, evidence: np.ndarray) -> np.ndarray:
+        """由特征词权重之和计算正面概率（加上先验得到对数几率后取数值稳定的 sigmoid）"""
+        logits = self.prior + evidence
+        with np.errstate(over='ignore'):
+            return np.where(logits >= 0, 1.0 / (1.0 + np.exp(-logits)), np.exp(logits) / (1.0 + np.exp(logits)))
+
+    def score_batch(self, documents: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        批量计算正面概率
+        等价于 Bayes.classify 中 1 / Σ exp(tmp[other] - tmp[k])
+        """
+        return self.probability(self.evidence_batch(documents))
+
+
+class SnowNLPModel:
+    """分词、停用词过滤和情感打分，整体与 SnowNLP(text).sentiments 一致"""
+
+    def __init__(self, segmenter: SegmentModel, sentiment: SentimentModel, stopwords: np.ndarray):
+        self.segmenter = segmenter
+        self.sentiment = sentiment
+        self.stopwords = stopwords
+        self._stop = frozenset(stopwords.tolist())
+
+    @classmethod
+    def from_snownlp(cls) -> "SnowNLPModel":
+        """从已安装的 SnowNLP 导出（导入和转换期间关闭 GC，可明显缩短耗时）"""
+        gc.disable()
+        try:
+            from snownlp import normal, seg, sentiment
+            return cls(SegmentModel.from_snownlp(seg.segger.segger),
+                       SentimentModel.from_snownlp(sentiment.classifier.classifier),
+                       np.array(sorted(normal.stop)))
+        finally:
+            gc.enable()
+
+    def words_batch(self, texts: Sequence[str]) -> List[List[str]]:
+        """情感模型使用的特征词（分词 + 停用词过滤，与 Sentiment.handle 相同）"""
+        stop = self._stop
+        return [[word for word in words if word not in stop] for words in self.segmenter.segment_batch(texts)]
+
+    def words(self, text: str) -> List[str]:
+        return self.words_batch([text])[0]
+
+    def score_words(self, documents: Sequence[Sequence[str]]) -> List[float]:
+        """按特征词批量打分"""
+        return self.sentiment.score_batch(documents).tolist()
+
+    def sentiments(self, texts: Sequence[str]) -> List[float]:
+        """批量计算 SnowNLP(text).sentiments"""
+        return self.score_words(self.words_batch(texts))
+
+    def save(self, path: str):
+        """写入 .npz 文件（先写临时文件再原子替换）"""
+        segmenter, sentiment = self.segmenter, self.sentiment
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snownlp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f, format_version=np.array(FORMAT_VERSION),
+                    chars=segmenter.chars, uni=segmenter.uni.astype(np.int64),
+                    bi_keys=segmenter.bi_keys, bi_counts=segmenter.bi_counts,
+                    tri_keys=segmenter.tri_keys, tri_counts=segmenter.tri_counts,
+                    interpolation=segmenter.interpolation,
+                    vocabulary=sentiment.vocabulary, weights=sentiment.weights,
+                    sentiment_params=np.array([sentiment.prior, sentiment.unknown]),
+                    stopwords=self.stopwords,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SnowNLPModel":
+        """从 .npz 文件加载；格式版本不符时抛出 ValueError"""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"unsupported SnowNLP model format {version}")
+            segmenter = SegmentModel(data["chars"], data["uni"], data["bi_keys"], data["bi_counts"],
+                                     data["tri_keys"], data["tri_counts"], data["interpolation"])
+            prior, unknown = data["sentiment_params"].tolist()
+            sentiment = SentimentModel(data["vocabulary"], data["weights"], prior, unknown)
+            return cls(segmenter, sentiment, data["stopwords"])
+
+    def info(self) -> dict:
+        return {
+            "format_version": FORMAT_VERSION,
+            "chars": len(self.segmenter.chars),
+            "bigrams": len(self.segmenter.bi_keys),
+            "trigrams": len(self.segmenter.tri_keys),
+            "vocabulary": len(self.sentiment.vocabulary),
+            "stopwords": len(self.stopwords),
+        }
+
+
+_default: Optional[SnowNLPModel] = None
+_default_lock = threading.Lock()
+
+
+def default_model() -> SnowNLPModel:
+    """
+    进程内共享的模型（首次调用时加载）
+    SNOWNLP_MODEL_PATH 指向的导出文件存在时直接加载，否则从已安装的 SnowNLP 转换
+    """
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = os.getenv("SNOWNLP_MODEL_PATH")
+                if path and os.path.exists(path):
+                    _default = SnowNLPModel.load(path)
+                else:
+                    _default = SnowNLPModel.from_snownlp()
+    return _default
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "info"):
+        print("usage: python -m analyzer.snownlp_model export|info <path>")
+        sys.exit(1)
+    if sys.argv[1] == "export":
+        model = SnowNLPModel.from_snownlp()
+        model.save(sys.argv[2])
+        print(f"SnowNLP model written to {sys.argv[2]}: {model.info()}")
+    else:
+        print(SnowNLPModel.load(sys.argv[2]).info())
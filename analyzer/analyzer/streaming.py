@@ -0,0 +1,134 @@
+"""流式请求解析模块 - 增量解析 JSON 数组或 NDJSON 请求体"""
+
+import codecs
+import json
+from typing import Any, AsyncIterator, List
+
+from starlette.responses import StreamingResponse
+
+
+class StreamFormatError(ValueError):
+    """请求体格式错误"""
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    边读取请求体边输出的 NDJSON 流式响应
+    StreamingResponse 在 ASGI 2.4 以下会并发调用 receive() 监听客户端断开，
+    与生成器读取请求体互相抢消息；这里只负责输出，断开由读取请求体时的 ClientDisconnect 体现
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def ndjson_line(obj: Any) -> bytes:
+    """序列化为一行 NDJSON"""
+    return (json.dumps(obj, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+class JSONItemParser:
+    """
+    增量解析器：逐块喂入文本，返回已经完整的元素
+    首个非空白字符为 '[' 时按 JSON 数组解析，否则按 NDJSON（每行一个 JSON 值）解析
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._mode = None  # "array" / "ndjson"
+        self._closed = False
+
+    def feed(self, text: str) -> List[Any]:
+        """喂入一段文本，返回新解析出的元素"""
+        self._buffer += text
+        if self._mode is None:
+            stripped = self._buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                return []
+            if stripped[0] == "[":
+                self._mode = "array"
+                self._buffer = stripped[1:]
+            else:
+                self._mode = "ndjson"
+                self._buffer = stripped
+        if self._mode == "array":
+            return self._parse_array()
+        return self._parse_lines()
+
+    def close(self) -> List[Any]:
+        """输入结束，返回剩余元素并检查完整性"""
+        if self._mode == "ndjson":
+            items = self._parse_lines()
+            tail = self._buffer.strip(_WHITESPACE)
+            self._buffer = ""
+            if tail:
+                items.append(self._loads(tail))
+            return items
+        if self._mode == "array" and not self._closed:
+            raise StreamFormatError("JSON array is not terminated")
+        return []
+
+    def _parse_array(self) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        position = 0
+        while not self._closed:
+            while position < len(buffer) and buffer[position] in _WHITESPACE + ",":
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                self._closed = True
+                position += 1
+                break
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # 元素尚未接收完整，等待更多数据
+                break
+            items.append(item)
+            position = end
+        self._buffer = buffer[position:]
+        if self._closed and self._buffer.strip(_WHITESPACE):
+            raise StreamFormatError("Unexpected data after JSON array")
+        return items
+
+    def _parse_lines(self) -> List[Any]:
+        items = []
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            line = line.strip(_WHITESPACE)
+            if line:
+                items.append(self._loads(line))
+        return items
+
+    @staticmethod
+    def _loads(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise StreamFormatError(f"Invalid NDJSON line: {e}") from e
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[Any]]:
+    """
+    从字节流中增量解析元素
+    每收到一块数据就产出其中已完整的元素（可能为空列表的批次会被跳过）
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parser = JSONItemParser()
+    async for chunk in chunks:
+        items = parser.feed(decoder.decode(chunk))
+        if items:
+            yield items
+    items = parser.feed(decoder.decode(b"", final=True)) + parser.close()
+    if items:
+        yield items
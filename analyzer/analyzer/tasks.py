@@ -0,0 +1,98 @@
+"""分析任务入口 - 供 CPUExecutor 在线程池或进程池中调用"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from analyzer.advisor import InvestmentAdvisor
+from analyzer.batch import BatchSentimentEngine
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from analyzer.cache import ArticleCache, CacheManager
+from analyzer.dedup import NearDuplicateDetector
+from analyzer.lexicon_artifact import LexiconReloader, load_lexicon
+from analyzer.models import ColumnarSentimentResult, InvestmentAdvice, SentimentAnalysisResult
+from analyzer.sentiment import SentimentAnalyzer, columnar_result
+from analyzer.warmup import WarmupState, warm_up
+
+
+# 当前进程内的分析组件（API 进程由 configure 注入，进程池工作进程由 init_worker 创建）
+_engine: Optional[BatchSentimentEngine] = None
+_advisor: Optional[InvestmentAdvisor] = None
+_reloader: Optional[LexiconReloader] = None
+
+
+def configure(engine: BatchSentimentEngine, advisor: InvestmentAdvisor):
+    """注入当前进程使用的分析组件"""
+    global _engine, _advisor
+    _engine = engine
+    _advisor = advisor
+
+
+def init_worker(redis_url: Optional[str] = None, cache_size: int = 10000, cache_ttl: int = 86400,
+                jieba_dict_path: Optional[str] = None, lexicon_path: Optional[str] = None,
+                lexicon_reload_interval: float = 0, dedup_threshold: float = 0,
+                text_budget: Optional[TextBudget] = None, cascade: Optional[LexiconCascade] = None):
+    """
+    进程池工作进程初始化：加载词典、jieba 词库和 SnowNLP 模型，并连接共享的 Redis 结果缓存
+    指定 lexicon_path 时从词典制品加载，并按 lexicon_reload_interval 秒轮询热更新；
+    dedup_threshold > 0 时打分前按该 Jaccard 阈值合并近似重复新闻；text_budget 为长文本打分预算；
+    cascade 为词典优先的级联策略
+    """
+    global _reloader
+    cache_manager = CacheManager(redis_url) if redis_url else None
+    lexicon = load_lexicon(lexicon_path) if lexicon_path else None
+    analyzer = SentimentAnalyzer(result_cache=ArticleCache(cache_manager, cache_size, cache_ttl), preload=False,
+                                 lexicon=lexicon,
+                                 deduplicator=NearDuplicateDetector(dedup_threshold) if dedup_threshold > 0 else None,
+                                 budget=text_budget, cascade=cascade)
+    warm_up(analyzer, WarmupState(), jieba_dict_path)
+    if lexicon_path:
+        _reloader = LexiconReloader(lexicon_path, [analyzer])
+        _reloader.reload()
+        _reloader.start(lexicon_reload_interval)
+    configure(BatchSentimentEngine(analyzer=analyzer, workers=1), InvestmentAdvisor())
+
+
+def _components():
+    """获取分析组件（未配置时使用默认实例）"""
+    if _engine is None:
+        configure(BatchSentimentEngine(workers=1), InvestmentAdvisor())
+    return _engine, _advisor
+
+
+def analyze_sentiment(news_list: List[dict], weighting: str = 'article', fields: Optional[Sequence[str]] = None,
+                      layout: str = 'rows') -> Union[SentimentAnalysisResult, ColumnarSentimentResult]:
+    """
+    分析新闻情感
+    fields 为明细包含的字段（None 表示全部）；layout 为 columns 时在工作进程内转成列式，只传回所需数组
+    """
+    engine, _ = _components()
+    result = engine.analyze_news_sentiment(news_list, weighting, fields)
+    return columnar_result(result, fields) if layout == 'columns' else result
+
+
+def score_news(news_list: List[dict]) -> List[Optional[Tuple[dict, float]]]:
+    """逐条打分（走结果缓存），结果与输入顺序一致"""
+    engine, _ = _components()
+    return engine.score_news(news_list)
+
+
+def generate_advice(stock_data: List[dict], sentiment_result: dict) -> InvestmentAdvice:
+    """生成投资建议"""
+    _, advisor = _components()
+    return advisor.generate_advice(stock_data, sentiment_result)
+
+
+def generate_market_advice(stock_data: List[dict], sentiment_result: dict) -> Dict[str, InvestmentAdvice]:
+    """按市场分别生成投资建议"""
+    _, advisor = _components()
+    return advisor.generate_market_advice(stock_data, sentiment_result)
+
+
+def analyze_single_text(text: str) -> dict:
+    """分析单条文本情感"""
+    engine, _ = _components()
+    score = engine.analyzer.analyze_single_text(text)
+    return {
+        "sentiment_score": score,
+        "sentiment_label": engine.analyzer.get_sentiment_label(score)
+    }
@@ -0,0 +1,165 @@
+"""启动预热模块 - 预构建 jieba 词典、显式加载模型、区分“已启动”与“已预热”"""
+
+import gc
+import marshal
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+
+import jieba
+
+from analyzer.financial_lexicon import FinancialLexicon
+from analyzer.snownlp_model import default_model
+
+
+# 已加入 jieba 词库的词典版本
+_registered_versions = set()
+_register_lock = threading.Lock()
+# 词典词加入前在 jieba 默认词库中的词频（移除时恢复；不在默认词库中为 None）
+_base_freq: Dict[str, Optional[int]] = {}
+
+
+def lexicon_words(lexicon: FinancialLexicon) -> Set[str]:
+    """词典中需要加入 jieba 的全部词（正面词、负面词和行业关键词）"""
+    words = set(lexicon.positive_words) | set(lexicon.negative_words)
+    for keywords in lexicon.industry_keywords.values():
+        words.update(keywords)
+    return words
+
+
+def register_lexicon_words(lexicon: FinancialLexicon):
+    """把金融词汇加入 jieba（每个词典版本只执行一次，会触发 jieba 词库加载）"""
+    if lexicon.version in _registered_versions:
+        return
+    with _register_lock:
+        if lexicon.version in _registered_versions:
+            return
+        jieba.dt.check_initialized()
+        for word in lexicon_words(lexicon):
+            if word not in _base_freq:
+                _base_freq[word] = jieba.dt.FREQ.get(word) or None
+            jieba.add_word(word)
+        _registered_versions.add(lexicon.version)
+
+
+def switch_lexicon_words(old_lexicons: Iterable[FinancialLexicon], lexicon: FinancialLexicon):
+    """
+    热更新时切换 jieba 中的金融词汇：先移除旧词典有、新词典没有的词，再加入新词典
+    移除的词恢复为默认词库中的词频（不在默认词库中时删除），分词结果与直接加载新词典的进程相同；
+    使用预构建 jieba 词典启动的进程不知道默认词频，移除的词一律删除
+    """
+    removed = set()
+    for old in old_lexicons:
+        if old.version != lexicon.version:
+            removed.update(lexicon_words(old))
+    removed -= lexicon_words(lexicon)
+    if removed:
+        with _register_lock:
+            for word in removed:
+                freq = _base_freq.pop(word, None)
+                if freq:
+                    jieba.add_word(word, freq)
+                else:
+                    jieba.del_word(word)
+            # 其他版本的词可能已被移除，之后再切换回去时需要重新加入
+            _registered_versions.clear()
+    register_lexicon_words(lexicon)
+
+
+def build_jieba_dictionary(lexicon: FinancialLexicon, path: str):
+    """生成已合并金融词汇的 jieba 词典缓存文件"""
+    register_lexicon_words(lexicon)
+    payload = {
+        "jieba_version": jieba.__version__,
+        "lexicon_version": lexicon.version,
+        "freq": jieba.dt.FREQ,
+        "total": jieba.dt.total,
+    }
+    with open(path, "wb") as f:
+        marshal.dump(payload, f)
+
+
+def load_jieba_dictionary(lexicon: FinancialLexicon, path: str) -> bool:
+    """
+    加载预构建的 jieba 词典，跳过默认词库加载和逐词 add_word
+    文件不存在或版本不匹配时返回 False（调用方退回默认加载方式）
+    """
+    try:
+        with open(path, "rb") as f:
+            gc.disable()
+            try:
+                payload = marshal.load(f)
+            finally:
+                gc.enable()
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        print(f"Prebuilt jieba dictionary unavailable: {e}")
+        return False
+
+    if payload.get("jieba_version") != jieba.__version__ or payload.get("lexicon_version") != lexicon.version:
+        print("Prebuilt jieba dictionary is stale, falling back to default loading")
+        return False
+
+    with jieba.dt.lock:
+        jieba.dt.FREQ = payload["freq"]
+        jieba.dt.total = payload["total"]
+        jieba.dt.initialized = True
+    # 预构建词典中已合并词典词，默认词频未知
+    _base_freq.update(dict.fromkeys(lexicon_words(lexicon)))
+    _registered_versions.add(lexicon.version)
+    return True
+
+
+class WarmupState:
+    """启动状态：booted 表示进程已可响应请求，warm 表示模型已加载并预热"""
+
+    def __init__(self):
+        self.booted_at = time.time()
+        self.warm = False
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "status": "ready" if self.warm else ("failed" if self.error else "warming"),
+            "booted": True,
+            "warm": self.warm,
+            "uptime_seconds": round(time.time() - self.booted_at, 3),
+            "timings": {k: round(v, 3) for k, v in self.timings.items()},
+            "error": self.error,
+        }
+
+
+def warm_up(analyzer, state: WarmupState, jieba_dict_path: Optional[str] = None) -> WarmupState:
+    """加载 jieba 词典和向量化 SnowNLP 模型，并用一条样例新闻跑通完整分析流程"""
+    try:
+        start = time.perf_counter()
+        if not (jieba_dict_path and load_jieba_dictionary(analyzer.lexicon, jieba_dict_path)):
+            jieba.initialize()
+            register_lexicon_words(analyzer.lexicon)
+        state.timings["jieba"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        default_model()
+        state.timings["snownlp"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyzer.score_news_item({'title': '预热', 'content': '科技股大涨，芯片板块涨停，市场情绪回暖'})
+        state.timings["sample"] = time.perf_counter() - start
+
+        state.warm = True
+    except Exception as e:
+        state.error = str(e)
+        print(f"Warm-up failed: {e}")
+    return state
+
+
+if __name__ == "__main__":
+    # 用法: python -m analyzer.warmup build-jieba <输出路径>
+    if len(sys.argv) != 3 or sys.argv[1] != "build-jieba":
+        print("usage: python -m analyzer.warmup build-jieba <path>")
+        sys.exit(1)
+    from analyzer.financial_lexicon import financial_lexicon
+
+    build_jieba_dictionary(financial_lexicon, sys.argv[2])
+    print(f"jieba dictionary written to {sys.argv[2]} (lexicon {financial_lexicon.version})")
@@ -0,0 +1,273 @@
+"""
+传输格式模块 - 分析接口的内容协商
+
+请求体: Content-Type 为 application/msgpack 时转成 JSON 交给 FastAPI 解析；Content-Encoding: gzip 时边接收边解压
+响应体: Accept 优先 MessagePack 时直接按 MessagePack 编码（不经过 JSON）；JSON 有 orjson 时用 orjson 编码；
+        Accept-Encoding 含 gzip 且响应体不小于 minimum_size 时压缩，流式响应逐块 Z_SYNC_FLUSH，保持逐行输出；
+        压缩后的响应与原响应体字节不同，强 ETag 改为弱 ETag（If-None-Match 按弱比较，仍可返回 304）
+"""
+
+import gzip
+import json
+import zlib
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+GZIP_ENCODINGS = ("gzip", "x-gzip")
+
+# 当前请求协商出的响应格式（由中间件设置，FastJSONResponse 渲染时读取）
+_response_format: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def dumps_json(content: Any) -> bytes:
+    """紧凑 JSON（UTF-8，不转义中文）；有 orjson 时用 orjson"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _media_type(value: Optional[str]) -> str:
+    return (value or "").split(";", 1)[0].strip().lower()
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    根据 Accept 选择响应格式：MessagePack 的 q 值严格高于 JSON 时返回 MSGPACK，否则返回 JSON
+    （通配符算作 JSON；没有安装 msgpack 时总是 JSON）
+    """
+    if not accept or not MSGPACK_AVAILABLE:
+        return JSON
+    json_q = msgpack_q = 0.0
+    for item in accept.split(","):
+        media_type, _, params = item.partition(";")
+        media_type = media_type.strip().lower()
+        q = _quality(params)
+        if media_type in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in (JSON, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return MSGPACK if msgpack_q > json_q else JSON
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip().lower() in GZIP_ENCODINGS + ("*",) and _quality(params) > 0:
+            return True
+    return False
+
+
+class FastJSONResponse(JSONResponse):
+    """应用默认响应类：按协商结果输出 MessagePack 或 JSON"""
+
+    def __init__(self, content: Any, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        if _response_format.get() == MSGPACK:
+            # init_headers 在 render 之后执行，这里改写的 media_type 会写入 Content-Type
+            self.media_type = MSGPACK
+            return msgpack.packb(content, use_bin_type=True)
+        return dumps_json(content)
+
+
+class _GzipRequestBody:
+    """
+    边接收边解压 gzip 请求体；解压后超过 max_size 时返回 413（防止压缩炸弹），数据损坏时返回 400
+    （HTTPException 在 FastAPI 读取请求体时抛出，原样成为错误响应）
+    """
+
+    def __init__(self, receive, max_size: int):
+        self._receive = receive
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._max_size = max_size
+        self._size = 0
+
+    async def __call__(self):
+        message = await self._receive()
+        if message["type"] != "http.request":
+            return message
+        more_body = message.get("more_body", False)
+        try:
+            body = self._decompressor.decompress(message.get("body", b""), self._max_size - self._size + 1)
+            if not more_body:
+                body += self._decompressor.flush()
+        except zlib.error as e:
+            raise HTTPException(400, f"Invalid gzip request body: {e}")
+        if not more_body and not self._decompressor.eof:
+            raise HTTPException(400, "Truncated gzip request body")
+        self._size += len(body)
+        if self._size > self._max_size or self._decompressor.unconsumed_tail:
+            raise HTTPException(413, "Decompressed request body too large")
+        return {"type": "http.request", "body": body, "more_body": more_body}
+
+
+async def _read_body(receive, max_size: int) -> bytes:
+    """读取完整请求体；累计超过 max_size 时立即返回 413，不再继续接收"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(body: bytes):
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return receive
+
+
+class _GzipResponder:
+    """包装 send：首个响应体消息到达后决定是否压缩（压缩时强 ETag 改为弱 ETag）"""
+
+    def __init__(self, send, minimum_size: int, level: int):
+        self._send = send
+        self._minimum_size = minimum_size
+        self._level = level
+        self._start = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            headers = Headers(raw=self._start["headers"])
+            if ("content-encoding" in headers or self._start["status"] in (204, 304)
+                    or (not more_body and len(body) < self._minimum_size)):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            headers = MutableHeaders(raw=self._start["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            if not more_body:
+                body = gzip.compress(body, self._level)
+                headers["Content-Length"] = str(len(body))
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            self._compressor = zlib.compressobj(self._level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            await self._send(self._start)
+
+        data = self._compressor.compress(body)
+        data += self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class WireFormatMiddleware:
+    """
+    请求 / 响应格式转换中间件（纯 ASGI，不缓冲流式响应）
+    max_body_size: gzip 请求体解压后、MessagePack 请求体的字节上限，超过时返回 413
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, compress_level: int = 6,
+                 max_body_size: int = 64 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compress_level = compress_level
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        rewritten = MutableHeaders(scope=scope)
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        if encoding in GZIP_ENCODINGS:
+            receive = _GzipRequestBody(receive, self.max_body_size)
+            del rewritten["Content-Encoding"]
+            if "content-length" in rewritten:
+                del rewritten["Content-Length"]
+        elif encoding not in ("", "identity"):
+            await PlainTextResponse(f"Unsupported Content-Encoding: {encoding}", 415)(scope, receive, send)
+            return
+
+        if _media_type(headers.get("content-type")) in MSGPACK_TYPES:
+            if not MSGPACK_AVAILABLE:
+                await PlainTextResponse("MessagePack is not available", 415)(scope, receive, send)
+                return
+            try:
+                body = await _read_body(receive, self.max_body_size)
+                try:
+                    body = dumps_json(msgpack.unpackb(body, raw=False))
+                except (ValueError, TypeError, msgpack.UnpackException) as e:
+                    raise HTTPException(400, f"Invalid MessagePack body: {e}")
+            except HTTPException as e:
+                await PlainTextResponse(e.detail, e.status_code)(scope, receive, send)
+                return
+            receive = _replay(body)
+            rewritten["Content-Type"] = JSON
+            rewritten["Content-Length"] = str(len(body))
+
+        if accepts_gzip(headers.get("accept-encoding")):
+            send = _GzipResponder(send, self.minimum_size, self.compress_level)
+        token = _response_format.set(negotiate(headers.get("accept")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _response_format.reset(token)
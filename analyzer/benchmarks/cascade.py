@@ -0,0 +1,97 @@
+"""
+级联打分评估：不同阈值下跳过 SnowNLP 的比例、耗时，以及与完整打分相比的误差
+
+用法（在 analyzer 目录下）:
+    python -m benchmarks.cascade                                       # 默认 500 篇、每篇 8 句
+    python -m benchmarks.cascade --min-keywords 4 6 10 --min-confidences 0.1 0.3 --fallback 0.85
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional, Sequence
+
+from analyzer.cascade import LexiconCascade
+from analyzer.sentiment import SentimentAnalyzer
+from benchmarks.corpus import NewsCorpusGenerator
+
+
+def score_all(analyzer: SentimentAnalyzer, news: List[dict]) -> Dict[str, object]:
+    """逐篇打分（与批量接口相同的路径），记录耗时、分数、标签、SnowNLP 分数和是否只用词典打分"""
+    start = time.perf_counter()
+    scored = analyzer.score_news_items(news, keywords=False)
+    seconds = time.perf_counter() - start
+    details = [detail for detail, _ in scored]
+    return {
+        'seconds': seconds,
+        'scores': [final_score for _, final_score in scored],
+        'labels': [detail['sentiment_label'] for detail in details],
+        'snownlp': [detail['snownlp_score'] for detail in details],
+        'lexicon_only': [detail.get('scoring_path') == 'lexicon' for detail in details],
+    }
+
+
+def evaluate(news: List[dict], min_keywords: Sequence[int], min_confidences: Sequence[float],
+             fallback: float = 0.5) -> List[dict]:
+    """
+    先完整打分作为参照，再按每个 (min_keywords, min_confidence) 组合级联打分
+    误差为组合分数（未取整）与完整打分之差的绝对值；skipped_snownlp 为被跳过文档在完整打分中的 SnowNLP 均值，
+    可作为 fallback 的参考取值
+    """
+    reference_analyzer = SentimentAnalyzer()
+    # 预热：加载模型、填充 jieba 缓存
+    reference_analyzer.score_news_items(news[:5])
+    reference = score_all(reference_analyzer, news)
+
+    rows = [{'min_keywords': 'off', 'min_confidence': '-', 'seconds': reference['seconds'], 'speedup': 1.0,
+             'skipped': 0.0, 'mae': 0.0, 'max_error': 0.0, 'label_agreement': 1.0, 'skipped_snownlp': None}]
+    for keywords in min_keywords:
+        for confidence in min_confidences:
+            cascade = LexiconCascade(keywords, min_confidence=confidence, fallback=fallback)
+            result = score_all(SentimentAnalyzer(lexicon=reference_analyzer.lexicon, cascade=cascade), news)
+            errors = [abs(a - b) for a, b in zip(result['scores'], reference['scores'])]
+            skipped = [full for full, lexicon_only in zip(reference['snownlp'], result['lexicon_only']) if lexicon_only]
+            rows.append({
+                'min_keywords': keywords,
+                'min_confidence': confidence,
+                'seconds': result['seconds'],
+                'speedup': reference['seconds'] / result['seconds'],
+                'skipped': len(skipped) / len(news),
+                'mae': statistics.mean(errors),
+                'max_error': max(errors),
+                'label_agreement': sum(a == b for a, b in zip(result['labels'], reference['labels'])) / len(news),
+                'skipped_snownlp': statistics.mean(skipped) if skipped else None,
+            })
+    return rows
+
+
+def format_rows(rows: List[dict]) -> str:
+    lines = [f"{'min kw':>6} {'conf':>5} {'ms':>9} {'speedup':>8} {'skipped':>8} {'mae':>7} {'max err':>8} "
+             f"{'labels':>7} {'skip snow':>9}"]
+    for r in rows:
+        confidence = r['min_confidence'] if isinstance(r['min_confidence'], str) else f"{r['min_confidence']:g}"
+        snownlp = '-' if r['skipped_snownlp'] is None else f"{r['skipped_snownlp']:.3f}"
+        lines.append(f"{r['min_keywords']:>6} {confidence:>5} {r['seconds'] * 1000:9.1f} {r['speedup']:7.2f}x "
+                     f"{r['skipped']:7.1%} {r['mae']:7.4f} {r['max_error']:8.4f} {r['label_agreement']:6.1%} "
+                     f"{snownlp:>9}")
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="级联打分评估")
+    parser.add_argument("--count", type=int, default=500, help="新闻篇数")
+    parser.add_argument("--sentences", type=int, default=8, help="每篇正文句数")
+    parser.add_argument("--min-keywords", type=int, nargs="+", default=[4, 6, 10], help="min_keywords 取值")
+    parser.add_argument("--min-confidences", type=float, nargs="+", default=[0.1, 0.2, 0.4],
+                        help="min_confidence 取值")
+    parser.add_argument("--fallback", type=float, default=0.5, help="跳过 SnowNLP 时代替其分数的取值")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    news = NewsCorpusGenerator(seed=args.seed).news(args.count, args.sentences)
+    rows = evaluate(news, args.min_keywords, args.min_confidences, args.fallback)
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main_cli()
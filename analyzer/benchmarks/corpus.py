@@ -0,0 +1,113 @@
+"""
+合成金融新闻语料：用 FinancialLexicon 的词表按句式模板拼出中文财经新闻
+同一 seed 与参数总是生成完全相同的语料，用于可复现的性能测试
+
+用法（在 analyzer 目录下）:
+    python -m benchmarks.corpus --count 5 --sentences 8
+"""
+
+import argparse
+import json
+import random
+from typing import List, Optional
+
+from analyzer.financial_lexicon import FinancialLexicon, financial_lexicon
+
+
+# 不含词典词的填充短语，用于控制词典词密度
+FILLERS = (
+    "据悉", "记者了解到", "业内人士表示", "截至发稿", "数据显示", "从盘面上看",
+    "分析人士指出", "今日早盘", "午后", "尾盘阶段", "市场参与者认为", "有消息称",
+)
+
+# 句式模板：{subject} 为指数或行业词，{event} 为情感词，{modifier} 为程度词，{filler} 为填充短语
+TEMPLATES = (
+    "{filler}，{subject}{modifier}{event}",
+    "{subject}板块{event}，{filler}",
+    "{filler}，受{subject}带动，市场{modifier}{event}",
+    "{subject}{event}，成交额较前一交易日{modifier}变化",
+    "{filler}，{subject}相关个股{event}",
+)
+
+MARKETS = ("A股", "港股", "美股")
+
+
+class NewsCorpusGenerator:
+    """合成新闻生成器"""
+
+    def __init__(self, lexicon: Optional[FinancialLexicon] = None, seed: int = 42):
+        lexicon = lexicon or financial_lexicon
+        self.seed = seed
+        # 词表按插入顺序取出并排序，保证不同进程、不同 Python 版本结果一致
+        self.positive = sorted(lexicon.positive_words)
+        self.negative = sorted(lexicon.negative_words)
+        self.neutral = sorted(lexicon.neutral_words)
+        self.modifiers = sorted(w for w, effect in lexicon.sentiment_modifiers.items() if effect != -1.0)
+        self.subjects = sorted(lexicon.market_indicators)
+        self.subjects += sorted(kw for keywords in lexicon.industry_keywords.values() for kw in keywords)
+
+    def sentence(self, rng: random.Random, bias: float) -> str:
+        """生成一句话；bias 为选用正面情感词的概率"""
+        roll = rng.random()
+        if roll < 0.15:
+            event = rng.choice(self.neutral)
+        elif roll < 0.15 + 0.85 * bias:
+            event = rng.choice(self.positive)
+        else:
+            event = rng.choice(self.negative)
+        return rng.choice(TEMPLATES).format(
+            filler=rng.choice(FILLERS),
+            subject=rng.choice(self.subjects),
+            modifier=rng.choice(self.modifiers) if rng.random() < 0.3 else "",
+            event=event,
+        )
+
+    def article(self, rng: random.Random, index: int, sentences: int) -> dict:
+        """生成一篇新闻（标题 + 正文 + 来源信息）"""
+        bias = rng.random()
+        title = self.sentence(rng, bias).split("，")[-1]
+        content = "。".join(self.sentence(rng, bias) for _ in range(sentences)) + "。"
+        return {
+            'title': f"{title}（{index}）",
+            'content': content,
+            'source': rng.choice(("财联社", "证券时报", "上海证券报", "新浪财经")),
+            'url': f"https://news.example.com/{self.seed}/{index}",
+            'published_at': f"2024-01-02T{9 + index % 7:02d}:{index % 60:02d}:00",
+        }
+
+    def news(self, count: int, sentences: int = 8) -> List[dict]:
+        """生成 count 篇互不相同的新闻，每篇正文 sentences 句"""
+        rng = random.Random(self.seed)
+        return [self.article(rng, i, sentences) for i in range(count)]
+
+    def stocks(self, count: int) -> List[dict]:
+        """生成 count 只股票的行情（涨跌幅近似正态分布）"""
+        rng = random.Random(self.seed + 1)
+        return [
+            {'symbol': f"S{i:05d}", 'market': MARKETS[i % len(MARKETS)], 'price': round(rng.uniform(5, 200), 2),
+             'change_percent': round(rng.gauss(0.2, 2.0), 2)}
+            for i in range(count)
+        ]
+
+    def texts(self, count: int, sentences: int = 8) -> List[str]:
+        """只取标题 + 正文的纯文本"""
+        return [f"{news['title']} {news['content']}" for news in self.news(count, sentences)]
+
+
+def generate_news(count: int, sentences: int = 8, seed: int = 42) -> List[dict]:
+    """生成合成新闻（默认词典）"""
+    return NewsCorpusGenerator(seed=seed).news(count, sentences)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="生成合成金融新闻（NDJSON 输出）")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--sentences", type=int, default=8, help="每篇正文句数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for news in generate_news(args.count, args.sentences, args.seed):
+        print(json.dumps(news, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_cli()
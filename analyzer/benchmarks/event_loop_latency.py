@@ -0,0 +1,120 @@
+"""
+事件循环响应性测量：大批量情感分析进行时，小请求的延迟分布
+
+用法（在 analyzer 目录下）:
+    python -m benchmarks.event_loop_latency --batch-size 400 --modes inline thread process --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+import main
+from analyzer import tasks
+from analyzer.executor import CPUExecutor
+from analyzer.financial_lexicon import financial_lexicon
+
+
+def make_news(count: int, seed: int = 42) -> List[dict]:
+    """生成互不重复的新闻，避免命中结果缓存"""
+    rng = random.Random(seed)
+    vocabulary = list(financial_lexicon.positive_words) + list(financial_lexicon.negative_words)
+    news = []
+    for i in range(count):
+        words = rng.choices(vocabulary, k=40)
+        news.append({'title': f"第{i}条快讯{words[0]}", 'content': "，".join(words)})
+    return news
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float,
+                path: str) -> List[float]:
+    """
+    按固定节拍发送小请求，记录延迟（毫秒）
+    延迟从计划发送时刻算起，事件循环被阻塞期间错过的发送时刻也会计入
+    """
+    latencies = []
+    origin = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        scheduled = origin + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await client.get(path, params={"text": f"市场小幅上涨{i}"})
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+        i = max(i + 1, int((time.perf_counter() - origin) / interval))
+    return latencies
+
+
+async def measure(mode: str, workers: int, path: str, batch: List[dict], interval: float,
+                  duration: float) -> Dict[str, float]:
+    """在指定执行器模式下测量空载和大批量期间的小请求延迟"""
+    main.cpu_executor = CPUExecutor(kind=mode, max_workers=workers, initializer=tasks.init_worker, initargs=(None,))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://analyzer", timeout=600) as client:
+        await client.get("/analyze/single", params={"text": "预热"})
+
+        stop = asyncio.Event()
+        idle_task = asyncio.create_task(probe(client, stop, interval, path))
+        await asyncio.sleep(duration)
+        stop.set()
+        idle = await idle_task
+
+        stop = asyncio.Event()
+        busy_task = asyncio.create_task(probe(client, stop, interval, path))
+        await asyncio.sleep(interval * 2)
+        batch_start = time.perf_counter()
+        response = await client.post("/analyze/sentiment", json=batch)
+        batch_seconds = time.perf_counter() - batch_start
+        stop.set()
+        busy = await busy_task
+        response.raise_for_status()
+
+    main.cpu_executor.shutdown()
+    return {
+        "idle_p50": statistics.median(idle),
+        "idle_p99": percentile(idle, 0.99),
+        "busy_p50": statistics.median(busy),
+        "busy_p99": percentile(busy, 0.99),
+        "busy_max": max(busy),
+        "busy_requests": len(busy),
+        "batch_seconds": batch_seconds,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="测量大批量分析期间小请求的延迟")
+    parser.add_argument("--batch-size", type=int, default=400)
+    parser.add_argument("--interval", type=float, default=0.01, help="小请求间隔（秒）")
+    parser.add_argument("--duration", type=float, default=1.0, help="空载测量时长（秒）")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--workers", type=int, default=4, help="执行器工作线程 / 进程数")
+    parser.add_argument("--paths", nargs="+", default=["/health", "/analyze/single"], help="小请求路径")
+    args = parser.parse_args()
+
+    # 关闭结果缓存和批量进程池，只比较执行器本身的影响
+    main.sentiment_analyzer.result_cache = None
+    main.batch_engine.workers = 1
+    batch = make_news(args.batch_size)
+
+    print(f"{'path':<16} {'mode':<8} {'idle p50':>9} {'idle p99':>9} {'busy p50':>9} {'busy p99':>9} "
+          f"{'busy max':>9} {'n':>5} {'batch s':>8}")
+    for path in args.paths:
+        for mode in args.modes:
+            r = asyncio.run(measure(mode, args.workers, path, batch, args.interval, args.duration))
+            print(f"{path:<16} {mode:<8} {r['idle_p50']:9.2f} {r['idle_p99']:9.2f} {r['busy_p50']:9.2f} "
+                  f"{r['busy_p99']:9.2f} {r['busy_max']:9.2f} {r['busy_requests']:5d} {r['batch_seconds']:8.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
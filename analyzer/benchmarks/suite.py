@@ -0,0 +1,218 @@
+"""
+分析器吞吐量基准：在合成语料上测量各分析步骤每秒处理的条数
+
+用法（在 analyzer 目录下）:
+    python -m benchmarks.suite                               # 运行并打印结果
+    python -m benchmarks.suite --save                        # 运行并保存为基线
+    python -m benchmarks.suite --check --threshold 0.15      # 与基线比较，吞吐下降超过 15% 时退出码为 1
+    python -m benchmarks.suite --cases clean_text extract_keywords --count 1000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pydantic import TypeAdapter
+
+from analyzer import wire
+from analyzer.advisor import InvestmentAdvisor
+from analyzer.models import SentimentAnalysisResult
+from analyzer.sentiment import SentimentAnalyzer
+from benchmarks.corpus import NewsCorpusGenerator
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class BenchmarkCase:
+    """一个基准用例：setup 准备输入，run 处理全部输入，items 为每轮处理的条数"""
+
+    def __init__(self, name: str, setup: Callable[[], object], run: Callable[[object], object],
+                 items: Callable[[object], int]):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.items = items
+
+
+def build_cases(count: int = 200, sentences: int = 8, stocks: int = 5000, seed: int = 42) -> Dict[str, BenchmarkCase]:
+    """
+    构建所有用例
+    情感分析器不带结果缓存，每轮都完整计算；generate_advice 输入为行式 List[dict]
+    传输格式用例（decode_* / validate_* / encode_* / gzip_*）按新闻条数计，分别对应 FastAPI 解析请求体、
+    校验 List[dict] 参数、按 response_model 校验并转换结果、编码响应体的开销
+    """
+    generator = NewsCorpusGenerator(seed=seed)
+    analyzer = SentimentAnalyzer()
+    advisor = InvestmentAdvisor()
+    news = lambda: generator.news(count, sentences)
+    texts = lambda: generator.texts(count, sentences)
+    html = lambda: [f"<p>{text}</p>\n<br/>  <span>【快讯】</span>" for text in texts()]
+    sentiment_result = {'overall_sentiment': 0.55}
+    news_adapter = TypeAdapter(List[dict])
+    result_adapter = TypeAdapter(SentimentAnalysisResult)
+    request_body = lambda: json.dumps(news(), ensure_ascii=False).encode("utf-8")
+    result = lambda: analyzer.analyze_news_sentiment(news()).model_dump()
+    result_items = lambda data: len(data['details'])
+
+    cases = [
+        BenchmarkCase("clean_text", html, lambda data: [analyzer.clean_text(t) for t in data], len),
+        BenchmarkCase("analyze_text_sentiment", texts,
+                      lambda data: [analyzer.lexicon.analyze_text_sentiment(t) for t in data], len),
+        BenchmarkCase("extract_keywords", texts, lambda data: [analyzer.extract_keywords(t) for t in data], len),
+        BenchmarkCase("analyze_news_sentiment", news, analyzer.analyze_news_sentiment, len),
+        BenchmarkCase("analyze_news_scores_only", news,
+                      lambda data: analyzer.analyze_news_sentiment(data, fields=('title', 'sentiment')), len),
+        BenchmarkCase("generate_advice", lambda: generator.stocks(stocks),
+                      lambda data: advisor.generate_advice(data, sentiment_result), len),
+        BenchmarkCase("decode_news_json", request_body, json.loads, lambda data: len(json.loads(data))),
+        BenchmarkCase("validate_news_list", news, news_adapter.validate_python, len),
+        BenchmarkCase("serialize_result_model", result,
+                      lambda data: result_adapter.dump_python(result_adapter.validate_python(data), mode="json"),
+                      result_items),
+        BenchmarkCase("encode_result_json", result,
+                      lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                      result_items),
+        BenchmarkCase("encode_result_fast", result, wire.dumps_json, result_items),
+        BenchmarkCase("gzip_result", lambda: wire.dumps_json(result()), lambda data: gzip.compress(data, 6),
+                      lambda data: len(json.loads(data)['details'])),
+    ]
+    if wire.MSGPACK_AVAILABLE:
+        cases.append(BenchmarkCase("encode_result_msgpack", result, wire.msgpack.packb, result_items))
+    return {case.name: case for case in cases}
+
+
+def measure(case: BenchmarkCase, repeat: int = 3, warmup: int = 1) -> dict:
+    """
+    运行一个用例：先预热 warmup 轮（加载模型、填充 jieba 缓存），再计时 repeat 轮
+    吞吐量取最快一轮（受系统噪声影响最小），同时记录中位数
+    """
+    data = case.setup()
+    items = case.items(data)
+    for _ in range(warmup):
+        case.run(data)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(data)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        'items': items,
+        'best_seconds': best,
+        'median_seconds': statistics.median(timings),
+        'throughput': items / best if best > 0 else float('inf'),
+    }
+
+
+def run_suite(cases: Dict[str, BenchmarkCase], names: Optional[Sequence[str]] = None, repeat: int = 3,
+              warmup: int = 1) -> Dict[str, dict]:
+    """依次运行指定用例（默认全部）"""
+    return {name: measure(cases[name], repeat, warmup) for name in (names or list(cases))}
+
+
+def environment() -> dict:
+    """记录运行环境，便于判断基线是否可比"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_baseline(results: Dict[str, dict], path: str, params: dict):
+    """保存基线（已有文件中其他用例的结果保留）"""
+    baseline = load_baseline(path) or {'results': {}}
+    baseline['results'].update(results)
+    baseline['params'] = params
+    baseline['environment'] = environment()
+    baseline['saved_at'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    """读取基线，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[dict]:
+    """找出吞吐量比基线下降超过 threshold（比例）的用例；基线中没有的用例跳过"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        ratio = result['throughput'] / expected['throughput']
+        if ratio < 1 - threshold:
+            regressions.append({'name': name, 'baseline': expected['throughput'],
+                                'current': result['throughput'], 'ratio': ratio})
+    return regressions
+
+
+def format_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> str:
+    """结果表格（有基线时附带相对基线的比例）"""
+    lines = [f"{'case':<24} {'items':>6} {'best ms':>9} {'median ms':>10} {'items/s':>11} {'vs base':>8}"]
+    for name, r in results.items():
+        expected = (baseline or {}).get(name)
+        ratio = f"{r['throughput'] / expected['throughput']:7.2f}x" if expected else f"{'-':>8}"
+        lines.append(f"{name:<24} {r['items']:6d} {r['best_seconds'] * 1000:9.2f} "
+                     f"{r['median_seconds'] * 1000:10.2f} {r['throughput']:11.1f} {ratio}")
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="分析器吞吐量基准")
+    parser.add_argument("--cases", nargs="+", help="只运行指定用例")
+    parser.add_argument("--count", type=int, default=200, help="新闻 / 文本条数")
+    parser.add_argument("--sentences", type=int, default=8, help="每篇正文句数")
+    parser.add_argument("--stocks", type=int, default=5000, help="generate_advice 的股票数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--check", action="store_true", help="与基线比较，有回退时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的吞吐下降比例")
+    args = parser.parse_args(argv)
+
+    params = {'count': args.count, 'sentences': args.sentences, 'stocks': args.stocks, 'seed': args.seed}
+    cases = build_cases(**params)
+    unknown = set(args.cases or []) - set(cases)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}; available: {', '.join(cases)}")
+
+    results = run_suite(cases, args.cases, args.repeat, args.warmup)
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline.get('params') != params:
+        print(f"warning: baseline params {baseline.get('params')} differ from {params}", file=sys.stderr)
+    print(format_results(results, baseline and baseline['results']))
+
+    if args.save:
+        save_baseline(results, args.baseline, params)
+        print(f"baseline saved to {args.baseline}")
+    if args.check:
+        if baseline is None:
+            print(f"no baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        regressions = find_regressions(results, baseline['results'], args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['name']}: {r['current']:.1f}/s vs baseline {r['baseline']:.1f}/s "
+                  f"({r['ratio']:.2f}x)", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
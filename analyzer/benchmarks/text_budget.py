@@ -0,0 +1,95 @@
+"""
+长文本打分预算评估：不同预算下的耗时、实际打分字符数，以及与整篇打分相比的误差
+
+用法（在 analyzer 目录下）:
+    python -m benchmarks.text_budget                                   # 默认 100 篇、每篇 400 句
+    python -m benchmarks.text_budget --count 50 --sentences 800 --budgets 1000 2000 4000 --tolerances 0.005 0.01
+"""
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional, Sequence
+
+from analyzer.budget import TextBudget
+from analyzer.sentiment import SentimentAnalyzer
+from benchmarks.corpus import NewsCorpusGenerator
+
+
+def score_all(analyzer: SentimentAnalyzer, news: List[dict]) -> Dict[str, object]:
+    """逐篇打分（与批量接口相同的路径），记录耗时、分数、标签和实际打分的字符数"""
+    start = time.perf_counter()
+    scored = analyzer.score_news_items(news, keywords=False)
+    seconds = time.perf_counter() - start
+    details = [detail for detail, _ in scored]
+    return {
+        'seconds': seconds,
+        'scores': [final_score for _, final_score in scored],
+        'labels': [detail['sentiment_label'] for detail in details],
+        'scored_chars': [detail.get('scored_chars') for detail in details],
+    }
+
+
+def evaluate(news: List[dict], budgets: Sequence[int], tolerances: Sequence[float], patience: int = 2,
+             lead_chars: int = 300, chunk_chars: int = 300) -> List[dict]:
+    """
+    先整篇打分作为参照，再按每个 (预算, 容差) 组合打分；容差 0 表示不提前停止、只按预算截断
+    误差为组合分数（未取整）与整篇打分之差的绝对值
+    """
+    reference_analyzer = SentimentAnalyzer()
+    # 预热：加载模型、填充 jieba 缓存
+    reference_analyzer.score_news_items(news[:5])
+    reference = score_all(reference_analyzer, news)
+    text_chars = [len(f"{n['title']} {reference_analyzer.clean_text(n['content'])}") for n in news]
+
+    rows = [{'budget': 'full', 'tolerance': '-', 'seconds': reference['seconds'], 'speedup': 1.0,
+             'scored_fraction': 1.0, 'mae': 0.0, 'max_error': 0.0, 'label_agreement': 1.0}]
+    for max_chars in budgets:
+        for tolerance in tolerances:
+            budget = TextBudget(max_chars, lead_chars=lead_chars, chunk_chars=chunk_chars, tolerance=tolerance,
+                                patience=patience if tolerance > 0 else 0)
+            result = score_all(SentimentAnalyzer(lexicon=reference_analyzer.lexicon, budget=budget), news)
+            errors = [abs(a - b) for a, b in zip(result['scores'], reference['scores'])]
+            scored = [s if s is not None else total for s, total in zip(result['scored_chars'], text_chars)]
+            rows.append({
+                'budget': max_chars,
+                'tolerance': tolerance,
+                'seconds': result['seconds'],
+                'speedup': reference['seconds'] / result['seconds'],
+                'scored_fraction': sum(scored) / sum(text_chars),
+                'mae': statistics.mean(errors),
+                'max_error': max(errors),
+                'label_agreement': sum(a == b for a, b in zip(result['labels'], reference['labels'])) / len(news),
+            })
+    return rows
+
+
+def format_rows(rows: List[dict]) -> str:
+    lines = [f"{'budget':>7} {'tol':>6} {'ms':>9} {'speedup':>8} {'scored':>7} {'mae':>7} {'max err':>8} {'labels':>7}"]
+    for r in rows:
+        tolerance = r['tolerance'] if isinstance(r['tolerance'], str) else f"{r['tolerance']:g}"
+        lines.append(f"{r['budget']:>7} {tolerance:>6} {r['seconds'] * 1000:9.1f} {r['speedup']:7.2f}x "
+                     f"{r['scored_fraction']:6.1%} {r['mae']:7.4f} {r['max_error']:8.4f} {r['label_agreement']:6.1%}")
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="长文本打分预算评估")
+    parser.add_argument("--count", type=int, default=100, help="新闻篇数")
+    parser.add_argument("--sentences", type=int, default=400, help="每篇正文句数（研报全文量级）")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[500, 1000, 2000, 4000], help="max_chars 取值")
+    parser.add_argument("--tolerances", type=float, nargs="+", default=[0, 0.005, 0.01, 0.02],
+                        help="提前停止容差，0 表示只截断")
+    parser.add_argument("--patience", type=int, default=2)
+    parser.add_argument("--lead-chars", type=int, default=300)
+    parser.add_argument("--chunk-chars", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    news = NewsCorpusGenerator(seed=args.seed).news(args.count, args.sentences)
+    rows = evaluate(news, args.budgets, args.tolerances, args.patience, args.lead_chars, args.chunk_chars)
+    print(format_rows(rows))
+
+
+if __name__ == "__main__":
+    main_cli()
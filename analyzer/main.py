@@ -1,14 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.requests import ClientDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 import uvicorn
 import os
 
-from analyzer.models import StockData, NewsData, DailySummary, SentimentAnalysisResult, InvestmentAdvice
-from analyzer.sentiment import SentimentAnalyzer
+from analyzer.models import (StockData, NewsData, DailySummary, SentimentAnalysisResult, ColumnarSentimentResult,
+                             InvestmentAdvice)
+from analyzer.sentiment import SentimentAnalyzer, parse_fields
 from analyzer.advisor import InvestmentAdvisor
+from analyzer.batch import BatchSentimentEngine
+from analyzer.cache import CacheManager, ArticleCache
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from analyzer.dedup import NearDuplicateDetector
+from analyzer.http_cache import ResponseCache
+from analyzer.wire import FastJSONResponse, WireFormatMiddleware
+from analyzer.executor import CPUExecutor
+from analyzer.indicators import IndicatorEngine
+from analyzer.aggregate import DailyAggregator, DayAggregate
+from analyzer.database import DatabaseBatchAnalyzer, create_db_engine
+from analyzer.jobs import HANDLERS as JOB_HANDLERS, JobQueue, SUCCEEDED, FAILED
+from analyzer import metrics, server, tasks
+from analyzer.warmup import WarmupState, warm_up
+from analyzer.lexicon_artifact import LexiconArtifactError, LexiconReloader, load_lexicon
+from analyzer.streaming import RequestStreamingResponse, StreamFormatError, iter_json_items, ndjson_line
 
 
 _DEFAULT_ENV_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
@@ -46,6 +70,57 @@ class Settings(BaseSettings):
     redis_url: str = Field(default_factory=_build_redis_url)
     host: str = "0.0.0.0"
     port: int = 8000
+    # 批量情感分析：进程数（默认 CPU 核数，<= 1 为串行）与分块大小
+    sentiment_workers: Optional[int] = None
+    sentiment_chunk_size: int = 200
+    # 逐条新闻结果缓存：进程内 LRU 容量与 Redis 过期时间（秒）
+    article_cache_size: int = 10000
+    article_cache_ttl: int = 86400
+    # CPU 密集任务执行器：thread / process / inline，及并发上限
+    executor_kind: str = "thread"
+    executor_workers: Optional[int] = None
+    executor_max_pending: Optional[int] = None
+    # 启动：预构建的 jieba 词典路径（python -m analyzer.warmup build-jieba 生成），以及是否在启动后预热模型
+    jieba_dict_path: Optional[str] = None
+    warmup_on_startup: bool = True
+    # 词典制品路径（python -m analyzer.lexicon_artifact compile 生成），为空时使用内置词典；
+    # 热更新轮询间隔（秒），<= 0 时只能通过 POST /lexicon/reload 手动触发
+    lexicon_path: Optional[str] = None
+    lexicon_reload_interval: float = 30.0
+    # 日内聚合：按发布时间加权的半衰期（小时，为空时不加权）与保留天数
+    daily_recency_half_life_hours: Optional[float] = None
+    daily_retention_days: int = 3
+    # 数据库批量分析：服务端游标每次读取的行数
+    db_chunk_size: int = 500
+    # 异步任务队列（工作进程由 python -m analyzer.jobs worker 启动，参数需与此一致）：
+    # 租约时长（秒）、最多执行次数、完成后状态和结果的保留时间（秒）
+    job_visibility_timeout: float = 300.0
+    job_max_attempts: int = 3
+    job_result_ttl: int = 86400
+    # GET /analyze/single 的响应缓存：进程内条目数，以及 Cache-Control 允许客户端直接复用的秒数（<= 0 时每次重新验证）
+    single_cache_size: int = 4096
+    single_cache_max_age: int = 60
+    # 传输格式：响应体不小于该字节数且客户端接受 gzip 时压缩；gzip / MessagePack 请求体解压或解码后的字节上限
+    gzip_minimum_size: int = 1024
+    max_request_body_size: int = 64 * 1024 * 1024
+    # 近似重复新闻检测：MinHash 估计的 Jaccard 相似度达到该阈值的新闻合并为一簇、只打分一次，<= 0 时关闭
+    dedup_threshold: float = 0.8
+    # 长文本打分预算：单篇最多打分的字符数（<= 0 时整篇打分）、先打分的导语长度、之后每块的长度，
+    # 以及提前停止条件（连续 patience 块组合分数变化都小于 tolerance）
+    text_budget_chars: int = 0
+    text_budget_lead_chars: int = 300
+    text_budget_chunk_chars: int = 300
+    text_budget_tolerance: float = 0.01
+    text_budget_patience: int = 2
+    # 词典优先的级联打分：词典命中不少于 cascade_min_keywords（<= 0 时关闭）且倾向强度不低于
+    # cascade_min_confidence 时不调用 SnowNLP，组合分数中 SnowNLP 的位置取 cascade_fallback
+    cascade_min_keywords: int = 0
+    cascade_min_confidence: float = 0.2
+    cascade_fallback: float = 0.5
+    # 进程内状态：日内累计量（/analyze/daily 增量模式、/analyze/daily/aggregate）和技术指标滚动状态
+    # （/indicators、/analyze/daily 的技术分析）只保存在当前进程；预加载多进程模式（--workers > 1）下
+    # 各工作进程的状态互不相通，必须设为 false：这些状态接口返回 503，/analyze/daily 按请求数据全量计算
+    in_process_state: bool = True
 
     class Config:
         # 统一默认读仓库根目录 .env（本地运行时）
@@ -54,7 +129,43 @@ class Settings(BaseSettings):
         extra = 'ignore'  # 忽略 .env 中未定义的字段
 
 
-app = FastAPI(title="Wealthy Speaker AI Analyzer API", version="1.0.0")
+settings = Settings()
+text_budget = TextBudget(
+    settings.text_budget_chars,
+    lead_chars=settings.text_budget_lead_chars,
+    chunk_chars=settings.text_budget_chunk_chars,
+    tolerance=settings.text_budget_tolerance,
+    patience=settings.text_budget_patience,
+) if settings.text_budget_chars > 0 else None
+cascade = LexiconCascade(
+    settings.cascade_min_keywords,
+    min_confidence=settings.cascade_min_confidence,
+    fallback=settings.cascade_fallback,
+) if settings.cascade_min_keywords > 0 else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动后在后台预热模型并开始轮询词典更新，退出时关闭执行器、批量进程池和数据库连接池"""
+    if lexicon_reloader is not None:
+        lexicon_reloader.start(settings.lexicon_reload_interval)
+    # 预加载模式下主进程已在 fork 前完成预热
+    if settings.warmup_on_startup and not warmup_state.warm:
+        loop = asyncio.get_running_loop()
+        app.state.warmup_task = loop.run_in_executor(
+            None, warm_up, sentiment_analyzer, warmup_state, settings.jieba_dict_path
+        )
+    yield
+    if lexicon_reloader is not None:
+        lexicon_reloader.stop()
+    cpu_executor.shutdown()
+    batch_engine.close()
+    db_analyzer.engine.dispose()
+
+
+# 默认响应按 Accept 输出 JSON（orjson）或 MessagePack
+app = FastAPI(title="Wealthy Speaker AI Analyzer API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -63,9 +174,84 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# gzip / MessagePack 请求体转换与响应压缩（最外层，CORS 头也在压缩前加上）
+app.add_middleware(
+    WireFormatMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    max_body_size=settings.max_request_body_size,
+)
 
-sentiment_analyzer = SentimentAnalyzer()
+article_cache = ArticleCache(
+    cache_manager=CacheManager(settings.redis_url),
+    max_entries=settings.article_cache_size,
+    ttl=settings.article_cache_ttl,
+)
+# /analyze/single 按规范化文本和词典版本缓存响应，看板轮询同一标题时直接返回缓存或 304
+single_cache = ResponseCache(settings.single_cache_size, settings.single_cache_max_age)
+warmup_state = WarmupState()
+sentiment_analyzer = SentimentAnalyzer(
+    result_cache=article_cache,
+    preload=False,
+    lexicon=load_lexicon(settings.lexicon_path) if settings.lexicon_path else None,
+    deduplicator=NearDuplicateDetector(settings.dedup_threshold) if settings.dedup_threshold > 0 else None,
+    budget=text_budget,
+    cascade=cascade,
+)
+lexicon_reloader = LexiconReloader(settings.lexicon_path, [sentiment_analyzer]) if settings.lexicon_path else None
 investment_advisor = InvestmentAdvisor()
+batch_engine = BatchSentimentEngine(
+    analyzer=sentiment_analyzer,
+    workers=settings.sentiment_workers,
+    chunk_size=settings.sentiment_chunk_size,
+)
+tasks.configure(batch_engine, investment_advisor)
+# 技术指标的滚动状态保存在 API 进程内（每次采集的行情经 /analyze/daily 或 /indicators/backfill 导入），
+# 不在多个工作进程间共享，见 Settings.in_process_state
+indicator_engine = IndicatorEngine()
+# 日内累计量同样保存在 API 进程内，/analyze/daily 只对当天新增的新闻打分
+daily_aggregator = DailyAggregator(
+    half_life_hours=settings.daily_recency_half_life_hours,
+    retention_days=settings.daily_retention_days,
+)
+# 按日期范围直接读库分析（数据库连接在首次请求时建立）
+db_analyzer = DatabaseBatchAnalyzer(
+    create_db_engine(settings.database_url),
+    batch_engine=batch_engine,
+    advisor=investment_advisor,
+    chunk_size=settings.db_chunk_size,
+)
+job_queue = JobQueue(
+    settings.redis_url,
+    visibility_timeout=settings.job_visibility_timeout,
+    max_attempts=settings.job_max_attempts,
+    result_ttl=settings.job_result_ttl,
+)
+cpu_executor = CPUExecutor(
+    kind=settings.executor_kind,
+    max_workers=settings.executor_workers,
+    max_pending=settings.executor_max_pending,
+    initializer=tasks.init_worker,
+    initargs=(settings.redis_url, settings.article_cache_size, settings.article_cache_ttl, settings.jieba_dict_path,
+              settings.lexicon_path, settings.lexicon_reload_interval, settings.dedup_threshold, text_budget,
+              cascade),
+)
+
+
+def preload_models():
+    """在当前进程中加载并预热模型（预加载多进程模式下由主进程在 fork 前调用）"""
+    warm_up(sentiment_analyzer, warmup_state, settings.jieba_dict_path)
+
+
+def prefork_conflicts() -> List[str]:
+    """启动多个工作进程前由预加载服务检查：返回会在各进程间不一致的功能（为空时可以多进程运行）"""
+    if settings.in_process_state:
+        return ["日内累计量和技术指标状态保存在进程内（设置 IN_PROCESS_STATE=false 关闭后再启动多个工作进程）"]
+    return []
+
+
+def _require_process_state():
+    if not settings.in_process_state:
+        raise HTTPException(status_code=503, detail="In-process state is disabled (IN_PROCESS_STATE=false)")
 
 
 @app.get("/")
@@ -78,36 +264,157 @@ async def health_check():
     return {"status": "healthy"}
 
 
-@app.post("/analyze/sentiment", response_model=SentimentAnalysisResult)
-async def analyze_sentiment(news_list: List[dict]):
-    """分析新闻情感"""
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus 指标：各分析阶段耗时、批量大小与结果缓存命中情况
+    只包含当前进程的计数；预加载多进程模式下每次抓取由任一工作进程响应，不是全部工作进程的合计
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/memory")
+async def memory_info():
+    """各进程内存占用（rss / pss / uss，字节）；预加载多进程模式下包含主进程和全部工作进程"""
+    return await asyncio.get_running_loop().run_in_executor(None, server.memory_report)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """就绪检查：模型加载并预热完成后返回 200，否则返回 503"""
+    return JSONResponse(warmup_state.to_dict(), status_code=200 if warmup_state.warm else 503)
+
+
+def _lexicon_info() -> dict:
+    lexicon = sentiment_analyzer.lexicon
+    return {
+        "version": lexicon.version,
+        "source": lexicon.source or "builtin",
+        "counts": {name: len(table) for name, table in lexicon.to_tables().items()},
+    }
+
+
+@app.get("/lexicon")
+async def lexicon_info():
+    """当前词典版本（结果缓存按此版本区分）"""
+    return _lexicon_info()
+
+
+@app.post("/lexicon/reload")
+async def reload_lexicon():
+    """立即从词典制品重新加载（进程池工作进程会在下一次轮询时跟进）"""
+    if lexicon_reloader is None:
+        raise HTTPException(status_code=400, detail="No lexicon artifact configured")
+    try:
+        reloaded = await asyncio.get_running_loop().run_in_executor(None, lexicon_reloader.reload, True)
+    except (OSError, LexiconArtifactError) as e:
+        raise HTTPException(status_code=500, detail=f"Lexicon reload failed: {e}")
+    return {"reloaded": reloaded, **_lexicon_info()}
+
+
+@app.post("/analyze/sentiment", response_model=Union[SentimentAnalysisResult, ColumnarSentimentResult])
+async def analyze_sentiment(news_list: List[dict], weighting: Literal["article", "cluster"] = "article",
+                            fields: Optional[str] = None, layout: Literal["rows", "columns"] = "rows"):
+    """
+    分析新闻情感
+    weighting=cluster 时近似重复的转载只按一篇计入 overall_sentiment
+    fields: 逗号分隔的明细字段（如 title,sentiment），不含 keywords 时跳过关键词提取
+    layout=columns 时明细按字段返回平行数组（ColumnarSentimentResult）
+    """
     if not news_list:
         raise HTTPException(status_code=400, detail="News list is empty")
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    result = sentiment_analyzer.analyze_news_sentiment(news_list)
+    result = await cpu_executor.run(tasks.analyze_sentiment, news_list, weighting, selected, layout)
     return result
 
 
+@app.post("/analyze/sentiment/stream")
+async def analyze_sentiment_stream(request: Request):
+    """
+    流式分析新闻情感
+    请求体为 JSON 数组或 NDJSON；每条新闻分析完成后立即输出一行 NDJSON 明细，
+    最后一行为汇总（type=summary），格式错误时输出 type=error 并结束
+    """
+    return RequestStreamingResponse(_sentiment_stream(request))
+
+
+async def _sentiment_stream(request: Request):
+    """边接收边打分，只保留汇总所需的累计值"""
+    total_sentiment = 0
+    scored = 0
+    index = 0
+    try:
+        async for batch in iter_json_items(request.stream()):
+            if not all(isinstance(news, dict) for news in batch):
+                raise StreamFormatError("Each item must be a JSON object")
+            for item in await cpu_executor.run(tasks.score_news, batch):
+                if item is not None:
+                    detail, final_score = item
+                    total_sentiment += final_score
+                    scored += 1
+                    yield ndjson_line({"type": "detail", "index": index, **detail})
+                index += 1
+    except StreamFormatError as e:
+        yield ndjson_line({"type": "error", "detail": str(e)})
+        return
+    except ClientDisconnect:
+        return
+
+    avg_sentiment = total_sentiment / scored if scored > 0 else 0.5
+    yield ndjson_line({
+        "type": "summary",
+        "overall_sentiment": round(avg_sentiment, 3),
+        "sentiment_label": sentiment_analyzer.get_sentiment_label(avg_sentiment),
+        "total": index,
+        "scored": scored,
+    })
+
+
 @app.post("/analyze/advice", response_model=InvestmentAdvice)
 async def generate_advice(stock_data: List[dict], sentiment_result: dict):
     """生成投资建议"""
     if not stock_data:
         raise HTTPException(status_code=400, detail="Stock data is empty")
 
-    advice = investment_advisor.generate_advice(stock_data, sentiment_result)
+    advice = await cpu_executor.run(tasks.generate_advice, stock_data, sentiment_result)
     return advice
 
 
+@app.post("/analyze/advice/markets", response_model=Dict[str, InvestmentAdvice])
+async def generate_market_advice(stock_data: List[dict], sentiment_result: dict):
+    """按市场（market 字段）分别生成投资建议"""
+    if not stock_data:
+        raise HTTPException(status_code=400, detail="Stock data is empty")
+
+    return await cpu_executor.run(tasks.generate_market_advice, stock_data, sentiment_result)
+
+
 @app.post("/analyze/daily", response_model=DailySummary)
-async def generate_daily_summary(stock_data: List[dict], news_data: List[dict]):
-    """生成每日财经总结"""
+async def generate_daily_summary(stock_data: List[dict], news_data: List[dict], day: Optional[date] = None,
+                                 full: bool = False):
+    """
+    生成每日财经总结
+    默认增量模式：只对当天尚未计入的新闻打分，情感、行业和涨跌幅统计取当天累计量；
+    full=true 或关闭进程内状态时按本次请求的全部数据重新计算（不更新累计量）
+    """
     if not stock_data and not news_data:
         raise HTTPException(status_code=400, detail="No data provided")
 
-    sentiment_result = sentiment_analyzer.analyze_news_sentiment(news_data)
-    advice = investment_advisor.generate_advice(stock_data, sentiment_result.dict())
-
-    from datetime import datetime
+    if full or not settings.in_process_state:
+        sentiment_result = (await cpu_executor.run(tasks.analyze_sentiment, news_data)).model_dump()
+        advice = await cpu_executor.run(tasks.generate_advice, stock_data, sentiment_result)
+    else:
+        fresh = daily_aggregator.new_articles(news_data, day)
+        scored = await cpu_executor.run(tasks.score_news, fresh) if fresh else []
+        aggregate = daily_aggregator.apply(fresh, scored, stock_data, day)
+        sentiment_result = _daily_sentiment(aggregate, scored)
+        stats = aggregate.market_stats() if aggregate.changes else stock_data
+        advice = await cpu_executor.run(tasks.generate_advice, stats, sentiment_result)
+    technical_analysis = await asyncio.get_running_loop().run_in_executor(None, _technical_analysis, stock_data)
 
     summary = DailySummary(
         id=1,
@@ -115,8 +422,8 @@ async def generate_daily_summary(stock_data: List[dict], news_data: List[dict]):
         market_overview=advice.market_outlook,
         key_news="基于最新财经新闻分析",
         investment_advice=f"{advice.risk_assessment}\n{chr(10).join(advice.action_suggestions)}",
-        technical_analysis=str([{'trend': '上涨' if s.get('change_percent', 0) > 0 else '下跌'} for s in stock_data]),
-        sentiment_analysis=sentiment_result.dict(),
+        technical_analysis=json.dumps(technical_analysis, ensure_ascii=False),
+        sentiment_analysis=json.dumps(sentiment_result, ensure_ascii=False),
         risk_level=advice.risk_assessment.split("：")[1] if "：" in advice.risk_assessment else "中等风险",
         created_at=datetime.now()
     )
@@ -124,19 +431,136 @@ async def generate_daily_summary(stock_data: List[dict], news_data: List[dict]):
     return summary
 
 
+def _daily_sentiment(aggregate: DayAggregate, scored: List[Optional[Tuple[dict, float]]]) -> dict:
+    """当天累计情感汇总，details 只包含本次新计入的新闻"""
+    result = aggregate.to_dict()
+    result['sentiment_label'] = sentiment_analyzer.get_sentiment_label(aggregate.overall_sentiment)
+    result['details'] = [detail for detail, _ in filter(None, scored)]
+    return result
+
+
+@app.get("/analyze/daily/aggregate")
+async def get_daily_aggregate(day: Optional[date] = None):
+    """当天（或指定日期）的累计情感与涨跌幅统计"""
+    _require_process_state()
+    aggregate = daily_aggregator.day(day)
+    stats = aggregate.market_stats()
+    return {
+        **_daily_sentiment(aggregate, []),
+        'market': {'count': stats.count, 'mean': float(stats.mean), 'std': float(stats.std),
+                   'up': stats.n_pos, 'down': stats.n_neg},
+    }
+
+
+def _technical_analysis(stock_data: List[dict]) -> List[dict]:
+    """导入本次行情并返回每只股票的涨跌趋势与技术指标（关闭进程内状态时只有涨跌趋势）"""
+    if settings.in_process_state:
+        indicator_engine.ingest(stock_data)
+    result = []
+    for s in stock_data:
+        snapshot = None
+        if settings.in_process_state and s.get('symbol'):
+            snapshot = indicator_engine.snapshot(s.get('symbol'))
+        result.append({
+            **(snapshot or {}),
+            'trend': '上涨' if s.get('change_percent', 0) > 0 else '下跌',
+        })
+    return result
+
+
+@app.post("/analyze/range")
+async def analyze_date_range(start: date, end: date):
+    """直接从数据库读取 [start, end] 内的新闻和行情并汇总（分块读取，不返回逐条明细）"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be earlier than start")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, db_analyzer.analyze_range, start, end)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e.__class__.__name__}")
+
+
+@app.post("/news/scores/write-back")
+async def write_back_scores(start: date, end: date):
+    """为 [start, end] 内尚未用当前词典版本打分的新闻打分，并把分数和关键词批量写回 news_data"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be earlier than start")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, db_analyzer.write_back, start, end)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e.__class__.__name__}")
+
+
+@app.post("/indicators/backfill")
+async def backfill_indicators(history: List[dict]):
+    """用历史行情（StockData 列表）回填技术指标状态"""
+    _require_process_state()
+    applied = await asyncio.get_running_loop().run_in_executor(None, indicator_engine.ingest, history)
+    return {"applied": applied, "symbols": len(indicator_engine.symbols)}
+
+
+@app.get("/indicators/{symbol}")
+async def get_indicators(symbol: str):
+    """某只股票的当前技术指标"""
+    _require_process_state()
+    snapshot = indicator_engine.snapshot(symbol)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Symbol not tracked")
+    return snapshot
+
+
+@app.post("/jobs/{kind}", status_code=202)
+async def submit_job(kind: str, payload: Any = Body(...)):
+    """
+    提交异步分析任务，立即返回任务 ID
+    kind: sentiment（新闻列表）、daily（{stock_data, news_data}）、range（{start, end}）
+    """
+    if kind not in JOB_HANDLERS:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind: {kind}")
+    try:
+        job_id = await asyncio.get_running_loop().run_in_executor(None, job_queue.submit, kind, payload)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job queue unavailable: {e.__class__.__name__}")
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """任务状态与进度"""
+    status = await asyncio.get_running_loop().run_in_executor(None, job_queue.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """任务结果：完成时返回结果，未完成时返回 202 和当前状态，失败时返回 500"""
+    loop = asyncio.get_running_loop()
+    status = await loop.run_in_executor(None, job_queue.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {status.get('error')}")
+    if status["status"] != SUCCEEDED:
+        return JSONResponse(status, status_code=202)
+    return await loop.run_in_executor(None, job_queue.result, job_id)
+
+
 @app.get("/analyze/single")
-async def analyze_single_text(text: str):
-    """分析单条文本情感"""
+async def analyze_single_text(request: Request, text: str):
+    """
+    分析单条文本情感
+    响应按清理后的文本和词典版本缓存，带强 ETag；If-None-Match 匹配时返回 304
+    """
     if not text:
         raise HTTPException(status_code=400, detail="Text is empty")
 
-    score = sentiment_analyzer.analyze_single_text(text)
-    return {
-        "sentiment_score": score,
-        "sentiment_label": sentiment_analyzer.get_sentiment_label(score)
-    }
+    key = single_cache.key(sentiment_analyzer.result_version, sentiment_analyzer.clean_text(text))
+    entry = single_cache.get(key)
+    if entry is None:
+        entry = single_cache.put(key, await cpu_executor.run(tasks.analyze_single_text, text))
+    return single_cache.respond(entry, request.headers.get("if-none-match"))
 
 
 if __name__ == "__main__":
-    settings = Settings()
     uvicorn.run(app, host=settings.host, port=settings.port)
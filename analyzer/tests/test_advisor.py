@@ -0,0 +1,113 @@
+"""投资建议测试模块"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from analyzer.advisor import InvestmentAdvisor, MarketStats
+
+
+def make_stocks(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    markets = ["A股", "港股", "美股"]
+    return [
+        {"symbol": f"S{i:04d}", "market": markets[i % 3], "change_percent": round(float(rng.normal(0.2, 2.5)), 2)}
+        for i in range(count)
+    ]
+
+
+SENTIMENTS = [{"overall_sentiment": s} for s in (0.2, 0.35, 0.45, 0.55, 0.65, 0.8)] + [{}]
+
+
+class TestMarketStats:
+    """统计量测试"""
+
+    def test_matches_numpy(self):
+        """与 numpy 计算的均值、标准差和涨跌家数一致"""
+        changes = [s["change_percent"] for s in make_stocks(1001)]
+        stats = MarketStats.from_stock_data(make_stocks(1001))
+        assert stats.count == 1001
+        assert stats.mean == np.mean(changes)
+        assert stats.std == np.std(changes)
+        assert stats.n_pos == sum(1 for c in changes if c > 0)
+        assert stats.n_neg == sum(1 for c in changes if c < 0)
+
+    def test_missing_change_percent_counts_as_zero(self):
+        """缺少 change_percent 的行按 0 计入"""
+        stats = MarketStats.from_stock_data([{"change_percent": 2}, {}, {"change_percent": -1}])
+        assert stats.count == 3
+        assert stats.mean == pytest.approx(1 / 3)
+        assert (stats.n_pos, stats.n_neg) == (1, 1)
+
+    def test_by_market(self):
+        """按市场分组的统计量与逐组计算一致"""
+        stocks = make_stocks(300)
+        changes = np.array([s["change_percent"] for s in stocks])
+        names, inverse = np.unique([s["market"] for s in stocks], return_inverse=True)
+        grouped = MarketStats.by_market(changes, inverse, list(names))
+
+        assert set(grouped) == {"A股", "港股", "美股"}
+        for market, stats in grouped.items():
+            expected = [s["change_percent"] for s in stocks if s["market"] == market]
+            assert stats.count == len(expected)
+            assert stats.mean == pytest.approx(np.mean(expected))
+            assert stats.std == pytest.approx(np.std(expected))
+
+
+class TestInvestmentAdvisor:
+    """投资建议测试"""
+
+    @pytest.fixture
+    def advisor(self):
+        return InvestmentAdvisor()
+
+    @pytest.mark.parametrize("sentiment", SENTIMENTS)
+    @pytest.mark.parametrize("count", [0, 1, 2, 50])
+    def test_columnar_input_matches_dict_input(self, advisor, sentiment, count):
+        """DataFrame 和列字典输入与逐行 dict 输入结果相同"""
+        stocks = make_stocks(count)
+        expected = advisor.generate_advice(stocks, sentiment)
+        frame = pd.DataFrame(stocks, columns=["symbol", "market", "change_percent"])
+        columns = {"market": frame["market"].to_numpy(), "change_percent": frame["change_percent"].to_numpy()}
+
+        assert advisor.generate_advice(frame, sentiment) == expected
+        assert advisor.generate_advice(columns, sentiment) == expected
+
+    def test_dict_input_matches_original_rules(self, advisor):
+        """dict 输入的趋势、建议和风险等级与原规则一致"""
+        stocks = [{"change_percent": 4.0}, {"change_percent": -3.0}, {"change_percent": 5.0}]
+        changes = [4.0, -3.0, 5.0]
+        advice = advisor.generate_advice(stocks, {"overall_sentiment": 0.7})
+
+        assert advisor.calculate_market_trend(stocks) == np.mean(changes)
+        assert advice.market_outlook.startswith("市场情绪积极，技术面良好")
+        assert advice.sector_recommendations[0] == "市场整体偏强，可适当增加权益类资产配置"
+        # np.std = 3.559 > 3.0
+        assert advice.risk_assessment == "当前市场风险等级：高风险"
+
+    def test_empty_input(self, advisor):
+        """空输入返回默认建议"""
+        advice = advisor.generate_advice([], {})
+        assert advice.sector_recommendations == ["建议均衡配置各行业，分散投资风险"]
+        assert advice.action_suggestions == ["建议观望，等待更多市场信号"]
+        assert advisor.generate_advice(pd.DataFrame(), {}) == advice
+
+    def test_dataframe_nan_treated_as_zero(self, advisor):
+        """DataFrame 中的 NaN 与缺失值一样按 0 计入"""
+        frame = pd.DataFrame({"change_percent": [1.0, np.nan, -2.0]})
+        rows = [{"change_percent": 1.0}, {}, {"change_percent": -2.0}]
+        assert advisor.generate_advice(frame, {}) == advisor.generate_advice(rows, {})
+
+    def test_generate_market_advice(self, advisor):
+        """分市场建议与各市场单独生成的建议一致"""
+        stocks = make_stocks(90)
+        frame = pd.DataFrame(stocks)
+        by_market = advisor.generate_market_advice(frame, {"overall_sentiment": 0.65})
+
+        assert set(by_market) == {"A股", "港股", "美股"}
+        for market, advice in by_market.items():
+            subset = [s for s in stocks if s["market"] == market]
+            expected = advisor.generate_advice(subset, {"overall_sentiment": 0.65})
+            assert advice.market_outlook == expected.market_outlook
+            assert advice.sector_recommendations == expected.sector_recommendations
+        assert advisor.generate_market_advice(stocks, {}).keys() == by_market.keys()
+        assert advisor.generate_market_advice([], {}) == {}
@@ -0,0 +1,88 @@
+"""日内聚合测试模块"""
+
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from analyzer.advisor import MarketStats
+from analyzer.aggregate import DailyAggregator, DayAggregate
+from analyzer.sentiment import SentimentAnalyzer
+
+
+DAY = date(2024, 1, 2)
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return SentimentAnalyzer()
+
+
+def news_batch(start: int, count: int):
+    texts = ['科技股大涨，芯片板块涨停', '市场暴跌，恐慌情绪蔓延', '央行降息，银行股走强', '房地产政策收紧']
+    return [{'title': f'新闻{i}', 'content': texts[i % len(texts)],
+             'published_at': datetime(2024, 1, 2, 9 + i % 6).isoformat()} for i in range(start, start + count)]
+
+
+class TestDailyAggregator:
+    """增量聚合测试"""
+
+    def test_incremental_matches_full(self, analyzer):
+        """分批合并与一次性全量计算结果一致，重复上报的新闻不重复计入"""
+        aggregator = DailyAggregator()
+        batches = [news_batch(0, 5), news_batch(0, 8), news_batch(5, 6)]
+        for batch in batches:
+            fresh = aggregator.new_articles(batch, DAY)
+            aggregator.apply(fresh, analyzer.score_news(fresh), [], DAY)
+
+        full = analyzer.analyze_news_sentiment(news_batch(0, 11))
+        aggregate = aggregator.day(DAY)
+        assert aggregate.sentiment_count == 11
+        assert round(aggregate.overall_sentiment, 3) == full.overall_sentiment
+        expected = {}
+        for detail in full.details:
+            for industry in detail['industries']:
+                expected[industry] = expected.get(industry, 0) + 1
+        assert dict(aggregate.industry_counts) == expected
+
+    def test_new_articles_dedups_within_batch(self):
+        """同一批内重复的新闻只保留一条"""
+        aggregator = DailyAggregator()
+        assert len(aggregator.new_articles(news_batch(0, 2) * 2, DAY)) == 2
+
+    def test_change_moments(self):
+        """涨跌幅累计量与全量统计一致，同一股票再次上报时替换旧值"""
+        aggregator = DailyAggregator()
+        rng = np.random.default_rng(0)
+        latest = {}
+        for _ in range(5):
+            stocks = [{'symbol': f'S{i}', 'change_percent': float(rng.normal(0, 2))}
+                      for i in rng.choice(50, 20, replace=False)]
+            latest.update({s['symbol']: s['change_percent'] for s in stocks})
+            aggregate = aggregator.apply([], [], stocks, DAY)
+
+        expected = MarketStats.from_changes(np.array(list(latest.values())))
+        stats = aggregate.market_stats()
+        assert stats.count == expected.count
+        assert stats.mean == pytest.approx(expected.mean)
+        assert stats.std == pytest.approx(expected.std)
+        assert (stats.n_pos, stats.n_neg) == (expected.n_pos, expected.n_neg)
+        assert aggregate.recompute_market_stats().std == pytest.approx(stats.std)
+
+    def test_recency_weighting(self):
+        """开启加权时较新的新闻权重更大"""
+        aggregate = DayAggregate(DAY, half_life_hours=1)
+        aggregate.add_article({'title': 'a', 'published_at': '2024-01-02T09:00:00'}, {'industries': []}, 0.2)
+        aggregate.add_article({'title': 'b', 'published_at': '2024-01-02T10:00:00'}, {'industries': []}, 0.8)
+        assert aggregate.overall_sentiment == pytest.approx((0.2 + 2 * 0.8) / 3)
+        assert DayAggregate(DAY).weight('2024-01-02T10:00:00') == 1.0
+
+    def test_retention(self):
+        """只保留最近 retention_days 天"""
+        aggregator = DailyAggregator(retention_days=2)
+        for d in (1, 2, 3):
+            aggregator.day(date(2024, 1, d))
+        assert sorted(aggregator._days) == [date(2024, 1, 2), date(2024, 1, 3)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,230 @@
+"""API 与执行器测试模块"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analyzer.executor import CPUExecutor
+from analyzer.warmup import WarmupState
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+class TestCPUExecutor:
+    """CPU 任务执行器测试"""
+
+    @pytest.mark.parametrize("kind", ["thread", "inline"])
+    def test_run(self, kind):
+        """测试任务执行并返回结果"""
+        executor = CPUExecutor(kind=kind, max_workers=2)
+        assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+        executor.shutdown()
+
+    def test_process_pool(self):
+        """测试进程池执行"""
+        executor = CPUExecutor(kind="process", max_workers=1)
+        assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+        executor.shutdown()
+
+    def test_invalid_kind(self):
+        """测试未知执行器类型"""
+        with pytest.raises(ValueError):
+            CPUExecutor(kind="gpu")
+
+
+class TestReadiness:
+    """启动与就绪检查测试"""
+
+    def test_not_ready_before_warmup(self, client, monkeypatch):
+        """测试预热完成前 /ready 返回 503，/health 不受影响"""
+        monkeypatch.setattr(main, "warmup_state", WarmupState())
+        assert client.get("/health").status_code == 200
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+
+    def test_ready_after_startup_warmup(self, monkeypatch):
+        """测试启动后台预热完成后 /ready 返回 200"""
+        monkeypatch.setattr(main, "warmup_state", WarmupState())
+        async def wait_for_warmup():
+            await main.app.state.warmup_task
+
+        with TestClient(main.app) as client:
+            client.portal.call(wait_for_warmup)
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json()["warm"] is True
+        assert set(response.json()["timings"]) == {"jieba", "snownlp", "sample"}
+
+
+class TestEndpoints:
+    """分析接口测试"""
+
+    def test_analyze_sentiment(self, client):
+        """测试新闻情感分析接口"""
+        response = client.post("/analyze/sentiment", json=[{'title': '科技股大涨', 'content': '芯片板块涨停'}])
+        assert response.status_code == 200
+        assert len(response.json()["details"]) == 1
+
+    def test_analyze_sentiment_weighting(self, client):
+        """测试转载合并为一簇，weighting=cluster 时每簇只计一次"""
+        story = '央行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元，银行板块午后走强。'
+        news = [{'title': '央行降准', 'content': story},
+                {'title': '央行降准（转载）', 'content': f'【来源：财经日报】{story}'},
+                {'title': '芯片股大跌', 'content': '芯片板块集体跌停，半导体指数创年内新低，资金持续流出科技股。'}]
+        by_article = client.post("/analyze/sentiment", json=news).json()
+        by_cluster = client.post("/analyze/sentiment", params={"weighting": "cluster"}, json=news).json()
+
+        details = by_cluster["details"]
+        assert [d["duplicate"] for d in details] == [False, True, False]
+        assert details[0]["cluster"] == details[1]["cluster"] != details[2]["cluster"]
+        scores = [d["sentiment"] for d in details]
+        assert by_cluster["overall_sentiment"] == pytest.approx((scores[0] + scores[2]) / 2, abs=1e-3)
+        assert by_article["overall_sentiment"] == pytest.approx(sum(scores) / 3, abs=1e-3)
+        assert client.post("/analyze/sentiment", params={"weighting": "source"}, json=news).status_code == 422
+
+    def test_analyze_sentiment_fields_and_layout(self, client):
+        """测试明细字段选择和列式结果"""
+        news = [{'title': '科技股大涨', 'content': '芯片板块涨停'}, {'title': '市场暴跌', 'content': '恐慌情绪蔓延'}]
+        full = client.post("/analyze/sentiment", json=news).json()
+        rows = client.post("/analyze/sentiment", params={"fields": "title,sentiment"}, json=news).json()
+        assert rows["details"] == [{'title': d['title'], 'sentiment': d['sentiment']} for d in full["details"]]
+
+        columns = client.post("/analyze/sentiment", params={"fields": "title,sentiment", "layout": "columns"},
+                              json=news).json()
+        assert columns["count"] == 2
+        assert columns["overall_sentiment"] == full["overall_sentiment"]
+        assert columns["columns"] == {'title': ['科技股大涨', '市场暴跌'],
+                                      'sentiment': [d['sentiment'] for d in full["details"]]}
+        assert client.post("/analyze/sentiment", params={"fields": "title,score"}, json=news).status_code == 400
+        assert client.post("/analyze/sentiment", params={"layout": "table"}, json=news).status_code == 422
+
+    def test_analyze_sentiment_empty(self, client):
+        """测试空新闻列表"""
+        assert client.post("/analyze/sentiment", json=[]).status_code == 400
+
+    def test_analyze_single(self, client):
+        """测试单条文本分析接口"""
+        response = client.get("/analyze/single", params={"text": "市场大涨，利好消息不断"})
+        assert response.status_code == 200
+        assert 0.0 <= response.json()["sentiment_score"] <= 1.0
+
+    def test_generate_market_advice(self, client):
+        """测试按市场生成投资建议接口"""
+        stocks = [{'market': 'A股', 'change_percent': 1.2}, {'market': '港股', 'change_percent': -0.8},
+                  {'market': 'A股', 'change_percent': 0.5}]
+        response = client.post("/analyze/advice/markets",
+                               json={"stock_data": stocks, "sentiment_result": {"overall_sentiment": 0.6}})
+        assert response.status_code == 200
+        assert set(response.json()) == {'A股', '港股'}
+
+    def test_daily_summary(self, client):
+        """测试每日总结接口返回技术指标与情感分析 JSON"""
+        stock_data = [{'symbol': 'DAILY', 'price': 100.0 + i, 'change_percent': 1.0,
+                       'timestamp': f'2024-01-02T{9 + i:02d}:00:00'} for i in range(6)]
+        news_data = [{'title': '科技股大涨', 'content': '芯片板块涨停'}]
+        response = client.post("/analyze/daily", json={"stock_data": stock_data, "news_data": news_data})
+        assert response.status_code == 200
+
+        technical = json.loads(response.json()["technical_analysis"])
+        assert len(technical) == 6
+        assert technical[-1]['trend'] == '上涨'
+        assert technical[-1]['sma_5'] == 103.0
+        assert json.loads(response.json()["sentiment_analysis"])["details"][0]["title"] == '科技股大涨'
+
+        backfill = client.post("/indicators/backfill", json=stock_data)
+        assert backfill.json()["applied"] == 0
+        assert client.get("/indicators/DAILY").json()["samples"] == 6
+        assert client.get("/indicators/UNKNOWN").status_code == 404
+
+    def test_daily_summary_incremental(self, client):
+        """测试每日总结只计入新增新闻，full=true 时按本次数据全量重算"""
+        params = {"day": "2024-03-01"}
+        first = [{'title': '增量一', 'content': '科技股大涨'}]
+        second = first + [{'title': '增量二', 'content': '市场暴跌，恐慌情绪蔓延'}]
+        client.post("/analyze/daily", params=params, json={"stock_data": [], "news_data": first})
+        response = client.post("/analyze/daily", params=params, json={"stock_data": [], "news_data": second})
+        sentiment = json.loads(response.json()["sentiment_analysis"])
+        assert [d["title"] for d in sentiment["details"]] == ['增量二']
+        assert sentiment["article_count"] == 2
+
+        full = client.post("/analyze/daily", params={**params, "full": "true"},
+                           json={"stock_data": [], "news_data": second})
+        assert json.loads(full.json()["sentiment_analysis"])["overall_sentiment"] == sentiment["overall_sentiment"]
+        assert client.get("/analyze/daily/aggregate", params=params).json()["article_count"] == 2
+
+    def test_metrics(self, client):
+        """测试 /metrics 以 Prometheus 文本格式导出指标"""
+        client.get("/analyze/single", params={"text": "市场大涨，利好消息不断"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'analyzer_stage_seconds_count{stage="snownlp"}' in response.text
+        assert "# TYPE analyzer_cache_requests_total counter" in response.text
+
+    def test_memory(self, client):
+        """测试 /memory 返回当前进程内存占用（单进程模式）"""
+        response = client.get("/memory")
+        assert response.status_code == 200
+        report = response.json()
+        assert report["mode"] == "single"
+        assert report["workers"][0]["pid"] == report["current_pid"]
+
+    def test_analyze_range_invalid(self, client):
+        """测试日期范围颠倒时返回 400（不访问数据库）"""
+        response = client.post("/analyze/range", params={"start": "2024-01-02", "end": "2024-01-01"})
+        assert response.status_code == 400
+
+    def test_lexicon_info(self, client):
+        """测试词典版本接口"""
+        response = client.get("/lexicon")
+        assert response.status_code == 200
+        assert response.json()["version"] == main.sentiment_analyzer.result_version
+        assert response.json()["counts"]["positive_words"] > 0
+
+    def test_lexicon_reload_without_artifact(self, client):
+        """未配置词典制品时不能热更新"""
+        assert client.post("/lexicon/reload").status_code == 400
+
+    def test_analyze_sentiment_stream(self, client):
+        """测试流式接口逐条输出明细并以汇总结束"""
+        news = [{'title': '科技股大涨', 'content': '芯片板块涨停'},
+                {'title': '', 'content': ''},
+                {'title': '市场暴跌', 'content': '恐慌情绪蔓延'}]
+        body = "\n".join(json.dumps(n, ensure_ascii=False) for n in news)
+        response = client.post("/analyze/sentiment/stream", content=body.encode("utf-8"))
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        expected = client.post("/analyze/sentiment", json=news).json()
+
+        assert [line["index"] for line in lines[:-1]] == [0, 2]
+        assert [line["sentiment"] for line in lines[:-1]] == [d["sentiment"] for d in expected["details"]]
+        assert lines[-1]["type"] == "summary"
+        assert lines[-1]["overall_sentiment"] == expected["overall_sentiment"]
+        assert (lines[-1]["total"], lines[-1]["scored"]) == (3, 2)
+
+    def test_analyze_sentiment_stream_bad_body(self, client):
+        """测试流式接口格式错误时输出错误行"""
+        response = client.post("/analyze/sentiment/stream", content=b'[1, 2]')
+        assert json.loads(response.text.splitlines()[-1])["type"] == "error"
+
+    def test_analyze_advice(self, client):
+        """测试投资建议接口"""
+        response = client.post("/analyze/advice", json={
+            "stock_data": [{'symbol': 'AAPL', 'change_percent': 1.2}],
+            "sentiment_result": {'overall_sentiment': 0.7},
+        })
+        assert response.status_code == 200
+        assert response.json()["risk_assessment"].startswith("当前市场风险等级")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,57 @@
+"""基准测试工具测试模块"""
+
+import pytest
+from analyzer.financial_lexicon import financial_lexicon
+from benchmarks.corpus import NewsCorpusGenerator, generate_news
+from benchmarks.suite import build_cases, find_regressions, load_baseline, run_suite, save_baseline
+
+
+class TestCorpus:
+    """合成语料测试"""
+
+    def test_deterministic(self):
+        """同一 seed 生成相同语料，不同 seed 不同"""
+        assert generate_news(20, seed=7) == generate_news(20, seed=7)
+        assert generate_news(20, seed=7) != generate_news(20, seed=8)
+
+    def test_size_and_vocabulary(self):
+        """条数、句数可配置，正文包含词典词"""
+        news = generate_news(30, sentences=4)
+        assert len(news) == 30
+        assert len({n['title'] for n in news}) == 30
+        assert all(n['content'].count("。") == 4 for n in news)
+        assert all(financial_lexicon.count_hits(n['content']) for n in news)
+
+    def test_stocks(self):
+        """行情数据字段齐全"""
+        stocks = NewsCorpusGenerator().stocks(10)
+        assert len({s['symbol'] for s in stocks}) == 10
+        assert all(isinstance(s['change_percent'], float) for s in stocks)
+
+
+class TestSuite:
+    """基准运行与回退检查测试"""
+
+    def test_run_and_baseline(self, tmp_path):
+        """运行用例并保存、读取基线"""
+        cases = build_cases(count=3, sentences=2, stocks=50)
+        results = run_suite(cases, ["clean_text", "generate_advice"], repeat=1)
+        assert results["clean_text"]["items"] == 3
+        assert results["generate_advice"]["throughput"] > 0
+
+        path = str(tmp_path / "baseline.json")
+        save_baseline(results, path, {'count': 3})
+        assert load_baseline(path)["results"].keys() == results.keys()
+        assert load_baseline(str(tmp_path / "missing.json")) is None
+
+    def test_find_regressions(self):
+        """吞吐量下降超过阈值时报告回退"""
+        baseline = {'a': {'throughput': 100.0}, 'b': {'throughput': 100.0}}
+        results = {'a': {'throughput': 85.0}, 'b': {'throughput': 70.0}, 'c': {'throughput': 1.0}}
+        regressions = find_regressions(results, baseline, threshold=0.2)
+        assert [r['name'] for r in regressions] == ['b']
+        assert regressions[0]['ratio'] == pytest.approx(0.7)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
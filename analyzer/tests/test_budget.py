@@ -0,0 +1,120 @@
+"""长文本打分预算测试模块"""
+
+import pytest
+from analyzer.batch import BatchSentimentEngine
+from analyzer.budget import TextBudget, split_sentences
+from analyzer.financial_lexicon import financial_lexicon
+from analyzer.sentiment import SentimentAnalyzer
+from benchmarks.corpus import NewsCorpusGenerator
+from benchmarks.text_budget import evaluate
+
+
+LONG_NEWS = NewsCorpusGenerator(seed=5).news(6, 80)
+SHORT_NEWS = NewsCorpusGenerator(seed=5).news(3, 4)
+
+
+def full_text(analyzer: SentimentAnalyzer, news: dict) -> str:
+    return f"{news['title']} {analyzer.clean_text(news['content'])}"
+
+
+class TestChunks:
+    """切句与分块测试"""
+
+    def test_split_sentences(self):
+        text = "央行降准0.5个百分点。市场大涨！后市如何？尾部没有标点"
+        assert split_sentences(text) == ["央行降准0.5个百分点。", "市场大涨！", "后市如何？", "尾部没有标点"]
+        assert "".join(split_sentences(text)) == text
+        assert split_sentences("") == []
+
+    def test_chunks_are_prefix_within_budget(self):
+        text = full_text(SentimentAnalyzer(preload=False), LONG_NEWS[0])
+        budget = TextBudget(max_chars=600, lead_chars=100, chunk_chars=150)
+        chunks = budget.chunks(text)
+        joined = "".join(chunks)
+        assert text.startswith(joined)
+        assert len(joined) == 600
+        assert len(chunks[0]) <= 100 + max(len(s) for s in split_sentences(text))
+        assert all(chunk for chunk in chunks)
+
+    def test_long_sentence_truncated(self):
+        assert TextBudget(max_chars=10, lead_chars=5, chunk_chars=5).chunks("一" * 50 + "。") == ["一" * 10]
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            TextBudget(max_chars=0)
+
+
+class TestBudgetedScoring:
+    """按预算逐块打分测试"""
+
+    def test_unbounded_matches_full_text(self):
+        """预算足够且不提前停止时，逐块累加与整篇打分结果相同"""
+        analyzer = SentimentAnalyzer()
+        texts = [full_text(analyzer, news) for news in LONG_NEWS]
+        budget = TextBudget(max_chars=10 ** 6, lead_chars=100, chunk_chars=100, patience=0)
+        for text, doc in zip(texts, budget.documents(texts, analyzer.lexicon, analyzer._combine_scores)):
+            reference = analyzer.document(text)
+            assert doc.text == text
+            assert doc.lexicon_hits == reference.lexicon_hits
+            assert analyzer.score_document(doc) == pytest.approx(analyzer.score_document(reference), abs=1e-9)
+
+    def test_early_stop(self):
+        """分数变化小于容差时在 patience 块后停止"""
+        analyzer = SentimentAnalyzer()
+        text = full_text(analyzer, LONG_NEWS[0])
+        budget = TextBudget(max_chars=10 ** 6, lead_chars=100, chunk_chars=100, tolerance=1.0, patience=1)
+        doc = budget.documents([text], analyzer.lexicon, analyzer._combine_scores)[0]
+        assert doc.text == "".join(budget.chunks(text)[:2])
+
+    def test_analyzer_reports_scored_text(self):
+        budget = TextBudget(max_chars=500)
+        analyzer = SentimentAnalyzer(budget=budget)
+        scored = analyzer.score_news_items(SHORT_NEWS + LONG_NEWS)
+        for news, (detail, _) in zip(SHORT_NEWS + LONG_NEWS, scored):
+            assert detail['text_chars'] == len(full_text(analyzer, news))
+            assert detail['scored_chars'] <= min(500, detail['text_chars'])
+        short_reference = SentimentAnalyzer().score_news_items(SHORT_NEWS)
+        assert [item[1] for item in scored[:3]] == [item[1] for item in short_reference]
+        assert all(detail['scored_chars'] == detail['text_chars'] for detail, _ in scored[:3])
+        assert all(detail['scored_chars'] < detail['text_chars'] for detail, _ in scored[3:])
+        assert 'scored_chars' not in SentimentAnalyzer().score_news_items(SHORT_NEWS)[0][0]
+
+    def test_keywords_from_scored_text(self):
+        """关键词只从已打分的文本中提取"""
+        analyzer = SentimentAnalyzer(budget=TextBudget(max_chars=200, patience=0))
+        detail, _ = analyzer.score_news_items(LONG_NEWS[:1])[0]
+        prefix = full_text(analyzer, LONG_NEWS[0])[:detail['scored_chars']]
+        assert all(word in prefix for word in detail['keywords'])
+
+    def test_single_text(self):
+        analyzer = SentimentAnalyzer(budget=TextBudget(max_chars=500))
+        assert 0.0 <= analyzer.analyze_single_text(full_text(analyzer, LONG_NEWS[0])) <= 1.0
+
+    def test_result_version(self):
+        """预算参数参与结果缓存版本"""
+        assert SentimentAnalyzer().result_version == financial_lexicon.version
+        versions = {SentimentAnalyzer(budget=TextBudget(max_chars=n)).result_version for n in (500, 1000)}
+        assert len(versions) == 2
+
+    def test_process_pool_uses_budget(self):
+        """进程池工作进程使用与主进程相同的预算"""
+        analyzer = SentimentAnalyzer(budget=TextBudget(max_chars=500))
+        expected = analyzer.analyze_news_sentiment(LONG_NEWS)
+        with BatchSentimentEngine(analyzer=analyzer, workers=2, chunk_size=2) as engine:
+            assert engine.analyze_news_sentiment(LONG_NEWS) == expected
+
+
+class TestEvaluation:
+    """预算评估工具测试"""
+
+    def test_evaluate(self):
+        rows = evaluate(LONG_NEWS[:3], budgets=[10 ** 6, 300], tolerances=[0])
+        assert rows[0]['budget'] == 'full'
+        unbounded, truncated = rows[1], rows[2]
+        assert unbounded['scored_fraction'] == 1.0
+        assert unbounded['mae'] == pytest.approx(0, abs=1e-9)
+        assert truncated['scored_fraction'] < 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
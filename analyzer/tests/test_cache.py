@@ -0,0 +1,179 @@
+"""缓存模块测试"""
+
+import asyncio
+
+import pytest
+from analyzer.cache import LRUCache, ArticleCache, CacheManager, AsyncCacheManager, CircuitBreaker
+from analyzer.sentiment import SentimentAnalyzer
+
+
+class TestLRUCache:
+    """进程内 LRU 缓存测试"""
+
+    def test_eviction_order(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # a 变为最近使用
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_zero_capacity(self):
+        """测试容量为 0 时不缓存"""
+        cache = LRUCache(max_entries=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+class TestArticleCache:
+    """逐条新闻结果缓存测试"""
+
+    def test_key_depends_on_content_and_version(self):
+        """测试缓存键随内容和词典版本变化"""
+        news = {'title': '科技股大涨', 'content': '芯片板块涨停', 'source': 'a'}
+        key = ArticleCache.article_key(news, "v1")
+
+        assert key == ArticleCache.article_key(dict(news, source='b'), "v1")
+        assert key != ArticleCache.article_key(news, "v2")
+        assert key != ArticleCache.article_key(dict(news, content='芯片板块跌停'), "v1")
+
+    def test_only_missing_articles_are_scored(self):
+        """测试只计算未命中缓存的新闻"""
+        analyzer = SentimentAnalyzer(result_cache=ArticleCache(max_entries=100))
+        first = [{'title': '科技股大涨', 'content': '芯片板块涨停'},
+                 {'title': '市场暴跌', 'content': '恐慌情绪蔓延'}]
+        second = first + [{'title': '央行降准', 'content': '流动性宽松'}]
+
+        computed = []
+
+        def scorer(items):
+            computed.append(len(items))
+            return [analyzer.score_news_item(news) for news in items]
+
+        expected = SentimentAnalyzer().analyze_news_sentiment(second)
+        analyzer.score_news(first, scorer=scorer)
+        result = analyzer.build_result(analyzer.score_news(second, scorer=scorer))
+
+        assert computed == [2, 1]
+        assert result == expected
+
+    def test_cached_details_are_copies(self):
+        """测试修改返回的明细不会污染缓存"""
+        analyzer = SentimentAnalyzer(result_cache=ArticleCache(max_entries=100))
+        news = [{'title': '科技股大涨', 'content': '芯片板块涨停'}]
+
+        analyzer.analyze_news_sentiment(news).details[0]['extra'] = 1
+        analyzer.analyze_news_sentiment(news).details[0]['extra'] = 1
+        assert 'extra' not in analyzer.analyze_news_sentiment(news).details[0]
+
+
+class _BrokenRedis:
+    """始终失败的 Redis 客户端，用于模拟故障"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            self.calls += 1
+            raise ConnectionError("redis down")
+        return fail
+
+
+class TestCacheManager:
+    """缓存管理器测试（使用 fakeredis 作为本地 Redis 替身）"""
+
+    @pytest.fixture
+    def manager(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return CacheManager(client=fakeredis.FakeRedis())
+
+    def test_get_set_delete(self, manager):
+        """测试基本读写"""
+        assert manager.set("financial:test", {"score": 0.8, "words": ["利好"]})
+        assert manager.get("financial:test") == {"score": 0.8, "words": ["利好"]}
+        assert manager.delete("financial:test")
+        assert manager.get("financial:test") is None
+
+    def test_get_many_set_many(self, manager):
+        """测试批量读写"""
+        assert manager.set_many({"k1": 1, "k2": [1, 2]}, ttl=60)
+        assert manager.get_many(["k1", "missing", "k2"]) == {"k1": 1, "k2": [1, 2]}
+        assert manager.get_many([]) == {}
+
+    def test_get_many_skips_undecodable_values(self, manager):
+        """测试批量读取时无法解码的值按未命中处理"""
+        manager.set("good", {"score": 0.8})
+        manager.client.set("bad", b"\x00zlib:not-compressed")
+        manager.client.set("text", b"not json")
+        assert manager.get_many(["good", "bad", "text"]) == {"good": {"score": 0.8}}
+
+    def test_large_values_compressed(self, manager):
+        """测试大值压缩存储且读取透明"""
+        value = {"details": ["利好消息不断"] * 500}
+        manager.set("big", value)
+        raw = manager.client.get("big")
+
+        assert raw.startswith(b"\x00zlib:")
+        assert len(raw) < len(str(value).encode("utf-8"))
+        assert manager.get("big") == value
+
+    def test_circuit_breaker_skips_redis(self):
+        """测试连续失败后熔断，冷却期内不再访问 Redis"""
+        client = _BrokenRedis()
+        manager = CacheManager(client=client, failure_threshold=2, cooldown=60)
+
+        for _ in range(5):
+            assert manager.get("k") is None
+            assert manager.set("k", 1) is False
+
+        assert client.calls == 2
+        assert manager.breaker.is_open
+
+    def test_circuit_breaker_recovers(self):
+        """测试冷却期结束后试探成功即恢复"""
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker._opened_at is None
+
+    def test_article_cache_uses_redis_tier(self, manager):
+        """测试进程内未命中时从 Redis 读取并回填"""
+        writer = ArticleCache(cache_manager=manager)
+        writer.set_many({"a": [{"title": "t"}, 0.6]})
+
+        reader = ArticleCache(cache_manager=manager)
+        assert reader.get_many(["a", "b"]) == {"a": [{"title": "t"}, 0.6]}
+        assert reader.local.get("a") == [{"title": "t"}, 0.6]
+
+
+class TestAsyncCacheManager:
+    """异步缓存管理器测试"""
+
+    def test_async_operations(self):
+        """测试异步读写与批量操作"""
+        fakeredis = pytest.importorskip("fakeredis")
+
+        async def scenario():
+            manager = AsyncCacheManager(client=fakeredis.FakeAsyncRedis(), compress_threshold=16)
+            assert await manager.set("k", {"text": "利好" * 20})
+            assert await manager.get("k") == {"text": "利好" * 20}
+            assert await manager.set_many({"a": 1, "b": 2})
+            assert await manager.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+            await manager.client.set("c", b"not json")
+            assert await manager.get_many(["a", "c"]) == {"a": 1}
+            assert await manager.delete("a")
+            assert await manager.get("a") is None
+            await manager.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,182 @@
+"""词典优先级联打分测试模块"""
+
+import pytest
+import analyzer.sentiment as sentiment_module
+from analyzer.batch import BatchSentimentEngine
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from analyzer.financial_lexicon import financial_lexicon
+from analyzer.metrics import cascade_paths
+from analyzer.sentiment import SentimentAnalyzer
+from analyzer.snownlp_model import default_model
+from benchmarks.cascade import evaluate
+from benchmarks.corpus import NewsCorpusGenerator
+
+
+NEWS = NewsCorpusGenerator(seed=7).news(12, 8)
+# 命中多个正面词、倾向明确
+STRONG_TEXT = "公司业绩大涨，利润增长，营收增长，盈利超预期，股价上涨创新高，市场看好，利好不断"
+# 没有金融词
+PLAIN_TEXT = "今天天气不错，适合出门散步"
+
+
+class TestLexiconCascade:
+    """级联策略测试"""
+
+    def test_accepts(self):
+        cascade = LexiconCascade(min_keywords=3, min_confidence=0.4)
+        assert cascade.accepts({'score': 0.9, 'total_keywords': 3})
+        assert cascade.accepts({'score': 0.1, 'total_keywords': 5})
+        assert not cascade.accepts({'score': 0.9, 'total_keywords': 2})
+        assert not cascade.accepts({'score': 0.6, 'total_keywords': 10})
+
+    def test_confidence(self):
+        assert LexiconCascade.confidence({'score': 0.5}) == 0
+        assert LexiconCascade.confidence({'score': 0.0}) == 1
+        assert LexiconCascade.confidence({'score': 0.75}) == pytest.approx(0.5)
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            LexiconCascade(min_keywords=0)
+        with pytest.raises(ValueError):
+            LexiconCascade(min_confidence=1.5)
+        with pytest.raises(ValueError):
+            LexiconCascade(fallback=-0.1)
+
+
+class TestCascadeScoring:
+    """级联打分测试"""
+
+    def test_skipped_documents_do_not_call_snownlp(self, monkeypatch):
+        analyzer = SentimentAnalyzer(cascade=LexiconCascade(min_keywords=3, min_confidence=0.2))
+        scored = []
+        original = sentiment_module.score_snownlp
+        monkeypatch.setattr(sentiment_module, "score_snownlp", lambda docs: (scored.extend(docs), original(docs)))
+        strong, plain = analyzer.document(STRONG_TEXT), analyzer.document(PLAIN_TEXT)
+        analyzer._score_stages([strong, plain])
+        assert scored == [plain]
+        assert strong._snownlp_score is None
+
+    def test_fallback_replaces_snownlp(self):
+        cascade = LexiconCascade(min_keywords=3, min_confidence=0.2, fallback=0.7)
+        analyzer = SentimentAnalyzer(cascade=cascade)
+        doc = analyzer.document(STRONG_TEXT)
+        lexicon_result = doc.lexicon_result
+        expected = analyzer._combine_scores(0.7, lexicon_result['score'], lexicon_result['total_keywords'])
+        assert analyzer.score_document(doc) == pytest.approx(expected)
+        assert doc._snownlp_score is None
+
+    def test_uncertain_documents_unchanged(self):
+        """词典把握不足的文档与完整打分结果相同"""
+        full = SentimentAnalyzer()
+        cascade = SentimentAnalyzer(cascade=LexiconCascade(min_keywords=3, min_confidence=0.2))
+        for text in (PLAIN_TEXT, "股价小幅上涨，但利润下滑"):
+            assert cascade.analyze_single_text(text) == full.analyze_single_text(text)
+
+    def test_details_mark_scoring_path(self):
+        """明细标出打分路径，只用词典打分时 snownlp_score 仍为数值（策略的 fallback）"""
+        analyzer = SentimentAnalyzer(cascade=LexiconCascade(min_keywords=3, min_confidence=0.2, fallback=0.6))
+        strong, plain = analyzer.score_news_items([{'title': '', 'content': STRONG_TEXT},
+                                                   {'title': '', 'content': PLAIN_TEXT}])
+        assert strong[0]['scoring_path'] == 'lexicon'
+        assert strong[0]['snownlp_score'] == 0.6
+        assert plain[0]['scoring_path'] == 'snownlp'
+        assert isinstance(plain[0]['snownlp_score'], float)
+        details = analyzer.get_detailed_analysis(STRONG_TEXT)['details']
+        assert details['scoring_path'] == 'lexicon'
+        assert details['snownlp_score'] == 0.6
+
+    def test_no_scoring_path_without_cascade(self):
+        """未启用级联时明细字段不变"""
+        analyzer = SentimentAnalyzer()
+        detail, _ = analyzer.score_news_item({'title': '', 'content': STRONG_TEXT})
+        assert 'scoring_path' not in detail
+        assert 'scoring_path' not in analyzer.get_detailed_analysis(STRONG_TEXT)['details']
+
+    def test_path_metrics(self):
+        analyzer = SentimentAnalyzer(cascade=LexiconCascade(min_keywords=3, min_confidence=0.2))
+        lexicon_before, snownlp_before = cascade_paths.value('lexicon'), cascade_paths.value('snownlp')
+        analyzer.score_news_items([{'title': '', 'content': STRONG_TEXT}, {'title': '', 'content': PLAIN_TEXT}])
+        assert cascade_paths.value('lexicon') - lexicon_before == 1
+        assert cascade_paths.value('snownlp') - snownlp_before == 1
+
+    def test_result_version(self):
+        """级联参数参与结果缓存版本"""
+        assert SentimentAnalyzer().result_version == financial_lexicon.version
+        versions = {SentimentAnalyzer(cascade=LexiconCascade(min_keywords=n)).result_version for n in (4, 6)}
+        assert len(versions) == 2
+
+    def test_process_pool_uses_cascade(self):
+        """进程池工作进程使用与主进程相同的级联策略"""
+        analyzer = SentimentAnalyzer(cascade=LexiconCascade(min_keywords=4, min_confidence=0.1))
+        expected = analyzer.analyze_news_sentiment(NEWS)
+        with BatchSentimentEngine(analyzer=analyzer, workers=2, chunk_size=4) as engine:
+            assert engine.analyze_news_sentiment(NEWS) == expected
+
+
+class FewKeywordsCascade(LexiconCascade):
+    """测试用：词典命中不超过 limit 时接受，之后不再接受（模拟逐块打分途中词典变得不可靠）"""
+
+    def __init__(self, limit: int):
+        super().__init__(min_keywords=1, min_confidence=0)
+        self.limit = limit
+
+    def accepts(self, lexicon_result: dict) -> bool:
+        return lexicon_result['total_keywords'] <= self.limit
+
+
+class TestCascadeWithBudget:
+    """级联与长文本打分预算同时启用"""
+
+    LONG_NEWS = NewsCorpusGenerator(seed=5).news(4, 80)
+
+    def test_accepted_documents_skip_segmentation(self, monkeypatch):
+        """逐块打分时词典被接受的长文不做 SnowNLP 分词"""
+        segmented = []
+        model = default_model()
+        original = model.words_batch
+        monkeypatch.setattr(model, "words_batch", lambda texts: (segmented.extend(texts), original(texts))[1])
+        analyzer = SentimentAnalyzer(budget=TextBudget(max_chars=600),
+                                     cascade=LexiconCascade(min_keywords=1, min_confidence=0))
+        scored = analyzer.score_news_items(self.LONG_NEWS, keywords=False)
+        assert segmented == []
+        assert all(detail['scoring_path'] == 'lexicon' for detail, _ in scored)
+
+    def test_rejected_documents_unchanged(self):
+        """词典始终不被接受时与只设预算的结果相同"""
+        budget = TextBudget(max_chars=600)
+        expected = SentimentAnalyzer(budget=budget).score_news_items(self.LONG_NEWS)
+        cascade = SentimentAnalyzer(budget=budget, cascade=LexiconCascade(min_keywords=10 ** 6))
+        scored = cascade.score_news_items(self.LONG_NEWS)
+        assert all(detail.pop('scoring_path') == 'snownlp' for detail, _ in scored)
+        assert scored == expected
+
+    def test_catch_up_after_rejection(self):
+        """先被接受、后不再接受的文档补分跳过的部分，结果与整篇打分相同"""
+        analyzer = SentimentAnalyzer()
+        texts = [f"{news['title']} {analyzer.clean_text(news['content'])}" for news in self.LONG_NEWS]
+        budget = TextBudget(max_chars=10 ** 6, lead_chars=100, chunk_chars=100, patience=0)
+        cascade = FewKeywordsCascade(limit=8)
+        for text, doc in zip(texts, budget.documents(texts, analyzer.lexicon, analyzer._combine_scores, cascade)):
+            reference = analyzer.document(text)
+            assert cascade.accepts(analyzer.document(budget.chunks(text)[0]).lexicon_result)
+            assert not cascade.accepts(reference.lexicon_result)
+            assert doc.lexicon_hits == reference.lexicon_hits
+            assert doc._snownlp_score == pytest.approx(reference.snownlp_score, abs=1e-9)
+
+
+class TestEvaluation:
+    """级联评估工具测试"""
+
+    def test_evaluate(self):
+        rows = evaluate(NEWS, min_keywords=[1, 10 ** 6], min_confidences=[0])
+        assert rows[0]['min_keywords'] == 'off'
+        skip_all, skip_none = rows[1], rows[2]
+        assert skip_all['skipped'] == 1.0
+        assert skip_all['skipped_snownlp'] is not None
+        assert skip_none['skipped'] == 0.0
+        assert skip_none['mae'] == pytest.approx(0, abs=1e-9)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
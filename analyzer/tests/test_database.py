@@ -0,0 +1,206 @@
+"""数据库批量分析测试模块
+
+默认使用临时 SQLite 库；设置 ANALYZER_TEST_DATABASE_URL 指向一个本地 PostgreSQL 空库时
+同时在 PostgreSQL 上运行（测试会创建并删除 news_data / stock_data 表）
+"""
+
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from analyzer.batch import BatchSentimentEngine
+from analyzer.budget import TextBudget
+from analyzer.cascade import LexiconCascade
+from sqlalchemy import select
+
+from analyzer.database import (VERSION_WIDTH, DatabaseBatchAnalyzer, _scores_csv, create_db_engine,
+                               ensure_sentiment_version_column, metadata, news_table, stock_table, stored_version,
+                               write_scores)
+from analyzer.sentiment import SentimentAnalyzer
+
+
+POSTGRES_URL = os.getenv("ANALYZER_TEST_DATABASE_URL")
+DATABASE_URLS = ["sqlite"]
+if POSTGRES_URL:
+    DATABASE_URLS.append(POSTGRES_URL)
+
+TEXTS = ['科技股大涨，芯片板块涨停', '市场暴跌，恐慌情绪蔓延', '央行降息，银行股走强']
+
+
+@pytest.fixture(params=DATABASE_URLS)
+def engine(request, tmp_path):
+    url = f"sqlite:///{tmp_path / 'news.db'}" if request.param == "sqlite" else request.param
+    engine = create_db_engine(url)
+    if engine.dialect.name == "sqlite":
+        # 写回时读游标仍打开，WAL 模式下读写互不阻塞（与 PostgreSQL 的 MVCC 行为一致）
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    start = datetime(2024, 1, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(news_table.insert(), [
+            {'id': i + 1, 'title': f'新闻{i}', 'content': TEXTS[i % 3], 'published_at': start + timedelta(hours=8 * i)}
+            for i in range(9)
+        ])
+        conn.execute(stock_table.insert(), [
+            {'id': i + 1, 'symbol': f'S{i % 3}', 'market': 'A股', 'change_percent': (i % 5) - 2,
+             'timestamp': start + timedelta(hours=8 * i)}
+            for i in range(9)
+        ])
+    yield engine
+    metadata.drop_all(engine)
+    engine.dispose()
+
+
+class TestDatabaseBatchAnalyzer:
+    """按日期范围读库分析测试"""
+
+    def test_chunks(self, engine):
+        """服务端游标按固定大小分块读取，只读取范围内的行"""
+        analyzer = DatabaseBatchAnalyzer(engine, chunk_size=2)
+        chunks = list(analyzer.news_chunks(date(2024, 1, 1), date(2024, 1, 2)))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 2]
+        assert [row['id'] for chunk in chunks for row in chunk] == [1, 2, 3, 4, 5, 6]
+
+    def test_analyze_range_matches_in_memory(self, engine):
+        """分块汇总结果与一次性分析一致"""
+        engine_ = BatchSentimentEngine(analyzer=SentimentAnalyzer(), workers=1)
+        report = DatabaseBatchAnalyzer(engine, engine_, chunk_size=2).analyze_range(date(2024, 1, 1), date(2024, 1, 3))
+        expected = engine_.analyze_news_sentiment([{'title': f'新闻{i}', 'content': TEXTS[i % 3]} for i in range(9)])
+
+        assert (report['news_count'], report['stock_rows'], report['scored']) == (9, 9, 9)
+        assert report['overall_sentiment'] == expected.overall_sentiment
+        assert [day['date'] for day in report['days']] == ['2024-01-01', '2024-01-02', '2024-01-03']
+        assert sum(day['scored'] for day in report['days']) == 9
+        assert report['market']['count'] == 9
+        assert report['market']['mean'] == pytest.approx(sum((i % 5) - 2 for i in range(9)) / 9)
+        assert report['advice']['risk_assessment'].startswith("当前市场风险等级")
+
+    def test_range_progress(self, engine):
+        """进度的总数为范围内的新闻和行情行数，行情阶段同样报告进度"""
+        calls = []
+        analyzer = DatabaseBatchAnalyzer(engine, chunk_size=4)
+        assert analyzer.count_rows(date(2024, 1, 1), date(2024, 1, 2)) == (6, 6)
+        analyzer.analyze_range(date(2024, 1, 1), date(2024, 1, 2), progress=lambda *args: calls.append(args))
+        assert calls == [(4, 12), (6, 12), (10, 12), (12, 12)]
+
+    def test_invalid_range(self, engine):
+        """结束日期早于开始日期"""
+        with pytest.raises(ValueError):
+            DatabaseBatchAnalyzer(engine).analyze_range(date(2024, 1, 2), date(2024, 1, 1))
+
+
+class TestWriteBack:
+    """逐条结果写回测试"""
+
+    def test_write_back(self, engine):
+        """写回分数和关键词，重复执行不再打分和更新"""
+        batch_engine = BatchSentimentEngine(analyzer=SentimentAnalyzer(), workers=1)
+        analyzer = DatabaseBatchAnalyzer(engine, batch_engine, chunk_size=4)
+        report = analyzer.write_back(date(2024, 1, 1), date(2024, 1, 2))
+        assert (report['selected'], report['written'], report['empty']) == (6, 6, 0)
+
+        with engine.connect() as conn:
+            rows = conn.execute(select(news_table).order_by(news_table.c.id)).mappings().all()
+        expected, _ = batch_engine.analyzer.score_news_item({'title': '新闻0', 'content': TEXTS[0]})
+        assert float(rows[0]['sentiment_score']) == pytest.approx(expected['sentiment'], abs=0.01)
+        assert rows[0]['keywords'] == ", ".join(expected['keywords'])
+        assert rows[0]['sentiment_version'] == batch_engine.analyzer.result_version
+        assert [row['sentiment_version'] for row in rows[6:]] == [None] * 3
+
+        again = analyzer.write_back(date(2024, 1, 1), date(2024, 1, 3))
+        assert (again['selected'], again['written']) == (3, 3)
+
+    @pytest.mark.parametrize("policies", [
+        {'budget': TextBudget(2000)},
+        {'budget': TextBudget(2000), 'cascade': LexiconCascade()},
+    ], ids=["budget", "budget+cascade"])
+    def test_write_back_with_policies(self, engine, policies):
+        """设置打分预算、级联策略时结果版本超过列宽，写回的版本不超过列宽且重复执行不再更新"""
+        analyzer = SentimentAnalyzer(**policies)
+        assert len(analyzer.result_version) > VERSION_WIDTH
+        db_analyzer = DatabaseBatchAnalyzer(engine, BatchSentimentEngine(analyzer=analyzer, workers=1), chunk_size=4)
+        report = db_analyzer.write_back(date(2024, 1, 1), date(2024, 1, 2))
+        assert report['written'] == 6
+        assert report['sentiment_version'] == stored_version(analyzer.result_version)
+        with engine.connect() as conn:
+            versions = set(conn.execute(select(news_table.c.sentiment_version)
+                                        .where(news_table.c.id <= 6)).scalars())
+        assert versions == {report['sentiment_version']}
+        assert len(report['sentiment_version']) <= news_table.c.sentiment_version.type.length
+        assert db_analyzer.write_back(date(2024, 1, 1), date(2024, 1, 2))['selected'] == 0
+
+    def test_write_scores_idempotent(self, engine):
+        """同一版本重复写入不更新，版本变化时覆盖"""
+        assert write_scores(engine, [(1, 0.8, "大涨", "v1"), (2, 0.2, "", "v1")]) == 2
+        assert write_scores(engine, [(1, 0.8, "大涨", "v1")]) == 0
+        assert write_scores(engine, [(1, 0.7, "涨停", "v2")]) == 1
+        with engine.connect() as conn:
+            row = conn.execute(select(news_table).where(news_table.c.id == 1)).mappings().one()
+        assert (row['keywords'], row['sentiment_version']) == ("涨停", "v2")
+
+    def test_version_bounded_to_column_width(self, engine):
+        """超过列宽的版本写入前转换为固定长度摘要；未转换时拒绝写入"""
+        assert stored_version("c4124d10d6cf") == "c4124d10d6cf"
+        long_version = "c4124d10d6cf:" + "x" * 40
+        bounded = stored_version(long_version)
+        assert len(bounded) == VERSION_WIDTH == news_table.c.sentiment_version.type.length
+        assert bounded == stored_version(long_version) != stored_version(long_version + "y")
+        with pytest.raises(ValueError):
+            write_scores(engine, [(1, 0.5, "", long_version)])
+        assert write_scores(engine, [(1, 0.5, "", bounded)]) == 1
+
+    def test_empty_keywords_not_null(self, engine):
+        """空关键词写成空字符串而不是 NULL（COPY 与逐行 UPDATE 结果相同）"""
+        assert write_scores(engine, [(1, 0.5, "", "v1")]) == 1
+        with engine.connect() as conn:
+            assert conn.execute(select(news_table.c.keywords).where(news_table.c.id == 1)).scalar_one() == ""
+
+    def test_scores_csv_quotes_strings(self):
+        """COPY 的 CSV 中字符串列加引号，数值列不加"""
+        assert _scores_csv([(1, 0.8, "", "v1"), (2, 0.25, "大涨, 利好", "v1")]).getvalue().splitlines() == [
+            '1,0.8,"","v1"', '2,0.25,"大涨, 利好","v1"']
+
+    def test_adds_missing_column(self, engine):
+        """旧表没有 sentiment_version 列时自动补上"""
+        if engine.dialect.name != "sqlite":
+            pytest.skip("ALTER TABLE DROP COLUMN 只在 SQLite 上验证")
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE news_data DROP COLUMN sentiment_version")
+        ensure_sentiment_version_column(engine)
+        ensure_sentiment_version_column(engine)
+        assert write_scores(engine, [(1, 0.8, "大涨", "v1")]) == 1
+
+
+@pytest.mark.skipif(not POSTGRES_URL or not POSTGRES_URL.startswith("postgresql"),
+                    reason="需要 ANALYZER_TEST_DATABASE_URL 指向 PostgreSQL 测试库")
+class TestPostgresCopy:
+    """PostgreSQL 下的 COPY → 临时表 → UPDATE 写回路径"""
+
+    @pytest.fixture
+    def pg_engine(self):
+        engine = create_db_engine(POSTGRES_URL)
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(news_table.insert(), [{'id': i, 'title': f'新闻{i}', 'keywords': '旧'} for i in (1, 2, 3)])
+        yield engine
+        metadata.drop_all(engine)
+        engine.dispose()
+
+    def test_copy_rowcount_version_and_empty_keywords(self, pg_engine):
+        """返回实际更新行数，同版本跳过，空关键词写成空字符串"""
+        assert pg_engine.dialect.name == "postgresql"
+        rows = [(1, 0.8, "大涨, 利好", "v1"), (2, 0.2, "", "v1"), (3, 0.5, "", "v1")]
+        assert write_scores(pg_engine, rows) == 3
+        assert write_scores(pg_engine, rows) == 0
+        assert write_scores(pg_engine, [(1, 0.7, "涨停", "v2"), (2, 0.2, "", "v1")]) == 1
+        with pg_engine.connect() as conn:
+            stored = conn.execute(select(news_table.c.id, news_table.c.keywords, news_table.c.sentiment_version)
+                                  .order_by(news_table.c.id)).all()
+        assert [tuple(row) for row in stored] == [(1, "涨停", "v2"), (2, "", "v1"), (3, "", "v1")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
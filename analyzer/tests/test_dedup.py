@@ -0,0 +1,138 @@
+"""近似重复新闻检测测试模块"""
+
+import tracemalloc
+
+import pytest
+from analyzer.cache import ArticleCache
+from analyzer.dedup import (_INCREMENTS, _MULTIPLIERS, BLOCK_SIZE, MAX_SIGNATURE_CHARS, SHINGLE_SIZE, MinHashIndex,
+                            NearDuplicateDetector, _shingle_hashes, cluster_id, minhash, normalize, similarity)
+from analyzer.sentiment import SentimentAnalyzer
+from benchmarks.corpus import NewsCorpusGenerator
+
+
+STORY = "央行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元。市场人士认为此举有助于稳定市场预期，银行板块午后走强，沪指收涨1.2%。"
+
+
+def reprint(text: str) -> str:
+    """模拟转载：加上来源和编辑署名，改动标点"""
+    return f"【来源：财经日报】{text.replace('。', '！')}（责任编辑：王五）"
+
+
+class TestMinHash:
+    """签名与索引测试"""
+
+    def test_similar_texts(self):
+        assert similarity(minhash(STORY), minhash(reprint(STORY))) >= 0.8
+        assert similarity(minhash(STORY), minhash("芯片板块集体跌停，半导体指数创年内新低，资金持续流出科技股。")) < 0.2
+
+    def test_formatting_does_not_matter(self):
+        """空白、标点和大小写不影响签名"""
+        assert (minhash("ETF 资金 流入，市场回暖！") == minhash("etf资金流入市场回暖")).all()
+        assert cluster_id("ETF 资金 流入") == cluster_id("etf资金流入")
+
+    def test_empty_text(self):
+        assert minhash("") is None
+        assert minhash(" ，。！") is None
+
+    def test_long_text(self):
+        """长文分块取最小值与一次性计算相同；只用前 MAX_SIGNATURE_CHARS 个字符，内存占用有上限"""
+        text = NewsCorpusGenerator(seed=3).news(1, 4000)[0]['content']
+        normalized = normalize(text)
+        assert len(normalized) > 200000 // 4
+        hashes = _shingle_hashes(normalized[:3 * BLOCK_SIZE], SHINGLE_SIZE)
+        assert len(hashes) > BLOCK_SIZE
+        dense = (hashes[:, None] * _MULTIPLIERS + _INCREMENTS).min(axis=0)
+        assert (minhash(normalized, max_chars=3 * BLOCK_SIZE) == dense).all()
+
+        long_text = normalized * (200000 // len(normalized) + 1)
+        tracemalloc.start()
+        signature = minhash(long_text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert (signature == minhash(long_text[:MAX_SIGNATURE_CHARS])).all()
+        assert peak < 32 * 1024 * 1024
+
+    def test_index_threshold(self):
+        index = MinHashIndex(threshold=0.8)
+        index.add(minhash(STORY), 0)
+        assert index.nearest(minhash(reprint(STORY))) == 0
+        assert index.nearest(minhash("芯片板块集体跌停，半导体指数创年内新低。")) is None
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            MinHashIndex(threshold=0)
+        with pytest.raises(ValueError):
+            NearDuplicateDetector(bands=7)
+
+
+class TestClustering:
+    """聚类测试"""
+
+    def test_reprints_join_first_occurrence(self):
+        corpus = NewsCorpusGenerator(seed=11).texts(50)
+        texts = corpus + [reprint(text) for text in corpus]
+        representatives = NearDuplicateDetector().cluster(texts)
+        assert representatives == list(range(50)) * 2
+
+    def test_empty_texts_are_not_merged(self):
+        assert NearDuplicateDetector().cluster(["", STORY, "", reprint(STORY)]) == [0, 1, 2, 1]
+
+
+class TestDeduplicatedScoring:
+    """打分前去重测试"""
+
+    news = [
+        {'title': '央行降准', 'content': STORY},
+        {'title': '芯片股大跌', 'content': '芯片板块集体跌停，半导体指数创年内新低，资金持续流出科技股。'},
+        {'title': '央行降准0.5个百分点（转载）', 'content': reprint(STORY)},
+        {'title': '', 'content': ''},
+    ]
+
+    def test_cluster_scored_once(self):
+        analyzer = SentimentAnalyzer(deduplicator=NearDuplicateDetector())
+        computed = []
+
+        def scorer(items):
+            computed.append(len(items))
+            return analyzer.score_news_items(items)
+
+        scored = analyzer.score_news(self.news, scorer=scorer)
+        assert computed == [3]
+        assert scored[3] is None
+
+        original, other, copy = scored[0][0], scored[1][0], scored[2][0]
+        assert copy['cluster'] == original['cluster'] != other['cluster']
+        assert (original['duplicate'], other['duplicate'], copy['duplicate']) == (False, False, True)
+        assert copy['title'] == '央行降准0.5个百分点（转载）'
+        assert copy['sentiment'] == original['sentiment']
+        assert scored[2][1] == scored[0][1]
+
+    def test_weighting(self):
+        analyzer = SentimentAnalyzer(deduplicator=NearDuplicateDetector())
+        scored = analyzer.score_news(self.news)
+        by_article = analyzer.build_result(scored)
+        by_cluster = analyzer.build_result(scored, weighting='cluster')
+
+        assert len(by_article.details) == len(by_cluster.details) == 3
+        assert by_cluster.overall_sentiment == round((scored[0][1] + scored[1][1]) / 2, 3)
+        assert by_article.overall_sentiment == round((2 * scored[0][1] + scored[1][1]) / 3, 3)
+        with pytest.raises(ValueError):
+            analyzer.build_result(scored, weighting='source')
+
+    def test_cached_details_are_not_annotated(self):
+        """簇信息只加在返回结果上，不写入结果缓存"""
+        cache = ArticleCache(max_entries=10)
+        analyzer = SentimentAnalyzer(result_cache=cache, deduplicator=NearDuplicateDetector())
+        analyzer.score_news(self.news)
+        key = cache.article_key(self.news[0], analyzer.result_version)
+        detail, _ = cache.get_many([key])[key]
+        assert 'cluster' not in detail and 'duplicate' not in detail
+
+    def test_disabled_by_default(self):
+        scored = SentimentAnalyzer().score_news(self.news)
+        assert 'cluster' not in scored[2][0]
+        assert scored[2][0]['title'] == '央行降准0.5个百分点（转载）'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
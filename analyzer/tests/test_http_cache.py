@@ -0,0 +1,142 @@
+"""HTTP 响应缓存测试模块"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analyzer.http_cache import ResponseCache, etag_matches
+from analyzer.wire import WireFormatMiddleware
+
+
+class TestETag:
+    """ETag 匹配测试"""
+
+    def test_matches(self):
+        etag = '"abc"'
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"abc"', etag)
+        assert etag_matches('"x", "abc"', etag)
+        assert etag_matches('*', etag)
+        assert not etag_matches('"abd"', etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('', etag)
+
+
+class TestResponseCache:
+    """响应缓存测试"""
+
+    def test_put_get(self):
+        cache = ResponseCache(max_entries=2)
+        key = cache.key("v1", "市场大涨")
+        assert cache.get(key) is None
+        entry = cache.put(key, {"sentiment_score": 0.9, "sentiment_label": "积极"})
+        assert cache.get(key) is entry
+        assert entry.body == '{"sentiment_score":0.9,"sentiment_label":"积极"}'.encode("utf-8")
+
+    def test_strong_etag_depends_on_body(self):
+        cache = ResponseCache()
+        first = cache.put("a", {"sentiment_score": 0.9})
+        same = cache.put("b", {"sentiment_score": 0.9})
+        other = cache.put("c", {"sentiment_score": 0.1})
+        assert first.etag == same.etag != other.etag
+        assert first.etag.startswith('"') and not first.etag.startswith('W/')
+
+    def test_key_includes_version(self):
+        assert ResponseCache.key("v1", "文本") != ResponseCache.key("v2", "文本")
+
+    def test_bounded(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, {})
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+
+    def test_respond(self):
+        cache = ResponseCache(max_age=30)
+        entry = cache.put("a", {"sentiment_score": 0.5})
+        full = cache.respond(entry, None)
+        assert full.status_code == 200
+        assert full.body == entry.body
+        assert full.headers["cache-control"] == "public, max-age=30"
+        not_modified = cache.respond(entry, entry.etag)
+        assert not_modified.status_code == 304
+        assert not_modified.body == b""
+        assert not_modified.headers["etag"] == entry.etag
+        assert ResponseCache(max_age=0).cache_control == "no-cache"
+
+
+class TestSingleEndpoint:
+    """/analyze/single 条件请求测试"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(main, "single_cache", ResponseCache(max_entries=16, max_age=60))
+        return TestClient(main.app)
+
+    def test_conditional_get(self, client):
+        first = client.get("/analyze/single", params={"text": "市场大涨，利好消息不断"})
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "public, max-age=60"
+
+        again = client.get("/analyze/single", params={"text": "市场大涨，利好消息不断"},
+                           headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+        stale = client.get("/analyze/single", params={"text": "市场大涨，利好消息不断"},
+                           headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
+        assert stale.json() == first.json()
+
+    def test_gzip_response_has_weak_etag(self, monkeypatch):
+        """gzip 压缩后的响应使用弱 ETag，条件请求仍返回 304"""
+        monkeypatch.setattr(main, "single_cache", ResponseCache(max_entries=16, max_age=60))
+        client = TestClient(WireFormatMiddleware(main.app, minimum_size=16))
+        params = {"text": "市场大涨，利好消息不断"}
+        identity = client.get("/analyze/single", params=params, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert not identity.headers["etag"].startswith("W/")
+
+        compressed = client.get("/analyze/single", params=params, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] == "W/" + identity.headers["etag"]
+        assert compressed.json() == identity.json()
+
+        again = client.get("/analyze/single", params=params,
+                           headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]})
+        assert again.status_code == 304
+
+    def test_cache_hit_skips_computation(self, client, monkeypatch):
+        """文本清理后相同的请求只计算一次"""
+        calls = []
+        original = main.cpu_executor.run
+
+        async def counting_run(fn, *args):
+            calls.append(args)
+            return await original(fn, *args)
+
+        monkeypatch.setattr(main.cpu_executor, "run", counting_run)
+        client.get("/analyze/single", params={"text": "芯片板块涨停"})
+        client.get("/analyze/single", params={"text": "  芯片板块涨停  "})
+        assert len(calls) == 1
+
+    def test_version_change_invalidates(self, client, monkeypatch):
+        """词典版本变化后重新计算"""
+        calls = []
+        original = main.cpu_executor.run
+
+        async def counting_run(fn, *args):
+            calls.append(args)
+            return await original(fn, *args)
+
+        monkeypatch.setattr(main.cpu_executor, "run", counting_run)
+        client.get("/analyze/single", params={"text": "市场暴跌"})
+        monkeypatch.setattr(type(main.sentiment_analyzer), "result_version", property(lambda self: "other"))
+        client.get("/analyze/single", params={"text": "市场暴跌"})
+        assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
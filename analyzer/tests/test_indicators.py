@@ -0,0 +1,115 @@
+"""技术指标测试模块"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from analyzer.indicators import IndicatorEngine
+
+
+def price_series(count: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, count))), 2)
+
+
+def wilder_rsi(prices: np.ndarray, period: int = 14) -> float:
+    """逐步计算的 Wilder RSI（参考实现）"""
+    changes = np.diff(prices)
+    gains, losses = np.maximum(changes, 0), np.maximum(-changes, 0)
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def history(symbols, count: int):
+    start = datetime(2024, 1, 2, 9)
+    rows = []
+    for k, symbol in enumerate(symbols):
+        for i, price in enumerate(price_series(count, seed=k)):
+            rows.append({'symbol': symbol, 'price': float(price),
+                         'timestamp': (start + timedelta(hours=i)).isoformat()})
+    return rows
+
+
+class TestIndicatorEngine:
+    """增量指标测试"""
+
+    def test_matches_reference(self):
+        prices = price_series(120)
+        engine = IndicatorEngine()
+        for price in prices:
+            engine.update("AAPL", price)
+        snapshot = engine.snapshot("AAPL")
+        series = pd.Series(prices)
+
+        for window in (5, 10, 20):
+            assert snapshot[f'sma_{window}'] == pytest.approx(series.rolling(window).mean().iloc[-1], abs=1e-4)
+        ema_fast = series.ewm(span=12, adjust=False).mean()
+        ema_slow = series.ewm(span=26, adjust=False).mean()
+        macd = ema_fast - ema_slow
+        signal = macd.ewm(span=9, adjust=False).mean()
+        assert snapshot['ema_fast'] == pytest.approx(ema_fast.iloc[-1], abs=1e-4)
+        assert snapshot['macd'] == pytest.approx(macd.iloc[-1], abs=1e-4)
+        assert snapshot['macd_signal'] == pytest.approx(signal.iloc[-1], abs=1e-4)
+        assert snapshot['macd_hist'] == pytest.approx(macd.iloc[-1] - signal.iloc[-1], abs=1e-4)
+        assert snapshot['rsi'] == pytest.approx(wilder_rsi(prices), abs=1e-4)
+
+        middle = series.rolling(20).mean().iloc[-1]
+        std = series.rolling(20).std(ddof=0).iloc[-1]
+        assert snapshot['bb_middle'] == pytest.approx(middle, abs=1e-4)
+        assert snapshot['bb_upper'] == pytest.approx(middle + 2 * std, abs=1e-4)
+        assert snapshot['bb_lower'] == pytest.approx(middle - 2 * std, abs=1e-4)
+
+    def test_not_enough_samples(self):
+        engine = IndicatorEngine()
+        for price in price_series(6):
+            engine.update("AAPL", price)
+        snapshot = engine.snapshot("AAPL")
+        assert snapshot['samples'] == 6
+        assert snapshot['sma_5'] is not None
+        assert snapshot['sma_10'] is None
+        assert snapshot['rsi'] is None
+        assert snapshot['bb_middle'] is None
+        assert engine.snapshot("MSFT") is None
+
+    def test_ingest_matches_incremental(self):
+        rows = history(["A", "B", "C"], 60)
+        bulk = IndicatorEngine(initial_capacity=1)
+        # 打乱顺序，ingest 按时间排序
+        assert bulk.ingest(list(reversed(rows))) == len(rows)
+
+        incremental = IndicatorEngine()
+        for row in rows:
+            incremental.update(row['symbol'], row['price'], row['timestamp'])
+
+        for symbol in ["A", "B", "C"]:
+            expected = incremental.snapshot(symbol)
+            actual = bulk.snapshot(symbol)
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                assert actual[key] == (pytest.approx(value, abs=1e-4) if isinstance(value, float) else value)
+
+    def test_duplicate_ticks_are_ignored(self):
+        rows = history(["A"], 30)
+        engine = IndicatorEngine()
+        engine.ingest(rows)
+        before = engine.snapshot("A")
+
+        assert engine.ingest(rows[-5:]) == 0
+        assert engine.snapshot("A") == before
+        assert engine.update("A", 1.0, rows[-1]['timestamp']) is False
+
+    def test_dataframe_and_many_symbols(self):
+        rows = history([f"S{i}" for i in range(50)], 25)
+        engine = IndicatorEngine(initial_capacity=4)
+        engine.ingest(pd.DataFrame(rows))
+
+        assert len(engine.symbols) == 50
+        snapshots = engine.snapshot_many(engine.symbols)
+        assert all(s['sma_20'] is not None for s in snapshots)
+        for k in (0, 49):
+            prices = price_series(25, seed=k)
+            assert snapshots[k]['sma_20'] == pytest.approx(prices[-20:].mean(), abs=1e-4)
@@ -0,0 +1,178 @@
+"""异步任务队列测试模块（使用 fakeredis 作为本地 Redis 替身）"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analyzer import jobs
+from analyzer.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobError, JobQueue, JobWorker, LeaseLost
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(client=fakeredis.FakeRedis(), visibility_timeout=60, max_attempts=2)
+
+
+def echo(payload, progress):
+    progress(1, 2)
+    progress(2, 2)
+    return {'echo': payload}
+
+
+class TestJobQueue:
+    """队列与工作进程逻辑测试"""
+
+    def test_submit_and_complete(self, queue):
+        """提交、领取、报告进度并完成"""
+        job_id = queue.submit('echo', {'x': 1})
+        assert queue.status(job_id)['status'] == QUEUED
+        assert queue.queue_length() == 1
+
+        worker = JobWorker(queue, {'echo': echo}, name='w1')
+        assert worker.run_once(timeout=0) == job_id
+        status = queue.status(job_id)
+        assert (status['status'], status['progress'], status['processed'], status['total']) == (SUCCEEDED, 1.0, 2, 2)
+        assert status['worker'] == 'w1'
+        assert queue.result(job_id) == {'echo': {'x': 1}}
+        assert queue.queue_length() == 0
+        assert worker.run_once(timeout=0) is None
+
+    def test_retry_then_fail(self, queue):
+        """异常时重试，超过最多次数后标记失败"""
+        calls = []
+
+        def flaky(payload, progress):
+            calls.append(payload)
+            raise RuntimeError("boom")
+
+        job_id = queue.submit('flaky', None)
+        worker = JobWorker(queue, {'flaky': flaky})
+        worker.run_once(timeout=0)
+        assert queue.status(job_id)['status'] == QUEUED
+        worker.run_once(timeout=0)
+        status = queue.status(job_id)
+        assert (status['status'], status['attempts']) == (FAILED, 2)
+        assert "boom" in status['error']
+        assert len(calls) == 2
+
+    def test_invalid_payload_not_retried(self, queue):
+        """参数错误直接失败，不重试"""
+        def invalid(payload, progress):
+            raise JobError("bad payload")
+
+        job_id = queue.submit('invalid', None)
+        JobWorker(queue, {'invalid': invalid}).run_once(timeout=0)
+        assert queue.status(job_id)['status'] == FAILED
+        assert queue.status(job_id)['attempts'] == 1
+
+    def test_visibility_timeout(self, queue):
+        """租约到期未完成的任务重新排队"""
+        queue.visibility_timeout = -1
+        job_id = queue.submit('echo', 1)
+        assert queue.claim('crashed', timeout=0) == (job_id, 'crashed:1')
+        assert queue.status(job_id)['status'] == RUNNING
+
+        assert queue.requeue_expired() == [job_id]
+        assert queue.requeue_expired() == []
+        assert queue.status(job_id)['status'] == QUEUED
+        queue.visibility_timeout = 60
+        JobWorker(queue, {'echo': echo}).run_once(timeout=0)
+        assert queue.result(job_id) == {'echo': 1}
+
+    def test_stale_worker_rejected(self, queue):
+        """租约到期后原执行者的完成、失败和进度报告都不生效，任务由新执行者完成"""
+        queue.visibility_timeout = -1
+        job_id = queue.submit('echo', 1)
+        _, stale = queue.claim('slow', timeout=0)
+        assert queue.requeue_expired() == [job_id]
+        assert queue.complete(job_id, stale, {'echo': 'stale'}) is False
+        assert queue.status(job_id)['status'] == QUEUED
+        assert queue.result(job_id) is None
+
+        queue.visibility_timeout = 60
+        _, token = queue.claim('w2', timeout=0)
+        assert token == 'w2:2'
+        assert queue.fail(job_id, stale, "late failure", retry=False) is None
+        with pytest.raises(LeaseLost):
+            queue.report_progress(job_id, stale, 1, 2)
+        queue.report_progress(job_id, token, 1, 2)
+        assert queue.complete(job_id, token, {'echo': 1}) is True
+        assert queue.complete(job_id, stale, {'echo': 'stale'}) is False
+        status = queue.status(job_id)
+        assert (status['status'], status['worker']) == (SUCCEEDED, 'w2')
+        assert queue.result(job_id) == {'echo': 1}
+
+    def test_lease_lost_during_run(self, queue):
+        """执行中租约失效时放弃本次执行，任务按重新排队的状态继续"""
+        def slow(payload, progress):
+            queue.requeue_expired()
+            progress(1, 1)
+            return 'stale'
+
+        queue.visibility_timeout = -1
+        job_id = queue.submit('slow', 1)
+        JobWorker(queue, {'slow': slow}).run_once(timeout=0)
+        assert queue.status(job_id)['status'] == QUEUED
+        assert queue.result(job_id) is None
+
+    def test_finished_job_not_rerun(self, queue):
+        """已结束的任务 ID 再次出现在队列中时直接丢弃，不执行处理函数"""
+        calls = []
+        job_id = queue.submit('echo', 1)
+        JobWorker(queue, {'echo': echo}).run_once(timeout=0)
+        queue.client.lpush(queue._key("queue"), job_id)
+
+        assert JobWorker(queue, {'echo': calls.append}).run_once(timeout=0) is None
+        assert calls == []
+        assert queue.status(job_id)['status'] == SUCCEEDED
+        assert queue.result(job_id) == {'echo': 1}
+        assert queue.client.llen(queue._key("processing")) == 0
+
+    def test_missing_payload_fails(self, queue):
+        """参数丢失的任务标记为失败，不执行处理函数"""
+        job_id = queue.submit('echo', 1)
+        queue.client.delete(queue._key("payload", job_id))
+        assert queue.claim('w1', timeout=0) is None
+        status = queue.status(job_id)
+        assert (status['status'], status['error']) == (FAILED, "payload missing")
+
+    def test_sentiment_handler(self, queue):
+        """sentiment 任务分块打分并报告进度"""
+        news = [{'title': '科技股大涨', 'content': '芯片板块涨停'}, {'title': '市场暴跌', 'content': '恐慌情绪蔓延'}]
+        job_id = queue.submit('sentiment', news)
+        JobWorker(queue, handler_options={'sentiment': {'chunk_size': 1}}).run_once(timeout=0)
+        assert queue.status(job_id)['processed'] == 2
+        assert len(queue.result(job_id)['details']) == 2
+
+
+class TestJobEndpoints:
+    """任务接口测试"""
+
+    def test_submit_poll_result(self, monkeypatch):
+        queue = JobQueue(client=fakeredis.FakeRedis())
+        monkeypatch.setattr(main, "job_queue", queue)
+        client = TestClient(main.app)
+
+        response = client.post("/jobs/daily", json={
+            "stock_data": [{'symbol': 'A', 'change_percent': 1.0}],
+            "news_data": [{'title': '科技股大涨', 'content': '芯片板块涨停'}],
+        })
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert client.get(f"/jobs/{job_id}").json()["status"] == QUEUED
+        assert client.get(f"/jobs/{job_id}/result").status_code == 202
+
+        JobWorker(queue).run_once(timeout=0)
+        result = client.get(f"/jobs/{job_id}/result")
+        assert result.status_code == 200
+        assert result.json()["investment_advice"]["risk_assessment"].startswith("当前市场风险等级")
+
+        assert client.post("/jobs/unknown", json={}).status_code == 404
+        assert client.get("/jobs/missing").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
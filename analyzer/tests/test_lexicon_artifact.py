@@ -0,0 +1,149 @@
+"""词典制品测试模块"""
+
+import os
+
+import jieba
+import pytest
+from analyzer.financial_lexicon import FinancialLexicon
+from analyzer.lexicon_artifact import (
+    LexiconArtifactError, LexiconReloader, compile_lexicon, load_lexicon, read_artifact, sync_lexicon,
+)
+from analyzer.sentiment import SentimentAnalyzer
+from analyzer.warmup import lexicon_words
+
+
+def tuned_lexicon(**weights) -> FinancialLexicon:
+    """在内置词表基础上调整正面词权重"""
+    tables = FinancialLexicon().to_tables()
+    tables["positive_words"] = {**tables["positive_words"], **weights}
+    return FinancialLexicon(tables)
+
+
+class TestLexiconArtifact:
+    """制品编译与加载测试"""
+
+    def test_round_trip_preserves_tables_and_version(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        builtin = FinancialLexicon()
+        version = compile_lexicon(builtin, path)
+
+        loaded = load_lexicon(path)
+        assert version == builtin.version
+        assert loaded.version == builtin.version
+        assert loaded.source == path
+        assert loaded.to_tables() == builtin.to_tables()
+        # 词表顺序影响打分时的遍历顺序，必须保持
+        assert list(loaded.positive_words) == list(builtin.positive_words)
+
+    def test_loaded_lexicon_scores_identically(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        builtin = FinancialLexicon()
+        compile_lexicon(builtin, path)
+        loaded = load_lexicon(path)
+
+        text = "科技股大涨，芯片板块涨停，但地产股暴跌，市场恐慌"
+        assert loaded.analyze_text_sentiment(text) == builtin.analyze_text_sentiment(text)
+
+    def test_version_changes_with_weights(self):
+        assert tuned_lexicon(大涨=0.5).version != FinancialLexicon().version
+
+    def test_header_counts(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(FinancialLexicon(), path)
+        header, _ = read_artifact(path)
+        assert header["counts"]["positive_words"] == len(FinancialLexicon().positive_words)
+
+    def test_corrupted_payload_rejected(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(FinancialLexicon(), path)
+        with open(path, "r+b") as f:
+            f.seek(-2, os.SEEK_END)
+            f.write(b"!!")
+
+        with pytest.raises(LexiconArtifactError):
+            load_lexicon(path)
+
+    def test_not_an_artifact(self, tmp_path):
+        path = tmp_path / "lexicon.json"
+        path.write_text("{}")
+        with pytest.raises(LexiconArtifactError):
+            load_lexicon(str(path))
+
+
+class TestLexiconReloader:
+    """热更新测试"""
+
+    def test_reload_swaps_lexicon(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(FinancialLexicon(), path)
+        analyzer = SentimentAnalyzer(lexicon=load_lexicon(path))
+        reloader = LexiconReloader(path, [analyzer])
+        assert reloader.reload() is False
+
+        tuned = tuned_lexicon(大涨=0.1)
+        compile_lexicon(tuned, path)
+        assert reloader.reload(force=True) is True
+        assert analyzer.lexicon.version == tuned.version
+        assert analyzer.result_version == tuned.version
+        assert analyzer.lexicon.positive_words["大涨"] == 0.1
+
+    def test_unchanged_file_is_not_reloaded(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(FinancialLexicon(), path)
+        analyzer = SentimentAnalyzer(lexicon=load_lexicon(path))
+        reloader = LexiconReloader(path, [analyzer])
+        reloader.reload()
+        current = analyzer.lexicon
+
+        assert reloader.reload() is False
+        assert analyzer.lexicon is current
+
+    def test_broken_artifact_keeps_current_lexicon(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(FinancialLexicon(), path)
+        analyzer = SentimentAnalyzer(lexicon=load_lexicon(path))
+        current = analyzer.lexicon
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+
+        with pytest.raises(LexiconArtifactError):
+            LexiconReloader(path, [analyzer]).reload(force=True)
+        assert analyzer.lexicon is current
+
+    def test_reload_removes_dropped_words(self, tmp_path):
+        """新词典不再包含的词从 jieba 中移除，分词与未加入该词时相同"""
+        text = "公司实现跨越腾飞式增长"
+        before = jieba.lcut(text)
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(tuned_lexicon(跨越腾飞式增长=0.9), path)
+        analyzer = SentimentAnalyzer(lexicon=load_lexicon(path))
+        assert "跨越腾飞式增长" in jieba.lcut(text)
+
+        compile_lexicon(FinancialLexicon(), path)
+        assert LexiconReloader(path, [analyzer]).reload(force=True) is True
+        assert jieba.lcut(text) == before
+        assert "大涨" in jieba.lcut("今日大涨")
+
+    def test_removed_default_word_keeps_default_freq(self, tmp_path):
+        """移除的词在 jieba 默认词库中时恢复默认词频"""
+        jieba.initialize()
+        word = next(w for w in ("增长", "公司", "市场") if jieba.dt.FREQ.get(w) and w not in lexicon_words(FinancialLexicon()))
+        default_freq = jieba.dt.FREQ[word]
+        path = str(tmp_path / "lexicon.bin")
+        compile_lexicon(tuned_lexicon(**{word: 0.3}), path)
+        analyzer = SentimentAnalyzer()
+        sync_lexicon(analyzer, path, load_lexicon(path).version)
+        assert jieba.dt.FREQ[word] != default_freq
+
+        compile_lexicon(FinancialLexicon(), path)
+        sync_lexicon(analyzer, path, FinancialLexicon().version)
+        assert jieba.dt.FREQ[word] == default_freq
+
+    def test_sync_lexicon(self, tmp_path):
+        path = str(tmp_path / "lexicon.bin")
+        tuned = tuned_lexicon(大涨=0.2)
+        compile_lexicon(tuned, path)
+        analyzer = SentimentAnalyzer()
+
+        sync_lexicon(analyzer, path, tuned.version)
+        assert analyzer.lexicon.version == tuned.version
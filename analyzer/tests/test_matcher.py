@@ -0,0 +1,121 @@
+"""多模式匹配器测试模块"""
+
+import pytest
+from analyzer.matcher import AhoCorasickMatcher, AHOCORASICK_AVAILABLE
+from analyzer.financial_lexicon import FinancialLexicon
+
+
+# 覆盖重叠词、否定词、修饰词、行业词和中英混合的黄金语料
+GOLDEN_CORPUS = [
+    "股市大涨，利好消息不断，投资者信心增强",
+    "市场暴跌，恐慌情绪蔓延，投资者纷纷抛售",
+    "芯片和人工智能板块持续走强",
+    "光伏和锂电池概念股大涨",
+    "多只个股连续涨停，创历史新高，北向资金流入明显",
+    "业绩暴雷叠加业绩下滑，公司股价连续跌停，外资撤离",
+    "央行宣布降准降息，市场预计流动性宽松，银行券商保险集体走强",
+    "AI 与 5G 概念反弹，Apple 利好消息提振科技股",
+    "震荡调整中市场谨慎观望，不确定性仍然较大，横盘整理",
+    "涨停涨停涨停，跌停跌停",
+    "没有明显利空，风险可控，小幅回调后企稳回升",
+    "",
+    "今天天气很好",
+]
+
+
+def naive_analyze(lexicon: FinancialLexicon, text: str) -> dict:
+    """逐词扫描的参考实现（自动机改造前的算法）"""
+    positive_count = negative_count = neutral_count = 0
+    total_score = 0
+    word_count = 0
+    found_words = []
+    for word, score in lexicon.positive_words.items():
+        if word in text:
+            count = text.count(word)
+            positive_count += count
+            total_score += score * count
+            word_count += count
+            found_words.append({"word": word, "score": score, "type": "positive", "count": count})
+    for word, score in lexicon.negative_words.items():
+        if word in text:
+            count = text.count(word)
+            negative_count += count
+            total_score += score * count
+            word_count += count
+            found_words.append({"word": word, "score": score, "type": "negative", "count": count})
+    for word in lexicon.neutral_words:
+        if word in text:
+            count = text.count(word)
+            neutral_count += count
+            total_score += 0.5 * count
+            word_count += count
+    modifier_effect = 1.0
+    for modifier, effect in lexicon.sentiment_modifiers.items():
+        if modifier in text:
+            modifier_effect = modifier_effect * -1 if effect == -1.0 else modifier_effect * effect
+    if word_count > 0:
+        avg_score = total_score / word_count
+        if modifier_effect < 0:
+            avg_score = 1 - avg_score
+        else:
+            avg_score = avg_score * (modifier_effect ** 0.3)
+        avg_score = max(0, min(1, avg_score))
+    else:
+        avg_score = 0.5
+    detected_industries = []
+    for industry, keywords in lexicon.industry_keywords.items():
+        for keyword in keywords:
+            if keyword in text:
+                detected_industries.append(industry)
+                break
+    return {
+        "score": avg_score,
+        "positive_count": positive_count,
+        "negative_count": negative_count,
+        "neutral_count": neutral_count,
+        "total_keywords": word_count,
+        "found_words": sorted(found_words, key=lambda x: abs(x["score"] - 0.5), reverse=True)[:10],
+        "detected_industries": detected_industries,
+        "sentiment_label": lexicon._get_label(avg_score),
+    }
+
+
+BACKENDS = [False, True] if AHOCORASICK_AVAILABLE else [False]
+
+
+class TestAhoCorasickMatcher:
+    """Aho-Corasick 匹配器测试"""
+
+    @pytest.mark.parametrize("use_native", BACKENDS)
+    def test_iter_matches_positions(self, use_native):
+        """测试命中位置"""
+        matcher = AhoCorasickMatcher(["涨停", "连续涨停", "停"], use_native=use_native)
+        matches = sorted((start, matcher.patterns[index]) for start, index in matcher.iter_matches("连续涨停"))
+        assert matches == [(0, "连续涨停"), (2, "涨停"), (3, "停")]
+
+    @pytest.mark.parametrize("use_native", BACKENDS)
+    def test_count_matches_str_count(self, use_native):
+        """测试计数与 str.count 一致（同一模式不重叠）"""
+        patterns = ["aa", "aba", "b", "涨停", "跌停"]
+        matcher = AhoCorasickMatcher(patterns, use_native=use_native)
+        for text in ["aaaa", "abababa", "涨停涨停跌停", "", "xyz"]:
+            counts = matcher.count(text)
+            for pattern in patterns:
+                assert counts.get(pattern, 0) == text.count(pattern)
+
+    def test_empty_patterns(self):
+        """测试空模式集合"""
+        matcher = AhoCorasickMatcher(["", ""])
+        assert matcher.patterns == []
+        assert matcher.count("任意文本") == {}
+
+
+class TestLexiconGoldenCorpus:
+    """词典自动机与逐词扫描结果一致性测试"""
+
+    @pytest.mark.parametrize("use_native", BACKENDS)
+    @pytest.mark.parametrize("text", GOLDEN_CORPUS)
+    def test_matches_naive_scan(self, text, use_native):
+        lexicon = FinancialLexicon()
+        lexicon.matcher = AhoCorasickMatcher(lexicon.matcher.patterns, use_native=use_native)
+        assert lexicon.analyze_text_sentiment(text) == naive_analyze(lexicon, text)
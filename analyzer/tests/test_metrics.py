@@ -0,0 +1,76 @@
+"""运行指标测试模块"""
+
+import pytest
+from analyzer import metrics
+from analyzer.advisor import InvestmentAdvisor
+from analyzer.cache import ArticleCache
+from analyzer.metrics import Counter, Histogram, Registry
+from analyzer.sentiment import SentimentAnalyzer
+
+
+class TestMetrics:
+    """直方图、计数器与文本格式测试"""
+
+    def test_histogram_render(self):
+        """分桶为累计计数，并输出 sum / count"""
+        registry = Registry()
+        histogram = registry.register(Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0)))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, "a")
+        text = registry.render()
+        assert "# TYPE demo_seconds histogram" in text
+        assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{stage="a",le="1"} 3' in text
+        assert 'demo_seconds_bucket{stage="a",le="+Inf"} 4' in text
+        assert 'demo_seconds_sum{stage="a"} 4.05' in text
+        assert 'demo_seconds_count{stage="a"} 4' in text
+
+    def test_counter_render(self):
+        """计数器按标签累加，导出名带 _total"""
+        registry = Registry()
+        counter = registry.register(Counter("demo_requests", "Demo", ("result",)))
+        counter.inc(2, "hit")
+        counter.inc(1, "miss")
+        text = registry.render()
+        assert "# TYPE demo_requests_total counter" in text
+        assert 'demo_requests_total{result="hit"} 2' in text
+        assert 'demo_requests_total{result="miss"} 1' in text
+        with pytest.raises(ValueError):
+            registry.register(Counter("demo_requests", "Duplicate"))
+
+    def test_timer(self):
+        """计时上下文记录一次观测"""
+        histogram = Histogram("timer_seconds", "Demo", ("stage",))
+        with histogram.time("x"):
+            pass
+        assert histogram.count("x") == 1
+
+
+class TestInstrumentation:
+    """分析器埋点测试"""
+
+    def test_sentiment_stages(self):
+        """逐条打分记录各阶段耗时、批量大小和缓存命中"""
+        analyzer = SentimentAnalyzer(result_cache=ArticleCache(max_entries=10))
+        stages = ('clean_text', 'snownlp', 'lexicon', 'keywords', 'cache_lookup')
+        before = {stage: metrics.stage_seconds.count(stage) for stage in stages}
+        hits, misses = metrics.cache_requests.value('hit'), metrics.cache_requests.value('miss')
+
+        news = [{'title': '科技股大涨', 'content': '芯片板块涨停'}]
+        analyzer.score_news(news)
+        analyzer.score_news(news)
+
+        assert {stage: metrics.stage_seconds.count(stage) - before[stage] for stage in stages} == {
+            'clean_text': 1, 'snownlp': 1, 'lexicon': 1, 'keywords': 1, 'cache_lookup': 2}
+        assert metrics.cache_requests.value('hit') - hits == 1
+        assert metrics.cache_requests.value('miss') - misses == 1
+
+    def test_advice_stage(self):
+        """生成投资建议记录耗时"""
+        before = metrics.stage_seconds.count('advice')
+        InvestmentAdvisor().generate_advice([{'change_percent': 1.0}], {})
+        assert metrics.stage_seconds.count('advice') == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,9 +1,12 @@
 """情感分析器测试模块"""
 
 import pytest
-from analyzer.sentiment import SentimentAnalyzer
+from analyzer.sentiment import SentimentAnalyzer, columnar_result, parse_fields
+from analyzer.cache import ArticleCache
 from analyzer.models import SentimentAnalysisResult
 from analyzer.financial_lexicon import FinancialLexicon, financial_lexicon
+from analyzer.batch import BatchSentimentEngine
+from analyzer.warmup import build_jieba_dictionary, load_jieba_dictionary
 
 
 class TestFinancialLexicon:
@@ -187,6 +190,133 @@ class TestSentimentAnalyzer:
         assert 0.0 <= result["score"] <= 1.0
 
 
+class TestDocumentContext:
+    """文档分析上下文测试"""
+
+    def test_intermediate_results_cached(self):
+        """测试分词和词典命中只计算一次"""
+        analyzer = SentimentAnalyzer()
+        doc = analyzer.document("芯片板块大涨，利好消息不断")
+
+        assert doc.tokens is doc.tokens
+        assert doc.lexicon_hits is doc.lexicon_hits
+        assert doc.lexicon_result is doc.lexicon_result
+        assert "科技" in doc.industries
+
+    def test_snownlp_score_matches_snownlp(self):
+        """测试上下文中的 SnowNLP 分数与 SnowNLP 原始接口一致（向量化计算只有浮点舍入误差）"""
+        from snownlp import SnowNLP
+
+        analyzer = SentimentAnalyzer()
+        text = "市场暴跌，恐慌情绪蔓延"
+        assert analyzer.document(text).snownlp_score == pytest.approx(SnowNLP(text).sentiments, abs=1e-9)
+
+
+class TestPrebuiltJiebaDictionary:
+    """预构建 jieba 词典测试"""
+
+    def test_round_trip(self, tmp_path):
+        """测试生成后可加载，且金融词汇已在词库中"""
+        import jieba
+
+        path = str(tmp_path / "jieba.dict")
+        build_jieba_dictionary(financial_lexicon, path)
+
+        assert load_jieba_dictionary(financial_lexicon, path)
+        assert "北向资金流入" in jieba.dt.FREQ
+        assert "北向资金流入" in jieba.lcut("今日北向资金流入明显")
+
+    def test_stale_or_missing_file(self, tmp_path):
+        """测试词典版本不匹配或文件不存在时退回默认加载"""
+        path = str(tmp_path / "jieba.dict")
+        build_jieba_dictionary(financial_lexicon, path)
+
+        other = FinancialLexicon()
+        other.version = "other"
+        assert not load_jieba_dictionary(other, path)
+        assert not load_jieba_dictionary(financial_lexicon, str(tmp_path / "missing"))
+
+
+class TestBatchSentimentEngine:
+    """批量情感分析引擎测试"""
+
+    NEWS = [
+        {'title': '科技股大涨', 'content': '芯片板块多只股票涨停'},
+        {'title': '', 'content': ''},
+        {'title': '市场暴跌', 'content': '恐慌情绪蔓延，资金流出'},
+        {'title': '央行降准', 'content': '<p>流动性宽松，银行板块走强</p>'},
+        {'title': '横盘整理', 'content': '市场观望情绪浓厚'},
+    ]
+
+    def test_process_pool_matches_serial(self):
+        """测试进程池结果与串行结果一致且保持输入顺序"""
+        analyzer = SentimentAnalyzer()
+        expected = analyzer.analyze_news_sentiment(self.NEWS)
+
+        with BatchSentimentEngine(analyzer=analyzer, workers=2, chunk_size=2) as engine:
+            result = engine.analyze_news_sentiment(self.NEWS)
+
+        assert result == expected
+        assert [d['title'] for d in result.details] == ['科技股大涨', '市场暴跌', '央行降准', '横盘整理']
+
+    def test_empty_batch(self):
+        """测试空批次"""
+        engine = BatchSentimentEngine(workers=2)
+        result = engine.analyze_news_sentiment([])
+        assert result.overall_sentiment == 0.5
+        assert engine._executor is None
+
+
+class TestFieldProjection:
+    """明细字段选择与列式结果测试"""
+
+    NEWS = TestBatchSentimentEngine.NEWS
+
+    def test_parse_fields(self):
+        assert parse_fields(None) is None
+        assert parse_fields(" ") is None
+        assert parse_fields("title, sentiment,title") == ('title', 'sentiment')
+        with pytest.raises(ValueError):
+            parse_fields("title,score")
+
+    def test_projection_skips_keywords(self, monkeypatch):
+        """不请求 keywords 时不提取关键词，分数与完整结果相同"""
+        analyzer = SentimentAnalyzer()
+        full = analyzer.analyze_news_sentiment(self.NEWS)
+
+        def fail(doc):
+            raise AssertionError("keywords should not be extracted")
+
+        monkeypatch.setattr(analyzer, "keywords_from", fail)
+        result = analyzer.analyze_news_sentiment(self.NEWS, fields=('sentiment', 'title'))
+        assert result.overall_sentiment == full.overall_sentiment
+        assert result.details == [{'sentiment': d['sentiment'], 'title': d['title']} for d in full.details]
+
+    def test_projection_cached_separately(self):
+        """不含关键词的明细不会被完整请求从缓存中取到"""
+        analyzer = SentimentAnalyzer(result_cache=ArticleCache(max_entries=100))
+        analyzer.analyze_news_sentiment(self.NEWS, fields=('title', 'sentiment'))
+        full = analyzer.analyze_news_sentiment(self.NEWS)
+        assert all('keywords' in detail for detail in full.details)
+
+    def test_batch_engine_projection(self):
+        analyzer = SentimentAnalyzer()
+        expected = analyzer.analyze_news_sentiment(self.NEWS, fields=('title', 'industries'))
+        with BatchSentimentEngine(analyzer=analyzer, workers=2, chunk_size=2) as engine:
+            assert engine.analyze_news_sentiment(self.NEWS, fields=('title', 'industries')) == expected
+
+    def test_columnar_result(self):
+        result = SentimentAnalyzer().analyze_news_sentiment(self.NEWS)
+        columns = columnar_result(result)
+        assert columns.count == 4
+        assert list(columns.columns) == list(result.details[0])
+        assert columns.columns['title'] == [d['title'] for d in result.details]
+        assert columns.overall_sentiment == result.overall_sentiment
+
+        projected = columnar_result(result, ('sentiment', 'cluster'))
+        assert projected.columns == {'sentiment': [d['sentiment'] for d in result.details], 'cluster': [None] * 4}
+
+
 class TestEdgeCases:
     """边界情况测试"""
 
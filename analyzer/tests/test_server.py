@@ -0,0 +1,114 @@
+"""预加载多进程服务测试模块"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analyzer.server import PreforkConflict, PreforkServer, child_pids, memory_report, memory_usage
+
+
+ANALYZER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="requires /proc")
+class TestMemoryReport:
+    """内存统计测试"""
+
+    def test_memory_usage(self):
+        usage = memory_usage(os.getpid())
+        assert usage['rss'] > 0
+        if 'uss' in usage:
+            assert 0 < usage['uss'] <= usage['rss']
+
+    def test_single_mode(self, monkeypatch):
+        monkeypatch.delenv("ANALYZER_PREFORK_MASTER_PID", raising=False)
+        report = memory_report()
+        assert report['mode'] == 'single'
+        assert [p['pid'] for p in report['workers']] == [os.getpid()]
+
+    def test_child_pids(self):
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            assert child.pid in child_pids(os.getpid())
+        finally:
+            child.kill()
+            child.wait()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork") or not os.path.exists("/proc/self/stat"),
+                    reason="requires fork and /proc")
+def test_prefork_server():
+    """主进程预热后 fork 两个工作进程，启动即就绪，并报告每个工作进程的内存"""
+    port = free_port()
+    env = {**os.environ, "WARMUP_ON_STARTUP": "true", "LEXICON_PATH": "", "IN_PROCESS_STATE": "false"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "analyzer.server", "--workers", "2", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ANALYZER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                ready = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=5)
+                break
+            except httpx.TransportError:
+                assert process.poll() is None and time.time() < deadline
+                time.sleep(0.5)
+        assert ready.status_code == 200
+
+        report = httpx.get(f"http://127.0.0.1:{port}/memory", timeout=10).json()
+        assert report['mode'] == 'prefork'
+        assert report['master']['pid'] == process.pid
+        assert len(report['workers']) == 2
+        assert all(w['rss'] > 0 for w in report['workers'])
+        assert httpx.get(f"http://127.0.0.1:{port}/indicators/AAPL", timeout=10).status_code == 503
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+
+
+class TestProcessState:
+    """进程内状态与多工作进程"""
+
+    def test_prefork_refused_with_process_state(self, monkeypatch):
+        """仍启用进程内状态时拒绝启动多个工作进程，单进程不受影响"""
+        monkeypatch.setattr(main.settings, "in_process_state", True)
+        with pytest.raises(PreforkConflict):
+            PreforkServer("main:app", workers=2, preload=False).load()
+        monkeypatch.setattr(main.settings, "in_process_state", False)
+        assert main.prefork_conflicts() == []
+
+    def test_state_endpoints_disabled(self, monkeypatch):
+        """关闭进程内状态后状态接口返回 503，/analyze/daily 按请求数据全量计算且不更新累计量"""
+        monkeypatch.setattr(main.settings, "in_process_state", False)
+        client = TestClient(main.app)
+        assert client.get("/analyze/daily/aggregate").status_code == 503
+        assert client.get("/indicators/AAPL").status_code == 503
+        assert client.post("/indicators/backfill", json=[]).status_code == 503
+
+        before = main.daily_aggregator.day(None).to_dict()
+        response = client.post("/analyze/daily", json={
+            "stock_data": [{'symbol': 'A', 'change_percent': 1.0}],
+            "news_data": [{'title': '科技股大涨', 'content': '芯片板块涨停'}],
+        })
+        assert response.status_code == 200
+        assert main.daily_aggregator.day(None).to_dict() == before
+        assert "A" not in main.indicator_engine.symbols
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+"""向量化 SnowNLP 模型测试模块 - 与 SnowNLP 原实现逐条比对"""
+
+import numpy as np
+import pytest
+from analyzer import snownlp_model
+from analyzer.sentiment import SentimentAnalyzer
+from analyzer.snownlp_model import FORMAT_VERSION, SnowNLPModel, default_model
+from benchmarks.corpus import NewsCorpusGenerator
+from snownlp import SnowNLP, normal, seg
+
+
+# 黄金语料：合成新闻 + 边界情况（未登录字出现在片段首/中/尾、整段未登录、中英混排、单字、空文本）
+GOLDEN_TEXTS = NewsCorpusGenerator(seed=7).texts(40, sentences=4) + [
+    "今天天气很好，我很开心！",
+    "这个产品质量太差了，非常失望。",
+    "股市暴跌 A股 3000点 失守，ETF 大幅流出",
+    "囧囧有神，商汤科技 2024年 营收增长 12.5%",
+    "丂丄丅",
+    "丂市场大涨",
+    "市场丂大涨",
+    "市场大涨丂",
+    "市丂丄场大涨，並且股票上漲",
+    "中",
+    "abc def",
+    "",
+    "   ",
+]
+
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope="module")
+def model():
+    return default_model()
+
+
+class TestSegmentation:
+    """分词与原实现一致"""
+
+    def test_matches_snownlp(self, model):
+        expected = [normal.filter_stop(seg.seg(text)) for text in GOLDEN_TEXTS]
+        assert model.words_batch(GOLDEN_TEXTS) == expected
+
+    def test_batch_matches_single(self, model, monkeypatch):
+        """整批、逐条和跨多个分块计算的结果相同"""
+        batch = model.words_batch(GOLDEN_TEXTS)
+        assert [model.words(text) for text in GOLDEN_TEXTS] == batch
+        monkeypatch.setattr(snownlp_model, "_CHUNK_CHARS", 16)
+        assert model.words_batch(GOLDEN_TEXTS) == batch
+
+
+class TestSentiment:
+    """情感分数与原实现一致"""
+
+    def test_matches_snownlp(self, model):
+        expected = [SnowNLP(text).sentiments for text in GOLDEN_TEXTS if text.strip()]
+        actual = model.sentiments([text for text in GOLDEN_TEXTS if text.strip()])
+        assert np.max(np.abs(np.array(actual) - expected)) < TOLERANCE
+
+    def test_unknown_words_and_empty_document(self, model):
+        """未登录词和空文档按加一平滑计算"""
+        from snownlp import sentiment
+        classifier = sentiment.classifier.classifier
+        for words in ([], ["未登录词甲乙丙"], ["上涨", "未登录词甲乙丙", "亏损"]):
+            label, prob = classifier.classify(words)
+            expected = prob if label == 'pos' else 1 - prob
+            assert abs(model.score_words([words])[0] - expected) < TOLERANCE
+
+    def test_analyzer_batch_matches_single(self):
+        """分析器整批打分与逐条打分结果相同"""
+        analyzer = SentimentAnalyzer()
+        news = [{'title': f'新闻{i}', 'content': text} for i, text in enumerate(GOLDEN_TEXTS)]
+        assert analyzer.score_news_items(news) == [analyzer.score_news_item(item) for item in news]
+
+
+class TestModelFile:
+    """导出文件测试"""
+
+    def test_round_trip(self, model, tmp_path):
+        path = str(tmp_path / "snownlp_model.npz")
+        model.save(path)
+        loaded = SnowNLPModel.load(path)
+        assert loaded.info() == model.info()
+        assert loaded.sentiments(GOLDEN_TEXTS) == model.sentiments(GOLDEN_TEXTS)
+
+    def test_rejects_other_format(self, model, tmp_path):
+        path = str(tmp_path / "snownlp_model.npz")
+        np.savez(path, format_version=np.array(FORMAT_VERSION + 1))
+        with pytest.raises(ValueError):
+            SnowNLPModel.load(path)
+
+    def test_default_model_loads_export(self, model, tmp_path, monkeypatch):
+        """设置 SNOWNLP_MODEL_PATH 时从导出文件加载"""
+        path = str(tmp_path / "snownlp_model.npz")
+        model.save(path)
+        monkeypatch.setenv("SNOWNLP_MODEL_PATH", path)
+        monkeypatch.setattr(snownlp_model, "_default", None)
+        loaded = default_model()
+        assert loaded is not model
+        assert loaded.sentiments(GOLDEN_TEXTS[:3]) == model.sentiments(GOLDEN_TEXTS[:3])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
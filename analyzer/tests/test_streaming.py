@@ -0,0 +1,75 @@
+"""流式解析测试模块"""
+
+import asyncio
+import json
+
+import pytest
+from analyzer.streaming import JSONItemParser, StreamFormatError, iter_json_items
+
+
+NEWS = [
+    {'title': '科技股大涨', 'content': '芯片板块涨停，"龙头"领涨'},
+    {'title': '市场暴跌', 'content': '恐慌情绪蔓延 [资金流出]'},
+    {'title': '央行降准', 'content': '流动性宽松'},
+]
+
+
+def collect(chunks):
+    """把字节块喂给 iter_json_items 并收集所有元素"""
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        items = []
+        async for batch in iter_json_items(source()):
+            items.extend(batch)
+        return items
+
+    return asyncio.run(run())
+
+
+def split_bytes(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONItemParser:
+    """增量解析器测试"""
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 64, 4096])
+    def test_json_array_any_chunking(self, size):
+        """测试 JSON 数组在任意位置被切分（包括多字节字符中间）"""
+        data = json.dumps(NEWS, ensure_ascii=False, indent=1).encode("utf-8")
+        assert collect(split_bytes(data, size)) == NEWS
+
+    @pytest.mark.parametrize("size", [1, 5, 4096])
+    def test_ndjson_any_chunking(self, size):
+        """测试 NDJSON（最后一行可以没有换行）"""
+        data = "\n".join(json.dumps(n, ensure_ascii=False) for n in NEWS).encode("utf-8")
+        assert collect(split_bytes(data, size)) == NEWS
+
+    def test_items_yielded_incrementally(self):
+        """测试元素完整后立即返回"""
+        parser = JSONItemParser()
+        assert parser.feed('[{"title": "a"}, {"tit') == [{"title": "a"}]
+        assert parser.feed('le": "b"}]') == [{"title": "b"}]
+        assert parser.close() == []
+
+    def test_empty_body(self):
+        """测试空请求体和空数组"""
+        assert collect([b""]) == []
+        assert collect([b"[ ]"]) == []
+
+    def test_unterminated_array(self):
+        """测试数组未结束"""
+        with pytest.raises(StreamFormatError):
+            collect([b'[{"title": "a"}, {"title"'])
+
+    def test_invalid_ndjson(self):
+        """测试非法 NDJSON 行"""
+        with pytest.raises(StreamFormatError):
+            collect([b'{"title": "a"}\nnot json\n'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""传输格式（内容协商、MessagePack、gzip）测试模块"""
+
+import asyncio
+import gzip
+import json
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from analyzer.wire import JSON, MSGPACK, WireFormatMiddleware, accepts_gzip, dumps_json, negotiate
+
+
+NEWS = [{'title': f'科技股大涨{i}', 'content': '芯片板块涨停，半导体指数创年内新高，资金持续流入科技股。'}
+        for i in range(30)]
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+class TestNegotiation:
+    """Accept / Accept-Encoding 解析测试"""
+
+    def test_negotiate(self):
+        assert negotiate(None) == JSON
+        assert negotiate("*/*") == JSON
+        assert negotiate("application/msgpack") == MSGPACK
+        assert negotiate("application/x-msgpack, application/json;q=0.5") == MSGPACK
+        assert negotiate("application/json, application/msgpack") == JSON
+        assert negotiate("application/msgpack;q=0.5, */*;q=0.9") == JSON
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip("gzip, deflate, br")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip(None)
+        assert not accepts_gzip("br")
+
+    def test_dumps_json(self):
+        content = {'title': '科技股', 'score': 0.5, 'keywords': ['芯片']}
+        assert json.loads(dumps_json(content)) == content
+        assert '科技股'.encode('utf-8') in dumps_json(content)
+
+
+class TestRequestFormats:
+    """请求体格式测试"""
+
+    def test_msgpack_request_and_response(self, client):
+        expected = client.post("/analyze/sentiment", json=NEWS).json()
+        response = client.post("/analyze/sentiment", content=msgpack.packb(NEWS),
+                               headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MSGPACK
+        assert "accept" in response.headers["vary"].lower()
+        assert msgpack.unpackb(response.content) == expected
+
+    def test_gzip_request(self, client):
+        expected = client.post("/analyze/sentiment", json=NEWS).json()
+        body = gzip.compress(json.dumps(NEWS, ensure_ascii=False).encode("utf-8"))
+        response = client.post("/analyze/sentiment", content=body,
+                               headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.json() == expected
+
+    def test_gzip_msgpack_request(self, client):
+        response = client.post("/analyze/sentiment", content=gzip.compress(msgpack.packb(NEWS)),
+                               headers={"Content-Type": "application/x-msgpack", "Content-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert len(response.json()["details"]) == len(NEWS)
+
+    def test_gzip_stream_request(self, client):
+        """流式接口边接收边解压"""
+        body = "\n".join(json.dumps(n, ensure_ascii=False) for n in NEWS[:3]).encode("utf-8")
+        response = client.post("/analyze/sentiment/stream", content=gzip.compress(body),
+                               headers={"Content-Encoding": "gzip"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["type"] == "summary"
+        assert lines[-1]["total"] == 3
+
+    def test_invalid_bodies(self, client):
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        assert client.post("/analyze/sentiment", content=b"not gzip", headers=headers).status_code == 400
+        truncated = gzip.compress(json.dumps(NEWS).encode("utf-8"))[:-20]
+        assert client.post("/analyze/sentiment", content=truncated, headers=headers).status_code == 400
+        assert client.post("/analyze/sentiment", content=b"\xc1",
+                           headers={"Content-Type": "application/msgpack"}).status_code == 400
+        assert client.post("/analyze/sentiment", content=b"[]",
+                           headers={"Content-Type": "application/json", "Content-Encoding": "br"}).status_code == 415
+
+    def test_decompressed_size_limit(self):
+        """解压后超过上限时返回 413"""
+        client = TestClient(WireFormatMiddleware(main.app, max_body_size=1024))
+        body = gzip.compress(json.dumps(NEWS, ensure_ascii=False).encode("utf-8"))
+        assert len(body) < 1024
+        for content_type in ("application/json", "application/msgpack"):
+            response = client.post("/analyze/sentiment", content=body,
+                                   headers={"Content-Type": content_type, "Content-Encoding": "gzip"})
+            assert response.status_code == 413
+
+    def test_msgpack_size_limit_stops_reading(self):
+        """MessagePack 请求体超过上限后立即返回 413，不再接收剩余分块"""
+        middleware = WireFormatMiddleware(main.app, max_body_size=1024)
+        chunk = msgpack.packb(NEWS)[:512]
+        received, sent = [], []
+
+        async def receive():
+            received.append(chunk)
+            return {"type": "http.request", "body": chunk, "more_body": len(received) < 100}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/analyze/sentiment", "query_string": b"",
+                 "headers": [(b"content-type", b"application/msgpack")]}
+        asyncio.run(middleware(scope, receive, send))
+        assert sent[0]["status"] == 413
+        assert len(received) == 3
+
+
+class TestResponseCompression:
+    """响应压缩测试"""
+
+    def test_large_response_compressed(self, client):
+        response = client.post("/analyze/sentiment", json=NEWS, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert len(response.json()["details"]) == len(NEWS)
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_identity(self, client):
+        response = client.post("/analyze/sentiment", json=NEWS, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_stream_compressed_per_chunk(self, client):
+        """流式响应压缩后仍可逐块解压出完整的行"""
+        body = "\n".join(json.dumps(n, ensure_ascii=False) for n in NEWS[:3])
+        with client.stream("POST", "/analyze/sentiment/stream", content=body.encode("utf-8"),
+                           headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            lines = [json.loads(line) for line in response.iter_lines()]
+        assert [line["type"] for line in lines] == ["detail"] * 3 + ["summary"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
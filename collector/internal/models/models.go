@@ -31,6 +31,8 @@ type NewsData struct {
 	PublishedAt   time.Time `json:"published_at"`
 	SentimentScore float64  `json:"sentiment_score" gorm:"type:decimal(3,2)"`
 	Keywords      string    `json:"keywords" gorm:"type:text"`
+	// SentimentVersion 分析器写回 SentimentScore / Keywords 时使用的词典版本
+	SentimentVersion string `json:"sentiment_version" gorm:"size:32"`
 	CreatedAt     time.Time `json:"created_at" gorm:"autoCreateTime"`
 }
 